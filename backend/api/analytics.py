@@ -0,0 +1,230 @@
+"""
+Analyse des items d'un quiz (difficulté, discrimination, distracteurs).
+
+Les tentatives terminées sont décodées par blocs en matrices NumPy
+(tentatives × questions) directement depuis l'encodage compact (voir
+api/encoding.py), puis réduites en sommes par question : nombre de réponses
+justes, produits croisés avec le score total et fréquences des options.
+Seules ces sommes sont conservées (mémoire en O(questions)) ; elles suffisent
+à la difficulté et à la point-bisériale corrigée. L'état est conservé par quiz
+et complété à chaque appel avec les seules nouvelles tentatives ; les
+tentatives archivées (api/archive.py) sont lues une fois, au premier calcul.
+Une tentative sans corrigé (`key_version` nul) est comptée comme lue mais
+exclue des statistiques.
+
+`completed_at` est fixé avant la validation de la transaction : une tentative
+peut apparaître après d'autres plus récentes. Chaque appel relit donc une
+fenêtre avant le filigrane (`ANALYTICS_RESCAN_SECONDS`) ; seuls les ids de
+cette fenêtre sont retenus pour ignorer les doublons. Si le nombre de
+tentatives lues diffère du nombre de tentatives terminées (validation hors
+fenêtre, suppression, purge d'archives), tout est recalculé.
+"""
+from datetime import timedelta
+from threading import Lock
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+
+from .answer_keys import get_stored_keys
+from .archive import archived_attempts
+from .caching import LRUCache
+from .encoding import MAX_OPTIONS
+from .models import Attempt, AttemptArchive
+
+
+NO_CHOICE = -1
+
+
+class QuizAnalysisState:
+    def __init__(self, quiz, questions):
+        self.version = quiz.updated_at
+        self.questions = [
+            {'id': str(q.id), 'text': q.question_text, 'options': list(q.options or []), 'correct': q.correct_answer}
+            for q in questions
+        ]
+        self.option_index = [
+            {option: idx for idx, option in enumerate(q['options'])} for q in self.questions
+        ]
+        self.columns = {q['id']: j for j, q in enumerate(self.questions)}
+        # Colonne 0 des fréquences : sans réponse ; colonnes suivantes : options
+        self.width = max([len(q['options']) for q in self.questions] + [0]) + 1
+        self.result = None
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        n = len(self.questions)
+        # Sommes sur les tentatives analysées (x : justesse 0/1, t : score total)
+        self.count = 0
+        self.item_sums = np.zeros(n, dtype=np.int64)    # Σ x
+        self.cross_sums = np.zeros(n, dtype=np.int64)   # Σ t·x
+        self.total_sum = 0                              # Σ t
+        self.total_sq_sum = 0                           # Σ t²
+        self.option_counts = np.zeros((n, self.width), dtype=np.int64)
+        # Filigrane : date de la dernière tentative intégrée ; ids de la fenêtre de relecture
+        self.watermark = None
+        self.recent = {}
+        self.seen = 0
+        self.archives_loaded = False
+
+    def refresh(self, quiz_id):
+        """Ajoute les tentatives terminées depuis le dernier appel. Retourne True si l'état a changé."""
+        # Compté avant la lecture : toute tentative comptée ici est visible par la lecture qui suit
+        expected = completed_count(quiz_id)
+        added = self.scan(quiz_id)
+        if self.seen != expected:
+            # Validée en retard hors de la fenêtre, ou tentative supprimée : recalcul complet
+            self.reset()
+            self.scan(quiz_id)
+            return True
+        return added
+
+    def scan(self, quiz_id):
+        rescan = timedelta(seconds=getattr(settings, 'ANALYTICS_RESCAN_SECONDS', 60))
+        attempts = Attempt.objects.filter(quiz_id=quiz_id, completed_at__isnull=False)
+        if self.watermark is not None:
+            attempts = attempts.filter(completed_at__gte=self.watermark - rescan)
+        rows = attempts.order_by('completed_at', 'id').values_list(
+            'id', 'completed_at', 'key_version_id', 'choices', 'correct_bits'
+        )
+
+        # Les encodages compacts sont regroupés par corrigé puis décodés en bloc
+        seen = self.seen
+        groups = {}
+        for attempt_id, completed_at, key_id, choices, correct_bits in rows.iterator(chunk_size=2000):
+            if attempt_id in self.recent:
+                continue
+            self.recent[attempt_id] = completed_at
+            self.seen += 1
+            if self.watermark is None or completed_at > self.watermark:
+                self.watermark = completed_at
+            if key_id is None:
+                continue
+            choice_rows, bit_rows = groups.setdefault(key_id, ([], []))
+            choice_rows.append(bytes(choices or b''))
+            bit_rows.append(bytes(correct_bits or b''))
+
+        if not self.archives_loaded:
+            # Lues après la table : une tentative archivée entre-temps est comptée une seule fois
+            for attempt in archived_attempts(quiz_id):
+                if attempt.id in self.recent:
+                    continue
+                self.seen += 1
+                if attempt.key_version_id is None:
+                    continue
+                choice_rows, bit_rows = groups.setdefault(attempt.key_version_id, ([], []))
+                choice_rows.append(attempt.choices)
+                bit_rows.append(attempt.correct_bits)
+            self.archives_loaded = True
+
+        if self.watermark is not None:
+            # Les tentatives plus anciennes que la fenêtre ne seront plus relues
+            horizon = self.watermark - rescan
+            self.recent = {pk: at for pk, at in self.recent.items() if at >= horizon}
+
+        keys = get_stored_keys(list(groups))
+        for key_id, (choice_rows, bit_rows) in groups.items():
+            key = keys.get(key_id)
+            if key is not None and key.questions:
+                self.add(*self.decode(key, choice_rows, bit_rows))
+        return self.seen != seen
+
+    def decode(self, key, choice_rows, bit_rows):
+        """Convertit les tentatives d'un même corrigé vers les colonnes de la version analysée."""
+        m, n = len(choice_rows), len(self.questions)
+        correct = np.zeros((m, n), dtype=np.uint8)
+        choices = np.full((m, n), NO_CHOICE, dtype=np.int16)
+
+        width = len(key.questions)
+        raw_choices = np.frombuffer(b''.join(choice_rows), dtype=np.uint8).reshape(m, width)
+        raw_bits = np.frombuffer(b''.join(bit_rows), dtype=np.uint8).reshape(m, -1)
+        raw_correct = np.unpackbits(raw_bits, axis=1, count=width, bitorder='little')
+        for position, (question_id, _, options) in enumerate(key.questions):
+            j = self.columns.get(str(question_id))
+            if j is None:
+                continue
+            # Table code (octet stocké) -> indice d'option dans la version analysée
+            table = np.full(256, NO_CHOICE, dtype=np.int16)
+            for code, option in enumerate(options[:MAX_OPTIONS], start=1):
+                table[code] = self.option_index[j].get(option, NO_CHOICE)
+            correct[:, j] = raw_correct[:, position]
+            choices[:, j] = table[raw_choices[:, position]]
+        return correct, choices
+
+    def add(self, correct, choices):
+        """Ajoute un bloc de tentatives décodées aux sommes par question."""
+        x = correct.astype(np.int64)
+        totals = x.sum(axis=1)
+        self.count += len(x)
+        self.item_sums += x.sum(axis=0)
+        self.cross_sums += totals @ x
+        self.total_sum += int(totals.sum())
+        self.total_sq_sum += int((totals ** 2).sum())
+
+        # Fréquences des options : un seul bincount sur des indices décalés par question
+        n = len(self.questions)
+        offsets = (choices.astype(np.int64) + 1) + np.arange(n) * self.width
+        self.option_counts += np.bincount(offsets.ravel(), minlength=n * self.width).reshape(n, self.width)
+
+    def compute(self):
+        n, n_questions = self.count, len(self.questions)
+        result = {'attempt_count': n, 'questions': []}
+        if n_questions == 0:
+            return result
+
+        difficulty = np.full(n_questions, np.nan)
+        discrimination = np.full(n_questions, np.nan)
+        if n:
+            s = self.item_sums
+            difficulty = s / n
+            # Point-bisériale corrigée : corrélation entre x et le reste r = t - x (x² = x).
+            # Sommes multipliées par n, en entiers : pas d'erreur d'arrondi sur une variance nulle.
+            rest_sum = self.total_sum - s
+            rest_sq_sum = self.total_sq_sum - 2 * self.cross_sums + s
+            covariance = n * (self.cross_sums - s) - s * rest_sum
+            item_var = n * s - s * s
+            rest_var = n * rest_sq_sum - rest_sum * rest_sum
+            denominator = np.sqrt(item_var.astype(np.float64) * rest_var.astype(np.float64))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                discrimination = np.where(denominator > 0, covariance / denominator, np.nan)
+
+        for j, question in enumerate(self.questions):
+            result['questions'].append({
+                'id': int(question['id']),
+                'question_text': question['text'],
+                'difficulty': None if np.isnan(difficulty[j]) else round(float(difficulty[j]), 4),
+                'discrimination': None if np.isnan(discrimination[j]) else round(float(discrimination[j]), 4),
+                'unanswered': int(self.option_counts[j, 0]),
+                'options': [
+                    {'option': option, 'count': int(self.option_counts[j, idx + 1]),
+                     'is_correct': option == question['correct']}
+                    for idx, option in enumerate(question['options'])
+                ],
+            })
+        return result
+
+
+def completed_count(quiz_id):
+    """Tentatives terminées du quiz, courantes et archivées."""
+    current = Attempt.objects.filter(quiz_id=quiz_id, completed_at__isnull=False).count()
+    archived = AttemptArchive.objects.filter(quiz_id=quiz_id).aggregate(total=Sum('attempt_count'))['total']
+    return current + (archived or 0)
+
+
+_states = LRUCache(maxsize=getattr(settings, 'ANALYTICS_CACHE_SIZE', 64))
+
+
+def get_item_analysis(quiz):
+    state = _states.get(quiz.pk)
+    if state is None or state.version != quiz.updated_at:
+        state = QuizAnalysisState(quiz, quiz.questions.all())
+        _states.set(quiz.pk, state)
+    with state.lock:
+        if state.refresh(quiz.pk) or state.result is None:
+            state.result = state.compute()
+        return dict(state.result, quiz=quiz.pk)
+
+
+def clear_item_analyses():
+    _states.clear()
@@ -0,0 +1,208 @@
+"""
+Corrigés précompilés des quiz.
+
+Un corrigé (`AnswerKey`) est construit une seule fois par version de quiz
+(`Quiz.updated_at`) puis conservé dans un cache LRU : la correction d'une
+tentative devient une simple lecture de dictionnaire, sans requête sur les
+questions. Chaque corrigé est aussi figé en base (`AnswerKeyVersion`), ce qui
+permet de ne stocker dans les tentatives qu'un résultat compact.
+"""
+from functools import reduce
+from operator import or_
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Q
+
+from .caching import LRUCache
+from .encoding import (
+    decode_results, encode_answer, key_digest, normalize_answer, option_codes, pack_bits,
+)
+from .models import AnswerKeyVersion, Question
+
+
+class Grade(NamedTuple):
+    correct_count: int
+    score: float
+    choices: bytes
+    correct_bits: bytes
+    other_answers: object
+
+
+class AnswerKey(NamedTuple):
+    quiz_id: int
+    version: object
+    key_id: int
+    # Corrigé figé : tuple de [id de question, bonne réponse, options]
+    questions: tuple
+    # Tuple de (id de question en str, bonne réponse normalisée, codes des options)
+    entries: tuple
+
+    @property
+    def total(self):
+        return len(self.entries)
+
+    def grade(self, answers):
+        """Corrige un dictionnaire {id_question: réponse} et retourne un `Grade` compact."""
+        correct_count = 0
+        choices = bytearray()
+        flags = []
+        other_answers = {}
+        for position, (question_id, expected, codes) in enumerate(self.entries):
+            user_answer = answers.get(question_id, '')
+            is_correct = normalize_answer(user_answer) == expected
+            if is_correct:
+                correct_count += 1
+            code, other = encode_answer(user_answer, codes)
+            choices.append(code)
+            if other is not None:
+                other_answers[str(position)] = other
+            flags.append(is_correct)
+        score = (correct_count / self.total) * 100 if self.total else 0
+        return Grade(correct_count, score, bytes(choices), pack_bits(flags), other_answers or None)
+
+    def results(self, choices, correct_bits, other_answers=None):
+        """Résultats détaillés {id_question: {'user_answer', 'correct_answer', 'is_correct'}}."""
+        return decode_results(self.questions, choices, correct_bits, other_answers)
+
+
+def make_answer_key(quiz_id, version, key_id, questions):
+    entries = tuple(
+        (str(question_id), normalize_answer(correct_answer), option_codes(options))
+        for question_id, correct_answer, options in questions
+    )
+    return AnswerKey(quiz_id=quiz_id, version=version, key_id=key_id, questions=tuple(questions), entries=entries)
+
+
+_cache = LRUCache(maxsize=getattr(settings, 'ANSWER_KEY_CACHE_SIZE', 512))
+# Corrigés figés par id : immuables, jamais invalidés
+_stored = LRUCache(maxsize=getattr(settings, 'ANSWER_KEY_CACHE_SIZE', 512))
+
+
+def store_versions(pending):
+    """
+    Fige les corrigés {quiz_id: questions} et retourne {quiz_id: id de version}.
+    Une version identique déjà en base (même empreinte) est réutilisée.
+    """
+    digests = {quiz_id: key_digest(questions) for quiz_id, questions in pending.items()}
+    lookup = reduce(or_, (Q(quiz_id=quiz_id, digest=digest) for quiz_id, digest in digests.items()))
+
+    def existing():
+        rows = AnswerKeyVersion.objects.filter(lookup).values_list('quiz_id', 'digest', 'pk')
+        return {(quiz_id, digest): pk for quiz_id, digest, pk in rows}
+
+    found = existing()
+    missing = [
+        AnswerKeyVersion(quiz_id=quiz_id, digest=digest, questions=pending[quiz_id])
+        for quiz_id, digest in digests.items() if (quiz_id, digest) not in found
+    ]
+    if missing:
+        AnswerKeyVersion.objects.bulk_create(missing, ignore_conflicts=True)
+        found = existing()
+    return {quiz_id: found[(quiz_id, digest)] for quiz_id, digest in digests.items()}
+
+
+def _question_rows(quiz_ids):
+    return (
+        Question.objects.filter(quiz_id__in=quiz_ids)
+        .order_by('quiz_id', 'order', 'id')
+        .values_list('quiz_id', 'id', 'correct_answer', 'options')
+    )
+
+
+def build_answer_keys(quizzes):
+    questions = {quiz.pk: [] for quiz in quizzes}
+    for quiz_id, question_id, correct_answer, options in _question_rows(list(questions)):
+        questions[quiz_id].append([question_id, correct_answer, list(options or [])])
+    key_ids = store_versions(questions)
+
+    keys = {}
+    for quiz in quizzes:
+        key = make_answer_key(quiz.pk, quiz.updated_at, key_ids[quiz.pk], questions[quiz.pk])
+        _cache.set(quiz.pk, key)
+        _stored.set(key.key_id, key)
+        keys[quiz.pk] = key
+    return keys
+
+
+def get_answer_key(quiz):
+    """Retourne le corrigé de la version courante du quiz (construit au besoin)."""
+    key = _cache.get(quiz.pk)
+    if key is None or key.version != quiz.updated_at:
+        key = build_answer_keys([quiz])[quiz.pk]
+    return key
+
+
+def get_answer_keys(quizzes):
+    """
+    Corrigés de plusieurs quiz : ceux absents du cache sont construits
+    ensemble, avec une seule requête sur les questions.
+    """
+    keys = {}
+    missing = []
+    for quiz in quizzes:
+        key = _cache.get(quiz.pk)
+        if key is not None and key.version == quiz.updated_at:
+            keys[quiz.pk] = key
+        else:
+            missing.append(quiz)
+    if missing:
+        keys.update(build_answer_keys(missing))
+    return keys
+
+
+def get_stored_keys(key_ids):
+    """Corrigés figés {id de version: AnswerKey}, chargés en une requête pour ceux hors cache."""
+    keys = {}
+    missing = set()
+    for key_id in key_ids:
+        key = _stored.get(key_id)
+        if key is None:
+            missing.add(key_id)
+        else:
+            keys[key_id] = key
+    if missing:
+        for key_id, quiz_id, questions in AnswerKeyVersion.objects.filter(pk__in=missing).values_list(
+            'pk', 'quiz_id', 'questions'
+        ):
+            key = make_answer_key(quiz_id, None, key_id, questions)
+            _stored.set(key_id, key)
+            keys[key_id] = key
+    return keys
+
+
+async def aget_stored_key(key_id):
+    """Variante async de `get_stored_keys` pour un seul corrigé figé."""
+    key = _stored.get(key_id)
+    if key is None:
+        quiz_id, questions = await AnswerKeyVersion.objects.values_list('quiz_id', 'questions').aget(pk=key_id)
+        key = make_answer_key(quiz_id, None, key_id, questions)
+        _stored.set(key_id, key)
+    return key
+
+
+def apply_grade(attempt, key, grade):
+    attempt.key_version_id = key.key_id
+    attempt.score = grade.score
+    attempt.choices = grade.choices
+    attempt.correct_bits = grade.correct_bits
+    attempt.other_answers = grade.other_answers
+
+
+def attempt_results(attempt, keys=None):
+    """Résultats détaillés d'une tentative, reconstruits depuis son encodage compact."""
+    if attempt.key_version_id is None:
+        return {}
+    key = (keys or {}).get(attempt.key_version_id)
+    if key is None:
+        key = get_stored_keys([attempt.key_version_id])[attempt.key_version_id]
+    return key.results(bytes(attempt.choices), bytes(attempt.correct_bits), attempt.other_answers)
+
+
+def invalidate_answer_key(quiz_id):
+    _cache.pop(quiz_id)
+
+
+def clear_answer_keys():
+    _cache.clear()
+    _stored.clear()
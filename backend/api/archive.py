@@ -0,0 +1,160 @@
+"""
+Rétention des tentatives : purge des tentatives abandonnées et archivage
+des tentatives terminées anciennes.
+
+- Abandonnées (`completed_at` nul, commencées depuis plus de N heures) :
+  supprimées par petits lots, une courte transaction par lot.
+- Terminées avant la date limite : regroupées par (quiz, corrigé figé) et
+  déplacées dans `AttemptArchive`, un lot par transaction (insertion de
+  l'archive et suppression des lignes ensemble, sans perte ni doublon).
+
+Format d'une archive (`AttemptArchive.data`, compressé zlib) : un en-tête
+JSON en colonnes (ids, utilisateurs, dates, scores, réponses libres) puis les
+octets de choix et de justesse, de largeur fixe, de toutes les tentatives.
+Les analyses, les exports et la reconstruction des statistiques les relisent.
+En revanche, une tentative archivée ne figure plus dans l'historique de
+l'élève ni dans le détail des tentatives et n'est plus exportable en PDF
+(choix assumé, rappelé par l'aide de `apply_retention`) ; son PDF en cache
+est supprimé avec elle.
+"""
+import json
+import struct
+import time
+import zlib
+from datetime import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Attempt, AttemptArchive
+from .pdf import discard_cached
+
+
+ATTEMPT_FIELDS = (
+    'id', 'quiz_id', 'user_id', 'started_at', 'completed_at', 'score',
+    'key_version_id', 'choices', 'correct_bits', 'other_answers',
+)
+HEADER = struct.Struct('<III')
+
+
+class ArchivedAttempt(NamedTuple):
+    id: int
+    quiz_id: int
+    user_id: object
+    started_at: datetime
+    completed_at: datetime
+    score: float
+    key_version_id: object
+    choices: bytes
+    correct_bits: bytes
+    other_answers: object
+
+
+def pack_attempts(rows):
+    """Encode des `ArchivedAttempt` de même largeur (même corrigé) en un bloc compressé."""
+    choice_width = len(rows[0].choices)
+    bit_width = len(rows[0].correct_bits)
+    header = json.dumps({
+        'ids': [row.id for row in rows],
+        'users': [row.user_id for row in rows],
+        'started': [row.started_at.isoformat() for row in rows],
+        'completed': [row.completed_at.isoformat() for row in rows],
+        'scores': [row.score for row in rows],
+        'other': {str(index): row.other_answers for index, row in enumerate(rows) if row.other_answers},
+    }, separators=(',', ':')).encode()
+    body = b''.join([
+        HEADER.pack(len(header), choice_width, bit_width), header,
+        b''.join(row.choices for row in rows), b''.join(row.correct_bits for row in rows),
+    ])
+    return zlib.compress(body, getattr(settings, 'ARCHIVE_COMPRESSION_LEVEL', 9))
+
+
+def unpack_archive(archive):
+    """Tentatives d'une archive, dans l'ordre des ids."""
+    body = zlib.decompress(bytes(archive.data))
+    header_size, choice_width, bit_width = HEADER.unpack_from(body)
+    offset = HEADER.size + header_size
+    columns = json.loads(body[HEADER.size:offset])
+    count = len(columns['ids'])
+    choices = body[offset:offset + count * choice_width]
+    bits = body[offset + count * choice_width:]
+    return [
+        ArchivedAttempt(
+            id=attempt_id,
+            quiz_id=archive.quiz_id,
+            user_id=columns['users'][index],
+            started_at=datetime.fromisoformat(columns['started'][index]),
+            completed_at=datetime.fromisoformat(columns['completed'][index]),
+            score=columns['scores'][index],
+            key_version_id=archive.key_version_id,
+            choices=choices[index * choice_width:(index + 1) * choice_width],
+            correct_bits=bits[index * bit_width:(index + 1) * bit_width],
+            other_answers=columns['other'].get(str(index)),
+        )
+        for index, attempt_id in enumerate(columns['ids'])
+    ]
+
+
+def archived_attempts(quiz_id):
+    """Tentatives archivées d'un quiz, archive par archive (une seule en mémoire à la fois)."""
+    archives = AttemptArchive.objects.filter(quiz_id=quiz_id).order_by('first_attempt_id')
+    for archive in archives.iterator(chunk_size=1):
+        yield from unpack_archive(archive)
+
+
+def _pause(seconds):
+    if seconds:
+        time.sleep(seconds)
+
+
+def purge_abandoned(before, batch_size=None, pause=0.0):
+    """Supprime les tentatives non terminées commencées avant `before`. Retourne le nombre supprimé."""
+    batch_size = batch_size or getattr(settings, 'RETENTION_BATCH_SIZE', 500)
+    stale = Attempt.objects.filter(completed_at__isnull=True, started_at__lt=before)
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(stale.order_by('started_at', 'id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += Attempt.objects.filter(pk__in=ids).delete()[0]
+        discard_cached(ids)
+        _pause(pause)
+
+
+def archive_completed(before, batch_size=None, pause=0.0):
+    """Déplace les tentatives terminées avant `before` dans `AttemptArchive`. Retourne le nombre archivé."""
+    batch_size = batch_size or getattr(settings, 'RETENTION_BATCH_SIZE', 500)
+    # completed_at >= started_at : le filtre sur started_at borne le parcours par son index
+    old = Attempt.objects.filter(started_at__lt=before, completed_at__lt=before)
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = [
+                ArchivedAttempt(*row[:7], bytes(row[7] or b''), bytes(row[8] or b''), row[9])
+                for row in old.order_by('started_at', 'id').values_list(*ATTEMPT_FIELDS)[:batch_size]
+            ]
+            if not rows:
+                return archived
+            groups = {}
+            for row in rows:
+                key = (row.quiz_id, row.key_version_id, len(row.choices), len(row.correct_bits))
+                groups.setdefault(key, []).append(row)
+            AttemptArchive.objects.bulk_create([
+                AttemptArchive(
+                    quiz_id=quiz_id,
+                    key_version_id=key_version_id,
+                    attempt_count=len(group),
+                    first_attempt_id=min(row.id for row in group),
+                    last_attempt_id=max(row.id for row in group),
+                    completed_from=min(row.completed_at for row in group),
+                    completed_to=max(row.completed_at for row in group),
+                    data=pack_attempts(sorted(group)),
+                )
+                for (quiz_id, key_version_id, _, _), group in groups.items()
+            ])
+            Attempt.objects.filter(pk__in=[row.id for row in rows]).delete()
+            archived += len(rows)
+        discard_cached(row.id for row in rows)
+        _pause(pause)
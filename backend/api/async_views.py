@@ -0,0 +1,136 @@
+"""
+Variantes async des lectures fréquentes, servies sous ASGI (quizmaster/urls_asgi.py).
+
+Les vues DRF sont synchrones : sous ASGI, chaque requête passe par un thread
+via `sync_to_async`. Ces vues Django natives restent dans la boucle
+d'événements (ORM async, caches en mémoire) et produisent exactement les
+mêmes réponses que leurs équivalents DRF :
+
+- GET /api/quizzes/<id>/public/ (ETag / 304, cache du JSON rendu) ;
+- GET /api/attempts/<id>/ (les autres méthodes restent servies par DRF) ;
+- GET /api/stats/.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+
+from .answer_keys import aget_stored_key
+from .authentication import CachedTokenAuthentication, cached_credentials
+from .models import Attempt, Quiz, UserQuizStats
+from .renderers import dumps
+from .response_cache import etag_matches, make_etag, public_quiz_cache
+from .serializers import AttemptSerializer
+from .throttling import AnonAttemptThrottle, UserAttemptThrottle
+from .views import AttemptViewSet, build_user_stats, render_public_quiz
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def async_view(methods=('GET',), fallback=None):
+    """
+    Vue async exemptée de CSRF comme les vues DRF. Les méthodes non listées sont
+    confiées à la vue synchrone `fallback` si elle est fournie.
+    """
+    def decorator(view):
+        async def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                return await view(request, *args, **kwargs)
+            if fallback is not None:
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            return HttpResponseNotAllowed(methods)
+        wrapper.csrf_exempt = True
+        wrapper.__name__ = view.__name__
+        wrapper.__doc__ = view.__doc__
+        return wrapper
+    return decorator
+
+
+async def authenticate(request):
+    """Authentification par token : lecture du cache sans thread, base de données sinon."""
+    header = request.headers.get('Authorization', '').split()
+    if len(header) != 2 or header[0] != 'Token':
+        return None
+    credentials = cached_credentials(header[1])
+    if credentials is None:
+        credentials = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(header[1])
+    return credentials[0]
+
+
+async def throttled(request, user):
+    """Mêmes seaux que `AttemptViewSet` (utilisateur si connecté, IP sinon) ; retourne la réponse 429 ou None."""
+    throttle = UserAttemptThrottle() if user is not None else AnonAttemptThrottle()
+    ident = user.pk if user is not None else throttle.get_ident(request)
+    if throttle.rate is None or throttle.consume(throttle.ident_key(ident)):
+        return None
+    exc = Throttled(throttle.wait())
+    response = json_response({'detail': exc.detail}, status=exc.status_code)
+    response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+def unauthorized(detail):
+    response = json_response({'detail': detail}, status=401)
+    response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+@async_view()
+async def public_quiz(request, pk):
+    row = await Quiz.objects.filter(pk=pk).values_list('pk', 'updated_at').afirst()
+    if row is None:
+        return json_response({'error': 'Quiz non trouvé'}, status=404)
+    quiz_id, version = row
+
+    etag = make_etag(quiz_id, version)
+    if etag_matches(etag, request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        entry = public_quiz_cache.get(quiz_id, version)
+        if entry is None:
+            # Rendu rare (nouvelle version) : synchrone, pour garder le regroupement des requêtes concurrentes
+            entry = await sync_to_async(public_quiz_cache.get_or_render)(
+                quiz_id, version, lambda: render_public_quiz(quiz_id)
+            )
+        response = HttpResponse(entry.body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+attempt_detail_sync = AttemptViewSet.as_view({
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy',
+})
+
+
+@async_view(fallback=attempt_detail_sync)
+async def attempt_detail(request, pk):
+    # Même ordre que DRF : authentification (401 si token invalide), puis limitation de débit
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as exc:
+        return unauthorized(exc.detail)
+    response = await throttled(request, user)
+    if response is not None:
+        return response
+    attempt = await Attempt.objects.select_related('quiz', 'user').filter(pk=pk).afirst()
+    if attempt is None:
+        return json_response({'error': 'Tentative non trouvée'}, status=404)
+    keys = {}
+    if attempt.key_version_id is not None:
+        keys[attempt.key_version_id] = await aget_stored_key(attempt.key_version_id)
+    return json_response(AttemptSerializer(attempt, context={'answer_keys': keys}).data)
+
+
+@async_view()
+async def user_stats(request):
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as exc:
+        return unauthorized(exc.detail)
+    if user is None:
+        return unauthorized("Informations d'authentification non fournies.")
+
+    rows = UserQuizStats.objects.filter(user_id=user.pk).select_related('quiz').order_by('-last_attempt_at')
+    return json_response(build_user_stats([row async for row in rows]))
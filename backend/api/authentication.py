@@ -0,0 +1,82 @@
+"""
+Authentification par token avec cache en mémoire.
+
+Le couple token → utilisateur est conservé dans un cache LRU borné avec une
+durée de vie (`AUTH_TOKEN_CACHE_TTL`) : les requêtes authentifiées n'ont plus
+de jointure token/utilisateur à faire. Les entrées sont invalidées à la
+déconnexion, à la rotation du token et à la modification de l'utilisateur
+(voir api/signals.py) ; le TTL borne la durée de validité d'une entrée
+dans les autres processus.
+"""
+import copy
+from datetime import timedelta
+from time import monotonic
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .caching import LRUCache
+
+
+class CachedToken(NamedTuple):
+    user: object
+    token: object
+    cached_until: float
+
+
+_cache = LRUCache(maxsize=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000))
+
+
+def token_expired(token):
+    expiry = getattr(settings, 'AUTH_TOKEN_EXPIRY', None)
+    return expiry is not None and token.created < timezone.now() - timedelta(seconds=expiry)
+
+
+def invalidate_token(key):
+    _cache.pop(key)
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        _cache.pop(key)
+
+
+def clear_token_cache():
+    _cache.clear()
+
+
+def cached_credentials(key):
+    """(utilisateur, token) si le token est valide en cache, sans accès à la base ; sinon None."""
+    entry = _cache.get(key)
+    if entry is None or entry.cached_until < monotonic() or token_expired(entry.token):
+        return None
+    return copy.copy(entry.user), entry.token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entry = _cache.get(key)
+        if entry is None or entry.cached_until < monotonic():
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise AuthenticationFailed('Token invalide.')
+            if not token.user.is_active:
+                raise AuthenticationFailed('Utilisateur inactif ou supprimé.')
+            entry = CachedToken(
+                user=token.user,
+                token=token,
+                cached_until=monotonic() + getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300),
+            )
+            _cache.set(key, entry)
+
+        if token_expired(entry.token):
+            _cache.pop(key)
+            raise AuthenticationFailed('Token expiré.')
+
+        # Copie : l'instance en cache est partagée entre les requêtes concurrentes
+        return copy.copy(entry.user), entry.token
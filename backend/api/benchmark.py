@@ -0,0 +1,207 @@
+"""
+Comparaison WSGI / ASGI des lectures fréquentes avec des clients lents.
+
+Chaque client virtuel enchaîne GET public, GET tentative et GET stats. Un
+client lent met `client_delay` secondes à transmettre sa requête : sous
+WSGI, un thread du serveur reste bloqué pendant ce temps ; sous ASGI, la
+boucle d'événements sert les autres clients.
+
+- en processus : `WSGIHandler` derrière un pool de `threads` threads
+  (un worker WSGI) face à `ASGIHandler` sur une boucle d'événements ;
+- en HTTP : deux serveurs en marche (ex. gunicorn et uvicorn), requêtes
+  envoyées en deux temps sur un socket.
+
+Voir `python manage.py benchmark_asgi --help`.
+"""
+import asyncio
+import io
+import socket
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from .loadtest import percentile
+
+
+READ_ENDPOINTS = ('public', 'attempt', 'stats')
+
+
+def read_paths(quiz_id, attempt_id):
+    return {
+        'public': f'/api/quizzes/{quiz_id}/public/',
+        'attempt': f'/api/attempts/{attempt_id}/',
+        'stats': '/api/stats/',
+    }
+
+
+def build_report(samples, elapsed, clients):
+    report = {'clients': clients, 'elapsed_s': round(elapsed, 3), 'endpoints': {}}
+    total = 0
+    errors = 0
+    for endpoint in READ_ENDPOINTS:
+        durations = [duration for duration, ok in samples[endpoint]]
+        failed = sum(1 for _, ok in samples[endpoint] if not ok)
+        total += len(durations)
+        errors += failed
+        report['endpoints'][endpoint] = {
+            'requests': len(durations),
+            'errors': failed,
+            'p50_ms': round(percentile(durations, 50) * 1000, 2),
+            'p95_ms': round(percentile(durations, 95) * 1000, 2),
+            'p99_ms': round(percentile(durations, 99) * 1000, 2),
+        }
+    report['requests'] = total
+    report['errors'] = errors
+    report['throughput_rps'] = round(total / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+def _wsgi_environ(path, token):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def run_wsgi_in_process(paths, token, clients, requests, threads, client_delay):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    samples = defaultdict(list)
+
+    def serve(path):
+        # Thread du serveur : bloqué pendant que le client lent transmet sa requête
+        time.sleep(client_delay)
+        statuses = []
+        response = handler(_wsgi_environ(path, token), lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return statuses[0].startswith('200')
+
+    def client(pool):
+        for i in range(requests):
+            endpoint = READ_ENDPOINTS[i % len(READ_ENDPOINTS)]
+            start = perf_counter()
+            try:
+                ok = pool.submit(serve, paths[endpoint]).result()
+            except Exception:
+                ok = False
+            samples[endpoint].append((perf_counter() - start, ok))
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = perf_counter()
+        workers = [Thread(target=client, args=(pool,)) for _ in range(clients)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = perf_counter() - start
+    return build_report(samples, elapsed, clients)
+
+
+def run_asgi_in_process(paths, token, clients, requests, client_delay):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    samples = defaultdict(list)
+
+    async def serve(path):
+        # Boucle d'événements : l'attente du client lent ne bloque personne
+        await asyncio.sleep(client_delay)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'authorization', f'Token {token}'.encode())],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        statuses = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        await handler(scope, receive, send)
+        return statuses[0] == 200
+
+    async def client():
+        for i in range(requests):
+            endpoint = READ_ENDPOINTS[i % len(READ_ENDPOINTS)]
+            start = perf_counter()
+            try:
+                ok = await serve(paths[endpoint])
+            except Exception:
+                ok = False
+            samples[endpoint].append((perf_counter() - start, ok))
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    start = perf_counter()
+    asyncio.run(main())
+    return build_report(samples, perf_counter() - start, clients)
+
+
+def slow_http_get(base_url, path, token, client_delay, timeout=60):
+    """GET envoyé en deux temps (ligne de requête, pause, en-têtes) ; retourne True si 200."""
+    url = urlsplit(base_url)
+    with socket.create_connection((url.hostname, url.port or 80), timeout=timeout) as sock:
+        sock.sendall(f'GET {path} HTTP/1.1\r\n'.encode())
+        time.sleep(client_delay)
+        sock.sendall((
+            f'Host: {url.netloc}\r\nAuthorization: Token {token}\r\nConnection: close\r\n\r\n'
+        ).encode())
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    status_line = b''.join(chunks).split(b'\r\n', 1)[0]
+    return status_line.split()[1:2] == [b'200']
+
+
+def run_http(base_url, paths, token, clients, requests, client_delay):
+    samples = defaultdict(list)
+
+    def client():
+        for i in range(requests):
+            endpoint = READ_ENDPOINTS[i % len(READ_ENDPOINTS)]
+            start = perf_counter()
+            try:
+                ok = slow_http_get(base_url, paths[endpoint], token, client_delay)
+            except OSError:
+                ok = False
+            samples[endpoint].append((perf_counter() - start, ok))
+
+    start = perf_counter()
+    workers = [Thread(target=client) for _ in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return build_report(samples, perf_counter() - start, clients)
@@ -0,0 +1,89 @@
+"""
+Encodage compact des résultats de tentative.
+
+Une tentative corrigée ne stocke plus, pour chaque question, la réponse,
+la bonne réponse et le drapeau de justesse : elle référence la version du
+corrigé (`AnswerKeyVersion`) et conserve seulement
+
+- `choices` : un octet par question (0 = sans réponse, i + 1 = option i,
+  255 = réponse hors options, conservée dans `other_answers`) ;
+- `correct_bits` : un bit de justesse par question (ordre little-endian).
+
+Le dictionnaire détaillé historique est reconstruit à la lecture.
+Fonctions pures, sans accès à la base. La migration de conversion (0005)
+en embarque une copie figée : un changement de format doit rester lisible
+pour les tentatives déjà converties.
+"""
+import hashlib
+import json
+
+
+NO_ANSWER = 0
+OTHER_ANSWER = 255
+MAX_OPTIONS = OTHER_ANSWER - 1
+
+
+def normalize_answer(value):
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def key_digest(questions):
+    """Empreinte d'un corrigé [[id, bonne réponse, options], ...] (identité de la version)."""
+    payload = json.dumps(questions, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def pack_bits(flags):
+    data = bytearray((len(flags) + 7) // 8)
+    for position, flag in enumerate(flags):
+        if flag:
+            data[position >> 3] |= 1 << (position & 7)
+    return bytes(data)
+
+
+def unpack_bits(data, count):
+    return [bool(data[position >> 3] >> (position & 7) & 1) for position in range(count)]
+
+
+def option_codes(options):
+    codes = {}
+    for index, option in enumerate(options[:MAX_OPTIONS]):
+        if isinstance(option, str):
+            codes.setdefault(option, index + 1)
+    return codes
+
+
+def encode_answer(user_answer, codes):
+    """Retourne (code, réponse à conserver à part ou None)."""
+    if user_answer == '' or user_answer is None:
+        return NO_ANSWER, None
+    code = codes.get(user_answer) if isinstance(user_answer, str) else None
+    if code is None:
+        return OTHER_ANSWER, user_answer
+    return code, None
+
+
+def decode_results(questions, choices, correct_bits, other_answers=None):
+    """
+    Reconstruit {id_question: {'user_answer', 'correct_answer', 'is_correct'}}
+    à partir d'un corrigé [[id, bonne réponse, options], ...].
+    """
+    flags = unpack_bits(correct_bits, len(questions))
+    other_answers = other_answers or {}
+    results = {}
+    for position, (question_id, correct_answer, options) in enumerate(questions):
+        code = choices[position]
+        if code == NO_ANSWER:
+            user_answer = ''
+        elif code == OTHER_ANSWER:
+            user_answer = other_answers.get(str(position), '')
+        else:
+            user_answer = options[code - 1]
+        results[str(question_id)] = {
+            'user_answer': user_answer,
+            'correct_answer': correct_answer,
+            'is_correct': flags[position],
+        }
+    return results
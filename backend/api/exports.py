@@ -0,0 +1,137 @@
+"""
+Export en flux des tentatives d'un quiz (CSV ou NDJSON).
+
+Les lignes sont lues par paquets (`QuerySet.iterator`) avec l'utilisateur et
+le quiz joints, décodées depuis l'encodage compact puis écrites par blocs :
+la mémoire utilisée ne dépend pas du nombre de tentatives. Les tentatives
+archivées (api/archive.py) sont exportées en premier, archive par archive.
+Sous ASGI, le flux est consommé bloc par bloc via `sync_to_async` (Django
+bufferiserait sinon tout l'itérateur synchrone avant l'envoi).
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from .answer_keys import get_stored_keys
+from .archive import archived_attempts
+from .models import Attempt, Quiz, User
+
+
+EXPORT_COLUMNS = [
+    'attempt_id', 'quiz_id', 'quiz_title', 'user_id', 'username',
+    'started_at', 'completed_at', 'score', 'correct_count', 'total_questions', 'answers',
+]
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def attempt_rows(quiz_id):
+    """Tentatives du quiz (archivées puis courantes), une par une, sous forme de dictionnaires prêts à écrire."""
+    keys = {}
+
+    def row(attempt_id, quiz_title, user_id, username, started_at, completed_at, score,
+            key_id, choices, correct_bits, other_answers):
+        results = {}
+        if key_id is not None:
+            key = keys.get(key_id)
+            if key is None:
+                key = keys[key_id] = get_stored_keys([key_id])[key_id]
+            results = key.results(bytes(choices), bytes(correct_bits), other_answers)
+        return {
+            'attempt_id': attempt_id,
+            'quiz_id': quiz_id,
+            'quiz_title': quiz_title,
+            'user_id': user_id,
+            'username': username,
+            'started_at': _isoformat(started_at),
+            'completed_at': _isoformat(completed_at),
+            'score': score,
+            'correct_count': sum(1 for result in results.values() if result['is_correct']),
+            'total_questions': len(results),
+            'answers': results,
+        }
+
+    chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    quiz_title = Quiz.objects.filter(pk=quiz_id).values_list('title', flat=True).first()
+    for batch in _batches(archived_attempts(quiz_id), chunk_size):
+        usernames = dict(User.objects.filter(pk__in={a.user_id for a in batch}).values_list('pk', 'username'))
+        for a in batch:
+            yield row(a.id, quiz_title, a.user_id, usernames.get(a.user_id), a.started_at, a.completed_at,
+                      a.score, a.key_version_id, a.choices, a.correct_bits, a.other_answers)
+
+    rows = (
+        Attempt.objects.filter(quiz_id=quiz_id)
+        .order_by('id')
+        .values_list(
+            'id', 'quiz__title', 'user_id', 'user__username', 'started_at', 'completed_at',
+            'score', 'key_version_id', 'choices', 'correct_bits', 'other_answers',
+        )
+    )
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield row(*values)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(rows, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in _batches(rows, batch_size):
+        for row in batch:
+            # Colonne `answers` : {id_question: réponse}, en JSON
+            answers = {question_id: result['user_answer'] for question_id, result in row['answers'].items()}
+            writer.writerow([row[column] for column in EXPORT_COLUMNS[:-1]] + [
+                json.dumps(answers, ensure_ascii=False),
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(rows, batch_size):
+    for batch in _batches(rows, batch_size):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch)
+
+
+async def aiter_stream(stream):
+    """Itérateur async sur un générateur synchrone : chaque bloc est produit dans le thread des requêtes ORM."""
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(stream, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(stream.close)()
+
+
+def attempts_export_response(request, quiz, output):
+    batch_size = getattr(settings, 'EXPORT_BATCH_ROWS', 500)
+    rows = attempt_rows(quiz.pk)
+    stream = stream_csv(rows, batch_size) if output == 'csv' else stream_ndjson(rows, batch_size)
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        stream = aiter_stream(stream)
+    response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="quiz-{quiz.pk}-tentatives.{output}"'
+    return response
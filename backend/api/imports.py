@@ -0,0 +1,183 @@
+"""
+Import en flux de banques de quiz JSON.
+
+Le document est lu par blocs et découpé quiz par quiz (`JSONDecoder.raw_decode`
+sur un tampon glissant) : seul le quiz en cours de lecture est en mémoire.
+Formats acceptés : un quiz seul, une liste de quiz, ou {"quizzes": [...]}.
+
+Les quiz sont validés par lots avec les règles de `QuizCreateSerializer`
+puis enregistrés, un lot par transaction, avec un nombre fixe de requêtes
+(insertions groupées des quiz, des questions et des mots-clés).
+"""
+import codecs
+import json
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Question, Quiz
+from .search import sync_tags_bulk
+from .serializers import QuizCreateSerializer
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class StreamingJSONReader:
+    def __init__(self, stream, read_size=None, max_item_size=None):
+        self.stream = stream
+        self.read_size = read_size or getattr(settings, 'IMPORT_READ_SIZE', 64 * 1024)
+        self.max_item_size = max_item_size or getattr(settings, 'IMPORT_MAX_ITEM_SIZE', 1024 * 1024)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        data = self.stream.read(self.read_size)
+        self.eof = not data
+        try:
+            text = self.decoder.decode(data or b'', final=self.eof)
+        except UnicodeDecodeError:
+            raise ImportFormatError("Le fichier doit être encodé en UTF-8.")
+        # Le début déjà consommé est abandonné : le tampon ne contient que l'élément en cours
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        if len(self.buffer) > self.max_item_size:
+            raise ImportFormatError("Élément JSON trop volumineux.")
+        return not self.eof
+
+    def peek(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill() and self.pos >= len(self.buffer):
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ImportFormatError(f"JSON invalide : « {char} » attendu.")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                if self.eof:
+                    raise ImportFormatError(f"JSON invalide : {exc.msg}.")
+            else:
+                # Une valeur qui touche la fin du tampon (nombre) peut continuer dans le bloc suivant
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            self.fill()
+
+    def array_items(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ImportFormatError("JSON invalide : « , » ou « ] » attendu.")
+
+    def quizzes(self):
+        first = self.peek()
+        if first == '[':
+            yield from self.array_items()
+        elif first == '{':
+            # Objet : soit {"quizzes": [...]}, lu en flux, soit un quiz seul
+            self.expect('{')
+            single = {}
+            streamed = False
+            if self.peek() == '}':
+                self.pos += 1
+            else:
+                while True:
+                    key = self.value()
+                    self.expect(':')
+                    if key == 'quizzes' and self.peek() == '[':
+                        streamed = True
+                        yield from self.array_items()
+                    else:
+                        single[key] = self.value()
+                    char = self.peek()
+                    self.pos += 1
+                    if char == '}':
+                        break
+                    if char != ',':
+                        raise ImportFormatError("JSON invalide : « , » ou « } » attendu.")
+            if not streamed:
+                yield single
+        else:
+            raise ImportFormatError("Le document doit être un quiz, une liste de quiz ou {\"quizzes\": [...]}.")
+
+
+def _save_batch(valid, creator):
+    """Enregistre un lot validé : quiz, questions et mots-clés en insertions groupées."""
+    serializer = QuizCreateSerializer()
+    quizzes = []
+    questions = []
+    with transaction.atomic():
+        for data in valid:
+            fields = {key: value for key, value in data.items() if key != 'questions'}
+            quizzes.append(Quiz(creator=creator, **fields))
+        Quiz.objects.bulk_create(quizzes)
+        for quiz, data in zip(quizzes, valid):
+            questions.extend(
+                serializer._build_question(quiz, idx, question) for idx, question in enumerate(data['questions'])
+            )
+        Question.objects.bulk_create(questions)
+        # `bulk_create` n'envoie pas post_save : les mots-clés sont synchronisés ici
+        sync_tags_bulk(quizzes)
+    return [quiz.pk for quiz in quizzes]
+
+
+def import_quizzes(stream, creator):
+    """Importe une banque de quiz. Retourne le rapport {created, failed, quizzes, errors[, error]}."""
+    batch_size = getattr(settings, 'IMPORT_BATCH_SIZE', 100)
+    report = {'created': 0, 'failed': 0, 'quizzes': [], 'errors': []}
+    valid = []
+
+    def flush():
+        ids = _save_batch(valid, creator)
+        report['created'] += len(ids)
+        report['quizzes'].extend(ids)
+        valid.clear()
+
+    try:
+        for index, item in enumerate(StreamingJSONReader(stream).quizzes()):
+            if not isinstance(item, dict):
+                report['failed'] += 1
+                report['errors'].append({'index': index, 'title': None, 'errors': "Un quiz doit être un objet JSON."})
+                continue
+            serializer = QuizCreateSerializer(data=item)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+                if len(valid) >= batch_size:
+                    flush()
+            else:
+                report['failed'] += 1
+                report['errors'].append({'index': index, 'title': item.get('title'), 'errors': serializer.errors})
+    except ImportFormatError as exc:
+        # Document illisible à partir d'ici : les quiz déjà lus et valides sont conservés
+        report['error'] = str(exc)
+    if valid:
+        flush()
+    return report
@@ -0,0 +1,200 @@
+"""
+Classements par quiz (meilleur score de chaque utilisateur).
+
+Le classement est tenu à jour à chaque soumission, au lieu de trier les
+tentatives à chaque affichage. Le backend est configurable via
+`settings.LEADERBOARD_BACKEND` (n = nombre de joueurs classés du quiz) :
+
+- `DatabaseLeaderboard` (défaut) : lu depuis `UserQuizStats.best_score` (index
+  quiz + meilleur score), cohérent entre tous les workers. `top` lit `limit`
+  entrées de l'index ; `rank` compte les meilleurs scores supérieurs, soit un
+  parcours d'index en O(rang) ;
+- `InMemoryLeaderboard` : liste triée par quiz dans le processus, rechargée
+  depuis `UserQuizStats` après `LEADERBOARD_TTL` secondes (les soumissions
+  traitées par les autres workers y apparaissent avec ce délai au plus).
+  `rank` est en O(log n), mais un nouveau meilleur score décale la liste en
+  O(n) (copie mémoire, négligeable pour quelques milliers de joueurs) ;
+- `RedisLeaderboard` : ensembles triés Redis, partagés entre les workers ;
+  `record` et `rank` (ZADD, ZSCORE + ZCOUNT) en O(log n).
+
+Dans tous les cas, les rangs du `top` sont déduits des entrées lues, sans
+requête supplémentaire.
+
+Un classement en mémoire ou Redis est initialisé depuis `UserQuizStats.best_score`.
+"""
+from bisect import bisect_left, insort
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .caching import LRUCache
+from .models import UserQuizStats
+
+
+def load_best_scores(quiz_id):
+    return UserQuizStats.objects.filter(quiz_id=quiz_id).values_list('user_id', 'best_score')
+
+
+def competition_ranks(entries):
+    """[(user_id, score)] triés par score décroissant depuis le premier -> [(rang, user_id, score)]."""
+    # Rang « compétition » : les scores supérieurs précèdent tous dans la liste
+    top = []
+    for index, (user_id, score) in enumerate(entries):
+        rank = top[-1][0] if top and top[-1][2] == score else index + 1
+        top.append((rank, user_id, score))
+    return top
+
+
+class BaseLeaderboard:
+    def record(self, quiz_id, user_id, score):
+        """Enregistre un score ; seul le meilleur score de l'utilisateur est conservé."""
+        raise NotImplementedError
+
+    def top(self, quiz_id, limit=10):
+        """Retourne [(rang, user_id, score)] des `limit` premiers."""
+        raise NotImplementedError
+
+    def rank(self, quiz_id, user_id):
+        """Retourne (rang, score) de l'utilisateur, ou None s'il n'est pas classé."""
+        raise NotImplementedError
+
+    def record_attempts(self, attempts):
+        for attempt in attempts:
+            if attempt.user_id is not None:
+                self.record(attempt.quiz_id, attempt.user_id, attempt.score)
+
+
+class DatabaseLeaderboard(BaseLeaderboard):
+    """`UserQuizStats` est mis à jour dans la transaction de soumission : rien à enregistrer ici."""
+
+    def record(self, quiz_id, user_id, score):
+        pass
+
+    def record_attempts(self, attempts):
+        pass
+
+    def top(self, quiz_id, limit=10):
+        entries = list(
+            UserQuizStats.objects.filter(quiz_id=quiz_id)
+            .order_by('-best_score', 'user_id')
+            .values_list('user_id', 'best_score')[:limit]
+        )
+        return competition_ranks(entries)
+
+    def rank(self, quiz_id, user_id):
+        # COUNT sur l'index (quiz, meilleur score) : parcours en O(rang), pas en O(log n)
+        stats = UserQuizStats.objects.filter(quiz_id=quiz_id)
+        score = stats.filter(user_id=user_id).values_list('best_score', flat=True).first()
+        if score is None:
+            return None
+        return stats.filter(best_score__gt=score).count() + 1, score
+
+
+class _SortedBoard:
+    def __init__(self, scores):
+        self.loaded_at = monotonic()
+        self.best = dict(scores)
+        # Clés (-score, user_id) triées : le premier élément est le meilleur score.
+        # Recherche en O(log n) ; insertion/suppression en O(n) (décalage de la liste).
+        self.keys = sorted((-score, user_id) for user_id, score in self.best.items())
+
+    def record(self, user_id, score):
+        previous = self.best.get(user_id)
+        if previous is not None:
+            if score <= previous:
+                return
+            del self.keys[bisect_left(self.keys, (-previous, user_id))]
+        self.best[user_id] = score
+        insort(self.keys, (-score, user_id))
+
+    def rank_of_score(self, score):
+        # Rang « compétition » : 1 + nombre de scores strictement supérieurs
+        return bisect_left(self.keys, (-score,)) + 1
+
+
+class InMemoryLeaderboard(BaseLeaderboard):
+    def __init__(self):
+        self._boards = LRUCache(maxsize=getattr(settings, 'LEADERBOARD_CACHE_SIZE', 256))
+        self._lock = Lock()
+
+    def _board(self, quiz_id):
+        board = self._boards.get(quiz_id)
+        ttl = getattr(settings, 'LEADERBOARD_TTL', 30)
+        if board is None or monotonic() - board.loaded_at > ttl:
+            board = _SortedBoard(load_best_scores(quiz_id))
+            self._boards.set(quiz_id, board)
+        return board
+
+    def record(self, quiz_id, user_id, score):
+        with self._lock:
+            self._board(quiz_id).record(user_id, score)
+
+    def top(self, quiz_id, limit=10):
+        with self._lock:
+            board = self._board(quiz_id)
+            return competition_ranks((user_id, -neg_score) for neg_score, user_id in board.keys[:limit])
+
+    def rank(self, quiz_id, user_id):
+        with self._lock:
+            board = self._board(quiz_id)
+            score = board.best.get(user_id)
+            if score is None:
+                return None
+            return board.rank_of_score(score), score
+
+
+class RedisLeaderboard(BaseLeaderboard):
+    """Nécessite le paquet `redis` (optionnel) et Redis >= 6.2 (ZADD GT)."""
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(getattr(settings, 'LEADERBOARD_REDIS_URL', 'redis://localhost:6379/0'))
+        self.client = client
+        self._seeded = LRUCache(maxsize=getattr(settings, 'LEADERBOARD_CACHE_SIZE', 256))
+
+    def _key(self, quiz_id):
+        key = f"quizmaster:leaderboard:{quiz_id}"
+        if self._seeded.get(quiz_id) is None:
+            # Une fois par processus et par quiz : ZADD GT est idempotent, pas besoin de tester EXISTS
+            scores = {str(user_id): score for user_id, score in load_best_scores(quiz_id)}
+            if scores:
+                self.client.zadd(key, scores, gt=True)
+            self._seeded.set(quiz_id, True)
+        return key
+
+    def record(self, quiz_id, user_id, score):
+        self.client.zadd(self._key(quiz_id), {str(user_id): score}, gt=True)
+
+    def top(self, quiz_id, limit=10):
+        # Un seul aller-retour : les rangs se déduisent des entrées lues depuis le premier
+        entries = self.client.zrevrange(self._key(quiz_id), 0, limit - 1, withscores=True)
+        return competition_ranks((int(member), score) for member, score in entries)
+
+    def rank(self, quiz_id, user_id):
+        key = self._key(quiz_id)
+        score = self.client.zscore(key, str(user_id))
+        if score is None:
+            return None
+        return self.client.zcount(key, f"({score}", '+inf') + 1, score
+
+
+_leaderboard = None
+_leaderboard_lock = Lock()
+
+
+def get_leaderboard():
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            backend = getattr(settings, 'LEADERBOARD_BACKEND', 'api.leaderboard.DatabaseLeaderboard')
+            _leaderboard = import_string(backend)()
+        return _leaderboard
+
+
+def reset_leaderboard():
+    global _leaderboard
+    with _leaderboard_lock:
+        _leaderboard = None
@@ -0,0 +1,364 @@
+"""
+Mode examen en direct par WebSocket (`/ws/live/<quiz_id>/?token=...`).
+
+L'enseignant (créateur du quiz) pousse la question courante ; les réponses
+des étudiants arrivent sur la même connexion. Les comptes de réponses ne
+sont pas diffusés réponse par réponse : une tâche par session publie un
+instantané à intervalle fixe (`LIVE_TICK_INTERVAL`), et seulement s'il a
+changé. Chaque message est sérialisé une seule fois pour tout le groupe.
+
+Messages reçus :
+- enseignant : {"type": "question", "question": id}, {"type": "end"}
+- étudiant : {"type": "answer", "question": id, "answer": "..."}
+
+Messages émis : "state" (à la connexion), "question", "counts", "end", "error".
+
+Quand la dernière connexion se ferme sans "end", la session est conservée
+`LIVE_GRACE_PERIOD` secondes (reconnexion après une coupure réseau) puis
+fermée ; les réponses reçues sont alors enregistrées comme pour "end".
+
+Une session accepte au plus `LIVE_MAX_CONNECTIONS` participants (l'enseignant
+peut toujours se connecter) ; au-delà, la connexion est fermée (code 4429).
+
+La couche de diffusion par défaut (`InMemoryChannelLayer`) est propre au
+processus : une session doit alors être servie par un seul processus ASGI.
+"""
+import asyncio
+import json
+import logging
+import re
+from collections import Counter, defaultdict
+from urllib.parse import parse_qs
+from uuid import uuid4
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+
+from .answer_keys import apply_grade, get_answer_key
+from .authentication import CachedTokenAuthentication
+from .leaderboard import get_leaderboard
+from .models import Attempt, Quiz
+from .stats import record_completed_attempts
+
+
+logger = logging.getLogger('api')
+
+PATH_PATTERN = re.compile(r'^/ws/live/(?P<quiz_id>\d+)/$')
+MAX_MESSAGE_SIZE = 4096
+
+# Codes de fermeture applicatifs (plage 4000-4999)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+CLOSE_SESSION_FULL = 4429
+
+
+class InMemoryChannelLayer:
+    """
+    Groupes de files d'envoi, une file bornée par connexion. Une file pleine
+    (client lent) perd son plus ancien message : les messages sont des
+    instantanés, le suivant remplace le précédent.
+    """
+    def __init__(self, capacity=None):
+        self.capacity = capacity or getattr(settings, 'LIVE_SEND_QUEUE_SIZE', 64)
+        self.groups = defaultdict(set)
+
+    def new_channel(self):
+        return asyncio.Queue(maxsize=self.capacity)
+
+    def group_add(self, group, channel):
+        self.groups[group].add(channel)
+
+    def group_discard(self, group, channel):
+        members = self.groups.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                del self.groups[group]
+
+    def send(self, channel, message):
+        if channel.full():
+            channel.get_nowait()
+        channel.put_nowait(message)
+
+    def group_send(self, group, message):
+        for channel in list(self.groups.get(group, ())):
+            self.send(channel, message)
+
+
+_layer = None
+
+
+def get_channel_layer():
+    global _layer
+    if _layer is None:
+        _layer = import_string(getattr(settings, 'LIVE_CHANNEL_LAYER', 'api.live.InMemoryChannelLayer'))()
+    return _layer
+
+
+def text_message(payload):
+    return {'text': json.dumps(payload, ensure_ascii=False)}
+
+
+class LiveSession:
+    def __init__(self, quiz):
+        self.quiz_id = quiz.pk
+        self.creator_id = quiz.creator_id
+        self.group = f'live-{quiz.pk}'
+        self.questions = {
+            question.id: {
+                'id': question.id,
+                'question_text': question.question_text,
+                'question_type': question.question_type,
+                'options': list(question.options or []),
+            }
+            for question in quiz.questions.all()
+        }
+        self.current = None
+        # participant -> {id de question (str): réponse}
+        self.answers = defaultdict(dict)
+        self.users = {}
+        self.counts = Counter()
+        self.connections = 0
+        self.dirty = False
+        self.tick_task = None
+        self.expire_task = None
+
+    def question_message(self):
+        return {'type': 'question', 'question': self.questions.get(self.current)}
+
+    def counts_message(self):
+        return {
+            'type': 'counts',
+            'question': self.current,
+            'counts': dict(self.counts),
+            'answered': sum(self.counts.values()),
+            'participants': self.connections,
+        }
+
+    def state_message(self, role):
+        return dict(self.counts_message(), type='state', role=role, question=self.questions.get(self.current))
+
+    def push_question(self, question_id):
+        if question_id not in self.questions:
+            return False
+        self.current = question_id
+        self.counts = Counter()
+        self.dirty = False
+        return True
+
+    def record_answer(self, participant, user_id, question_id, answer):
+        if question_id is None or question_id != self.current or not isinstance(answer, str):
+            return False
+        options = self.questions[question_id]['options']
+        if options and answer not in options:
+            return False
+        answer = answer[:200]
+
+        previous = self.answers[participant].get(str(question_id))
+        if previous == answer:
+            return True
+        if previous is not None:
+            self.counts[previous] -= 1
+            if not self.counts[previous]:
+                del self.counts[previous]
+        self.answers[participant][str(question_id)] = answer
+        self.users[participant] = user_id
+        self.counts[answer] += 1
+        self.dirty = True
+        return True
+
+    async def tick(self, layer, interval):
+        while True:
+            await asyncio.sleep(interval)
+            if self.dirty:
+                self.dirty = False
+                layer.group_send(self.group, text_message(self.counts_message()))
+
+    def persist(self):
+        """Enregistre une tentative corrigée par participant ayant répondu. Retourne leur nombre."""
+        if not self.answers:
+            return 0
+        quiz = Quiz.objects.get(pk=self.quiz_id)
+        answer_key = get_answer_key(quiz)
+        now = timezone.now()
+        attempts = []
+        for participant, answers in self.answers.items():
+            attempt = Attempt(quiz=quiz, user_id=self.users[participant], completed_at=now)
+            apply_grade(attempt, answer_key, answer_key.grade(answers))
+            attempts.append(attempt)
+        with transaction.atomic():
+            Attempt.objects.bulk_create(attempts)
+            record_completed_attempts(attempts)
+            transaction.on_commit(lambda: get_leaderboard().record_attempts(attempts))
+        # Enregistrées une seule fois, même si la session est ensuite fermée par un autre chemin
+        self.answers.clear()
+        return len(attempts)
+
+
+_sessions = {}
+# Un verrou par boucle d'événements : un asyncio.Lock est lié à la boucle qui l'utilise
+_sessions_locks = WeakKeyDictionary()
+
+
+def _load_quiz(quiz_id):
+    return Quiz.objects.prefetch_related('questions').filter(pk=quiz_id).first()
+
+
+async def get_session(quiz_id):
+    loop = asyncio.get_running_loop()
+    lock = _sessions_locks.get(loop)
+    if lock is None:
+        lock = _sessions_locks[loop] = asyncio.Lock()
+    async with lock:
+        session = _sessions.get(quiz_id)
+        if session is not None and session.expire_task is not None:
+            # Reconnexion pendant le délai de grâce : la session continue
+            session.expire_task.cancel()
+            session.expire_task = None
+        if session is None:
+            quiz = await sync_to_async(_load_quiz)(quiz_id)
+            if quiz is None:
+                return None
+            session = LiveSession(quiz)
+            session.tick_task = asyncio.create_task(
+                session.tick(get_channel_layer(), getattr(settings, 'LIVE_TICK_INTERVAL', 0.5))
+            )
+            _sessions[quiz_id] = session
+        return session
+
+
+def close_session(session):
+    if _sessions.get(session.quiz_id) is session:
+        del _sessions[session.quiz_id]
+    if session.tick_task is not None:
+        session.tick_task.cancel()
+
+
+async def expire_session(session, delay):
+    """Ferme une session restée sans connexion pendant `delay` secondes et enregistre ses réponses."""
+    await asyncio.sleep(delay)
+    session.expire_task = None
+    close_session(session)
+    try:
+        await sync_to_async(session.persist)()
+    except Exception:
+        logger.exception("Réponses de la session en direct du quiz %s non enregistrées", session.quiz_id)
+
+
+def _authenticate(key):
+    return CachedTokenAuthentication().authenticate_credentials(key)[0]
+
+
+async def authenticate(scope):
+    """Token passé en paramètre `?token=` (les navigateurs n'envoient pas d'en-tête sur un WebSocket)."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    key = query.get('token', [None])[0]
+    if not key:
+        return None
+    return await sync_to_async(_authenticate)(key)
+
+
+async def forward(channel, send):
+    while True:
+        message = await channel.get()
+        if message.get('close'):
+            await send({'type': 'websocket.close', 'code': 1000})
+            return
+        await send({'type': 'websocket.send', 'text': message['text']})
+
+
+async def websocket_application(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    match = PATH_PATTERN.match(scope['path'])
+    if match is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    try:
+        user = await authenticate(scope)
+    except AuthenticationFailed:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    session = await get_session(int(match['quiz_id']))
+    if session is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    is_teacher = user is not None and user.pk == session.creator_id
+    if not is_teacher and session.connections >= getattr(settings, 'LIVE_MAX_CONNECTIONS', 200):
+        await send({'type': 'websocket.close', 'code': CLOSE_SESSION_FULL})
+        return
+
+    await send({'type': 'websocket.accept'})
+    participant = f'user-{user.pk}' if user is not None else f'anon-{uuid4().hex}'
+    layer = get_channel_layer()
+    channel = layer.new_channel()
+    layer.group_add(session.group, channel)
+    session.connections += 1
+    session.dirty = True
+    layer.send(channel, text_message(session.state_message('teacher' if is_teacher else 'student')))
+    sender = asyncio.create_task(forward(channel, send))
+
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message['type'] != 'websocket.receive':
+                continue
+            ended = await handle_message(session, layer, channel, message, participant, user, is_teacher)
+            if ended:
+                break
+    finally:
+        layer.group_discard(session.group, channel)
+        session.connections -= 1
+        session.dirty = True
+        if not session.connections and _sessions.get(session.quiz_id) is session:
+            session.expire_task = asyncio.create_task(
+                expire_session(session, getattr(settings, 'LIVE_GRACE_PERIOD', 30))
+            )
+        # Laisse partir les messages déjà en file (dont "end") avant d'arrêter l'envoi
+        while not channel.empty() and not sender.done():
+            await asyncio.sleep(0)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+
+async def handle_message(session, layer, channel, message, participant, user, is_teacher):
+    """Traite un message client. Retourne True si la session est terminée."""
+    text = message.get('text') or ''
+    try:
+        data = json.loads(text) if len(text) <= MAX_MESSAGE_SIZE else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        layer.send(channel, text_message({'type': 'error', 'error': 'Message invalide'}))
+        return False
+
+    kind = data.get('type')
+    if is_teacher and kind == 'question':
+        if session.push_question(data.get('question')):
+            # Changement de question diffusé immédiatement, les comptes repartent à zéro
+            layer.group_send(session.group, text_message(session.question_message()))
+        else:
+            layer.send(channel, text_message({'type': 'error', 'error': 'Question inconnue'}))
+    elif is_teacher and kind == 'end':
+        close_session(session)
+        saved = await sync_to_async(session.persist)()
+        layer.group_send(session.group, text_message({'type': 'end', 'attempts': saved}))
+        layer.group_send(session.group, {'close': True})
+        return True
+    elif not is_teacher and kind == 'answer':
+        user_id = user.pk if user is not None else None
+        if not session.record_answer(participant, user_id, data.get('question'), data.get('answer')):
+            layer.send(channel, text_message({'type': 'error', 'error': 'Réponse refusée'}))
+    else:
+        layer.send(channel, text_message({'type': 'error', 'error': 'Action non autorisée'}))
+    return False
@@ -0,0 +1,166 @@
+"""
+Scénario de charge « une classe passe un quiz ».
+
+Chaque élève virtuel enchaîne : GET /api/quizzes/{id}/public/,
+POST /api/attempts/, puis POST /api/attempts/{id}/submit/. Le scénario
+s'exécute en processus (client de test Django) ou contre un serveur en
+marche (HTTP). Voir `python manage.py loadtest --help`.
+
+Les élèves virtuels partagent une IP : les réponses 429 sont comptées à part
+(`throttled`) pour distinguer une limitation d'une surcharge.
+"""
+import json
+import math
+import random
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.db import connection
+
+
+ENDPOINTS = ('public', 'create_attempt', 'submit')
+
+
+class InProcessClient:
+    def __init__(self, close_connection=True):
+        from django.test import Client
+        self.client = Client()
+        # Chaque thread d'élève a sa propre connexion, fermée à la fin de son scénario
+        self.close_connection = close_connection
+
+    def request(self, method, path, payload=None):
+        if method == 'GET':
+            response = self.client.get(path)
+        else:
+            response = self.client.post(path, payload or {}, content_type='application/json')
+        data = json.loads(response.content) if response.content else None
+        return response.status_code, data
+
+    def close(self):
+        if self.close_connection:
+            connection.close()
+
+
+class HttpClient:
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method=method,
+            headers={'Content-Type': 'application/json'} if body is not None else {},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+                return response.status, json.loads(content) if content else None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+    def close(self):
+        pass
+
+
+def percentile(values, pct):
+    """Percentile au rang le plus proche (valeurs non triées acceptées)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_student(client, quiz_id, rng, samples):
+    def timed(endpoint, method, path, payload=None):
+        start = perf_counter()
+        try:
+            status, data = client.request(method, path, payload)
+        except Exception:
+            status, data = 0, None
+        samples.append((endpoint, perf_counter() - start, status))
+        return data if 200 <= status < 300 else None
+
+    quiz = timed('public', 'GET', f'/api/quizzes/{quiz_id}/public/')
+    if quiz is None:
+        return
+    attempt = timed('create_attempt', 'POST', '/api/attempts/', {'quiz': quiz_id})
+    if attempt is None:
+        return
+    answers = {
+        str(question['id']): rng.choice(question['options'] or [question['correct_answer']])
+        for question in quiz['questions']
+    }
+    timed('submit', 'POST', f"/api/attempts/{attempt['id']}/submit/", {'answers': answers})
+
+
+def run_classroom(client_factory, quiz_id, students=500, concurrency=50, seed=0):
+    """Exécute le scénario pour `students` élèves, `concurrency` à la fois, et retourne le rapport."""
+    samples = []
+    rngs = [random.Random(seed + idx) for idx in range(students)]
+
+    def student(idx):
+        client = client_factory()
+        try:
+            run_student(client, quiz_id, rngs[idx], samples)
+        finally:
+            client.close()
+
+    start = perf_counter()
+    if concurrency <= 1:
+        # Exécution séquentielle dans le thread appelant (même connexion à la base)
+        for idx in range(students):
+            student(idx)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(student, range(students)))
+    elapsed = perf_counter() - start
+    return build_report(samples, elapsed, students, concurrency)
+
+
+def build_report(samples, elapsed, students, concurrency):
+    report = {
+        'students': students,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'endpoints': {},
+    }
+    for endpoint in ENDPOINTS:
+        durations = [duration for name, duration, _ in samples if name == endpoint]
+        errors = sum(1 for name, _, status in samples if name == endpoint and not 200 <= status < 300)
+        throttled = sum(1 for name, _, status in samples if name == endpoint and status == 429)
+        report['endpoints'][endpoint] = {
+            'requests': len(durations),
+            'errors': errors,
+            'throttled': throttled,
+            'p50_ms': round(percentile(durations, 50) * 1000, 2),
+            'p95_ms': round(percentile(durations, 95) * 1000, 2),
+            'p99_ms': round(percentile(durations, 99) * 1000, 2),
+        }
+    report['throttled'] = sum(stats['throttled'] for stats in report['endpoints'].values())
+    return report
+
+
+def compare_to_baseline(report, baseline, max_regression=0.2):
+    """Retourne la liste des régressions (vide si le rapport reste dans la tolérance)."""
+    regressions = []
+    minimum = baseline['throughput_rps'] * (1 - max_regression)
+    if report['throughput_rps'] < minimum:
+        regressions.append(
+            f"débit {report['throughput_rps']} req/s < {minimum:.2f} req/s (référence {baseline['throughput_rps']})"
+        )
+    for endpoint, reference in baseline['endpoints'].items():
+        current = report['endpoints'].get(endpoint)
+        if current is None:
+            continue
+        for key in ('p95_ms', 'p99_ms'):
+            limit = reference[key] * (1 + max_regression)
+            if current[key] > limit:
+                regressions.append(f"{endpoint} {key} {current[key]} > {limit:.2f} (référence {reference[key]})")
+        if current['errors'] > reference['errors']:
+            regressions.append(f"{endpoint} : {current['errors']} erreurs (référence {reference['errors']})")
+    return regressions
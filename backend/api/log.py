@@ -0,0 +1,114 @@
+"""
+Journalisation asynchrone pour le logger `api`.
+
+Dans le thread de requête restent : l'échantillonnage des messages DEBUG (un
+message écarté n'est jamais mis en forme), la troncature des arguments (dont
+le coût est borné par `max_length`, voir `PayloadSamplingFilter`) et
+l'interpolation du message à partir de ces arguments tronqués, faite à l'appel
+car les objets passés peuvent être modifiés ensuite. L'enregistrement est
+alors déposé dans une file ; un thread d'écriture (`QueueListener`) applique
+les formatters (date, gabarit, trace d'exception) et écrit vers les handlers
+réels (console, fichiers rotatifs). Quand la file est pleine, les
+messages INFO/DEBUG sont comptés comme perdus ; une erreur attend une place au
+plus `error_timeout` secondes puis est écrite directement par le thread appelant.
+"""
+import logging
+import queue
+import random
+import reprlib
+from logging.handlers import QueueHandler, QueueListener
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    `handlers` : handlers cibles, référencés dans LOGGING par 'cfg://handlers.<nom>'.
+    dictConfig configure les handlers par ordre alphabétique : le nom de ce handler
+    doit donc être postérieur à ceux de ses cibles (ex. 'queue_api').
+    """
+
+    def __init__(self, handlers, queue_size=10000, error_timeout=0.5):
+        # Accès par indice : c'est lui qui résout les références 'cfg://' de dictConfig
+        handlers = [handlers[i] for i in range(len(handlers))]
+        for handler in handlers:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(f"Handler cible non configuré : {handler!r}")
+        super().__init__(queue.Queue(queue_size))
+        self.dropped = 0
+        self.error_timeout = error_timeout
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._started = True
+
+    def prepare(self, record):
+        # Interpolation à l'appel (les arguments, déjà tronqués par le filtre, peuvent
+        # changer ensuite) ; formatters et trace d'exception : thread d'écriture.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if record.levelno >= logging.ERROR:
+            # Jamais perdues, sans bloquer indéfiniment : attente bornée puis écriture directe
+            try:
+                self.queue.put(record, timeout=self.error_timeout)
+            except queue.Full:
+                self.listener.handle(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Vide la file et arrête le thread d'écriture (sans effet s'il est déjà arrêté)."""
+        if self._started:
+            self._started = False
+            self.listener.stop()
+
+    def close(self):
+        # Appelé par logging.shutdown() à la sortie : vide la file avant de fermer les cibles
+        self.stop()
+        super().close()
+
+
+class PayloadSamplingFilter(logging.Filter):
+    """
+    Échantillonne les messages DEBUG (`debug_sample_rate` entre 0 et 1) et tronque
+    la représentation des arguments à `max_length` caractères.
+    Les messages INFO et plus sont toujours conservés.
+
+    Les conteneurs (dict, list...) sont représentés par `reprlib`, qui s'arrête
+    après quelques éléments et niveaux : une grosse charge utile n'est jamais
+    convertie en entier. Les autres objets passent par leur `__str__`.
+    """
+
+    def __init__(self, debug_sample_rate=1.0, max_length=500):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+        self.max_length = max_length
+        self._repr = reprlib.Repr()
+        self._repr.maxlevel = 3
+        self._repr.maxdict = self._repr.maxlist = self._repr.maxtuple = 20
+        self._repr.maxset = self._repr.maxfrozenset = self._repr.maxdeque = 20
+        self._repr.maxstring = self._repr.maxother = max_length
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        if isinstance(record.args, dict):
+            record.args = {key: self.truncate(value) for key, value in record.args.items()}
+        elif record.args:
+            record.args = tuple(self.truncate(arg) for arg in record.args)
+        return True
+
+    def truncate(self, value):
+        if isinstance(value, (int, float, bool)) or value is None:
+            return value
+        if isinstance(value, (dict, list, tuple, set, frozenset)):
+            text = self._repr.repr(value)
+        else:
+            text = str(value)
+        if len(text) > self.max_length:
+            return f"{text[:self.max_length]}… [{len(text) - self.max_length} caractères tronqués]"
+        return text
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.archive import archive_completed, purge_abandoned
+from api.models import Attempt
+
+
+class Command(BaseCommand):
+    help = (
+        "Rétention des tentatives : supprime par petits lots les tentatives abandonnées "
+        "et archive (compressées) les tentatives terminées anciennes. Les tentatives "
+        "archivées restent comptées par les analyses, les exports et les statistiques, "
+        "mais disparaissent de l'historique des élèves et du détail des tentatives et ne "
+        "sont plus exportables en PDF (les PDF en cache sont supprimés)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--abandoned-hours', type=float, default=None,
+                            help="Âge des tentatives non terminées à supprimer "
+                                 "(défaut : settings.RETENTION_ABANDONED_HOURS).")
+        parser.add_argument('--archive-days', type=float, default=None,
+                            help="Âge des tentatives terminées à archiver "
+                                 "(défaut : settings.RETENTION_ARCHIVE_DAYS ; 0 désactive l'archivage).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Tentatives par lot et par transaction (défaut : settings.RETENTION_BATCH_SIZE).")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Pause entre deux lots (s), pour laisser passer les soumissions.")
+        parser.add_argument('--dry-run', action='store_true', help="Compte les tentatives concernées sans rien modifier.")
+
+    def handle(self, *args, **options):
+        abandoned_hours = options['abandoned_hours']
+        if abandoned_hours is None:
+            abandoned_hours = getattr(settings, 'RETENTION_ABANDONED_HOURS', 24)
+        archive_days = options['archive_days']
+        if archive_days is None:
+            archive_days = getattr(settings, 'RETENTION_ARCHIVE_DAYS', None)
+        if abandoned_hours <= 0 or (archive_days is not None and archive_days < 0):
+            raise CommandError("Les durées de rétention doivent être positives.")
+
+        now = timezone.now()
+        abandoned_before = now - timedelta(hours=abandoned_hours)
+        archive_before = now - timedelta(days=archive_days) if archive_days else None
+
+        if options['dry_run']:
+            abandoned = Attempt.objects.filter(completed_at__isnull=True, started_at__lt=abandoned_before).count()
+            self.stdout.write(f"{abandoned} tentatives abandonnées à supprimer.")
+            if archive_before is not None:
+                old = Attempt.objects.filter(started_at__lt=archive_before, completed_at__lt=archive_before).count()
+                self.stdout.write(f"{old} tentatives terminées à archiver.")
+            return
+
+        deleted = purge_abandoned(abandoned_before, options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tentatives abandonnées supprimées."))
+        if archive_before is not None:
+            archived = archive_completed(archive_before, options['batch_size'], options['pause'])
+            self.stdout.write(self.style.SUCCESS(f"{archived} tentatives terminées archivées."))
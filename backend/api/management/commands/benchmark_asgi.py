@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmark import read_paths, run_asgi_in_process, run_http, run_wsgi_in_process
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare WSGI et ASGI sur les lectures fréquentes (quiz public, tentative, stats) "
+        "avec des clients lents, et rapporte débit et p50/p95/p99 côte à côte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', help="Serveur WSGI en marche (ex. gunicorn sur http://localhost:8000).")
+        parser.add_argument('--asgi-url', help="Serveur ASGI en marche (ex. uvicorn sur http://localhost:8001).")
+        parser.add_argument('--quiz', type=int, help="Quiz existant (obligatoire avec les URL).")
+        parser.add_argument('--attempt', type=int, help="Tentative existante (obligatoire avec les URL).")
+        parser.add_argument('--token', help="Token d'un utilisateur existant (obligatoire avec les URL).")
+        parser.add_argument('--clients', type=int, default=200, help="Clients simultanés.")
+        parser.add_argument('--requests', type=int, default=6, help="Requêtes par client.")
+        parser.add_argument('--client-delay', type=float, default=0.2,
+                            help="Temps de transmission d'une requête par un client lent (s).")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="Threads du worker WSGI simulé (en processus).")
+        parser.add_argument('--output', help="Enregistre le rapport JSON.")
+
+    def handle(self, *args, **options):
+        if options['wsgi_url'] or options['asgi_url']:
+            if not (options['wsgi_url'] and options['asgi_url']):
+                raise CommandError("--wsgi-url et --asgi-url s'utilisent ensemble.")
+            if not (options['quiz'] and options['attempt'] and options['token']):
+                raise CommandError("--quiz, --attempt et --token sont obligatoires avec les URL.")
+            paths = read_paths(options['quiz'], options['attempt'])
+            report = {
+                mode: run_http(options[f'{mode}_url'], paths, options['token'], options['clients'],
+                               options['requests'], options['client_delay'])
+                for mode in ('wsgi', 'asgi')
+            }
+        else:
+            report = self.run_in_process(options)
+
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(
+            f"WSGI : {report['wsgi']['throughput_rps']} req/s, ASGI : {report['asgi']['throughput_rps']} req/s "
+            f"({options['clients']} clients, délai client {options['client_delay']} s)"
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Rapport enregistré dans {options['output']}")
+
+    def run_in_process(self, options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            paths, token = self.create_fixture()
+            args = (paths, token, options['clients'], options['requests'])
+            # Tous les clients virtuels partagent une IP : la limitation par IP fausserait la mesure
+            with override_settings(THROTTLE_ENABLED=False):
+                return {
+                    'wsgi': run_wsgi_in_process(*args, options['threads'], options['client_delay']),
+                    'asgi': run_asgi_in_process(*args, options['client_delay']),
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def create_fixture(self):
+        from django.test import Client
+        from rest_framework.authtoken.models import Token
+
+        from api.models import Attempt, Question, Quiz, User
+
+        teacher = User.objects.create_user(username='benchmark_teacher', password='benchmark', role='teacher')
+        student = User.objects.create_user(username='benchmark_student', password='benchmark', role='student')
+        quiz = Quiz.objects.create(title="Quiz de comparaison", creator=teacher)
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=f"Question {idx}", options=['A', 'B', 'C', 'D'],
+                     correct_answer='A', order=idx)
+            for idx in range(10)
+        ])
+        attempt = Attempt.objects.create(quiz=quiz, user=student)
+        Client().post(f'/api/attempts/{attempt.pk}/submit/', {
+            'answers': {str(question.pk): 'A' for question in questions},
+        }, content_type='application/json')
+        return read_paths(quiz.pk, attempt.pk), Token.objects.create(user=student).key
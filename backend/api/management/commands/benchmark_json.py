@@ -0,0 +1,146 @@
+import gzip
+import json
+from contextlib import contextmanager
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+
+from api import middleware
+from api.renderers import dumps, fast_json_enabled
+from api.serializers import AttemptSerializer, QuestionSerializer, QuizListSerializer, QuizSerializer
+
+
+FAST_SERIALIZERS = (QuestionSerializer, QuizSerializer, QuizListSerializer, AttemptSerializer)
+
+
+@contextmanager
+def field_representation():
+    """Désactive les chemins rapides : représentation champ par champ de DRF (mesure « avant »)."""
+    fast = {serializer_class: serializer_class.to_representation for serializer_class in FAST_SERIALIZERS}
+    for serializer_class in FAST_SERIALIZERS:
+        serializer_class.to_representation = ModelSerializer.to_representation
+    try:
+        yield
+    finally:
+        for serializer_class, method in fast.items():
+            serializer_class.to_representation = method
+
+
+def time_us(func, repeat):
+    """Durée médiane d'un appel, en microsecondes."""
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        durations.append(perf_counter() - start)
+    return round(median(durations) * 1_000_000, 1)
+
+
+def measure(serialize, repeat):
+    with field_representation():
+        data = serialize()
+        fields_us = time_us(serialize, repeat)
+    fast_data = serialize()
+    body = dumps(fast_data)
+    report = {
+        'serialize_fields_us': fields_us,
+        'serialize_fast_us': time_us(serialize, repeat),
+        'render_json_us': time_us(lambda: JSONRenderer().render(data), repeat),
+        'render_fast_us': time_us(lambda: dumps(fast_data), repeat),
+        'same_output': JSONRenderer().render(data) == body,
+        'bytes': len(body),
+        'bytes_gzip': len(gzip.compress(body, compresslevel=6)),
+    }
+    if middleware.brotli is not None:
+        report['bytes_br'] = len(middleware.brotli.compress(body, quality=5))
+    return report
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût de sérialisation et d'encodage JSON (DRF champ par champ + json "
+        "contre chemins rapides + orjson) et la taille des réponses, brute et compressée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=20, help="Questions par quiz.")
+        parser.add_argument('--quizzes', type=int, default=20, help="Quiz de la page de liste.")
+        parser.add_argument('--attempts', type=int, default=50, help="Tentatives de la liste de tentatives.")
+        parser.add_argument('--repeat', type=int, default=200, help="Répétitions par mesure.")
+        parser.add_argument('--output', help="Enregistre le rapport JSON.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(report, indent=2))
+        for name, result in report['payloads'].items():
+            self.stdout.write(
+                f"{name} : {result['serialize_fields_us'] + result['render_json_us']:.0f} µs -> "
+                f"{result['serialize_fast_us'] + result['render_fast_us']:.0f} µs, "
+                f"{result['bytes']} o -> {result['bytes_gzip']} o gzip"
+                + (f", {result['bytes_br']} o br" if 'bytes_br' in result else '')
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Rapport enregistré dans {options['output']}")
+
+    def run(self, options):
+        from api.models import Attempt, Quiz
+
+        quiz_ids, attempt_ids = self.create_fixture(options)
+        quiz = Quiz.objects.select_related('creator').prefetch_related('questions').get(pk=quiz_ids[0])
+        quizzes = list(
+            Quiz.objects.select_related('creator').annotate(question_count=Count('questions'))
+            .filter(pk__in=quiz_ids)
+        )
+        attempts = list(Attempt.objects.select_related('quiz', 'user').filter(pk__in=attempt_ids))
+        repeat = options['repeat']
+        return {
+            'orjson': fast_json_enabled(),
+            'brotli': middleware.brotli is not None,
+            'payloads': {
+                'quiz_detail': measure(lambda: QuizSerializer(quiz).data, repeat),
+                'quiz_list': measure(lambda: QuizListSerializer(quizzes, many=True).data, repeat),
+                'attempt_list': measure(lambda: AttemptSerializer(attempts, many=True).data, repeat),
+            },
+        }
+
+    def create_fixture(self, options):
+        from django.test import Client
+
+        from api.models import Attempt, Question, Quiz, User
+
+        teacher = User.objects.create_user(username='benchmark_teacher', password='benchmark', role='teacher')
+        student = User.objects.create_user(username='benchmark_student', password='benchmark', role='student')
+        quizzes = Quiz.objects.bulk_create([
+            Quiz(title=f"Quiz de mesure {idx}", description="Révisions : fractions, proportionnalité et équations.",
+                 tags="maths, révisions", creator=teacher)
+            for idx in range(options['quizzes'])
+        ])
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=f"Question {idx} : quelle est la bonne réponse ?",
+                     options=['Réponse A', 'Réponse B', 'Réponse C', 'Réponse D'], correct_answer='Réponse A',
+                     order=idx)
+            for quiz in quizzes for idx in range(options['questions'])
+        ])
+        first_questions = [question for question in questions if question.quiz_id == quizzes[0].pk]
+        client = Client()
+        attempt_ids = []
+        for idx in range(options['attempts']):
+            attempt = Attempt.objects.create(quiz=quizzes[0], user=student)
+            client.post(f'/api/attempts/{attempt.pk}/submit/', {
+                'answers': {str(question.pk): 'Réponse A' if (idx + question.order) % 3 else 'Réponse B'
+                            for question in first_questions},
+            }, content_type='application/json')
+            attempt_ids.append(attempt.pk)
+        return [quiz.pk for quiz in quizzes], attempt_ids
@@ -0,0 +1,84 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.loadtest import HttpClient, InProcessClient, compare_to_baseline, run_classroom
+
+
+class Command(BaseCommand):
+    help = (
+        "Simule une classe qui passe un quiz (consultation, création de tentative, soumission) "
+        "et rapporte débit et p50/p95/p99 par endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help="Serveur cible (ex. http://localhost:8000), lancé avec "
+                                               "THROTTLE_ENABLED=0 : tous les élèves virtuels partagent une IP "
+                                               "et le rapport est refusé si des requêtes sont limitées (429). "
+                                               "Par défaut : en processus, sur une base de test jetable.")
+        parser.add_argument('--quiz', type=int, help="Quiz existant à utiliser (obligatoire avec --base-url).")
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=10, help="Nombre de questions du quiz créé en processus.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Enregistre le rapport JSON (nouvelle référence).")
+        parser.add_argument('--baseline', help="Rapport JSON de référence à comparer.")
+        parser.add_argument('--max-regression', type=float, default=0.2,
+                            help="Dégradation tolérée par rapport à la référence (0.2 = 20 %%).")
+
+    def handle(self, *args, **options):
+        if options['base_url']:
+            if not options['quiz']:
+                raise CommandError("--quiz est obligatoire avec --base-url.")
+            report = run_classroom(
+                lambda: HttpClient(options['base_url']), options['quiz'],
+                options['students'], options['concurrency'], options['seed'],
+            )
+        else:
+            report = self.run_in_process(options)
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if report['throttled']:
+            raise CommandError(
+                f"{report['throttled']} requêtes limitées (429) : mesure faussée, "
+                "relancez le serveur cible avec THROTTLE_ENABLED=0."
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Rapport enregistré dans {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_to_baseline(report, baseline, options['max_regression'])
+            if regressions:
+                raise CommandError("Régressions détectées :\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la référence."))
+
+    def run_in_process(self, options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            quiz_id = self.create_fixture(options['questions'])
+            # Tous les élèves virtuels partagent une IP : la limitation par IP fausserait la mesure
+            with override_settings(THROTTLE_ENABLED=False):
+                return run_classroom(
+                    InProcessClient, quiz_id, options['students'], options['concurrency'], options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def create_fixture(self, question_count):
+        from api.models import Question, Quiz, User
+
+        teacher = User.objects.create_user(username='loadtest_teacher', password='loadtest', role='teacher')
+        quiz = Quiz.objects.create(title="Quiz de charge", creator=teacher)
+        Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=f"Question {idx}", options=['A', 'B', 'C', 'D'],
+                     correct_answer='A', order=idx)
+            for idx in range(question_count)
+        ])
+        return quiz.pk
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Démarrage d'un worker : import du point d'entrée puis chargement des URLs (fait à la première requête)
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import quizmaster.{entrypoint}
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(f"total_ms={{(time.perf_counter() - start) * 1000:.1f}}")
+"""
+
+
+def parse_importtime(output):
+    """Retourne [(module, self_us, cumulative_us)] depuis la sortie de `python -X importtime`."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        modules.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps d'import au démarrage de quizmaster.wsgi/asgi et échoue au-delà du budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entrypoint', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--top', type=int, default=15, help="Nombre de modules les plus lents à afficher.")
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help="Budget total en millisecondes (défaut : settings.STARTUP_BUDGET_MS).")
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms']
+        if budget is None:
+            budget = getattr(settings, 'STARTUP_BUDGET_MS', 1500)
+
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(entrypoint=options['entrypoint'])],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Le démarrage a échoué :\n{proc.stderr[-2000:]}")
+
+        total_ms = float(proc.stdout.strip().rsplit('total_ms=', 1)[-1])
+        modules = parse_importtime(proc.stderr)
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+
+        self.stdout.write("Modules les plus lents (self / cumulé, ms) :")
+        for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[1], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}  {name}")
+
+        self.stdout.write("Par paquet (self, ms) :")
+        for name, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}  {name}")
+
+        self.stdout.write(f"Démarrage {options['entrypoint']} : {total_ms:.1f} ms ({len(modules)} modules, budget {budget:.0f} ms)")
+        if total_ms > budget:
+            raise CommandError(f"Budget de démarrage dépassé : {total_ms:.1f} ms > {budget:.0f} ms")
+        self.stdout.write(self.style.SUCCESS("Budget de démarrage respecté."))
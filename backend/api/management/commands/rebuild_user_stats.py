@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Reconstruit la table des statistiques par (utilisateur, quiz) depuis les tentatives."
+
+    def handle(self, *args, **options):
+        count = rebuild_user_stats()
+        self.stdout.write(self.style.SUCCESS(f"{count} agrégats reconstruits."))
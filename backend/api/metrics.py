@@ -0,0 +1,123 @@
+"""
+Mesures de performance par requête (voir api/middleware.py).
+
+`RequestTimings` accumule, pour la requête courante, le nombre de requêtes
+SQL, le temps SQL et le temps passé dans les sérialiseurs. Les durées sont
+agrégées en histogrammes par route et exposées au format texte Prometheus
+sur `/api/metrics/`.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'sql', 'serializer')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """À installer avec `connection.execute_wrapper`."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += perf_counter() - start
+            self.queries += 1
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed_serializer():
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.serializer += perf_counter() - start
+
+
+class Histogram:
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    METRICS = (
+        ('quizmaster_request_duration_seconds', "Durée totale de traitement des requêtes."),
+        ('quizmaster_request_db_seconds', "Temps SQL par requête."),
+        ('quizmaster_request_serializer_seconds', "Temps passé dans les sérialiseurs par requête."),
+    )
+
+    def __init__(self):
+        self._lock = Lock()
+        self._histograms = {}
+        self._queries = {}
+
+    def observe(self, route, method, total, timings):
+        labels = (route, method)
+        with self._lock:
+            histograms = self._histograms.get(labels)
+            if histograms is None:
+                histograms = self._histograms[labels] = [Histogram() for _ in self.METRICS]
+            for histogram, value in zip(histograms, (total, timings.sql, timings.serializer)):
+                histogram.observe(value)
+            self._queries[labels] = self._queries.get(labels, 0) + timings.queries
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for idx, (name, description) in enumerate(self.METRICS):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (route, method), histograms in sorted(self._histograms.items()):
+                    histogram = histograms[idx]
+                    labels = f'route="{route}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(Histogram.BUCKETS + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            name = 'quizmaster_request_db_queries_total'
+            lines.append(f"# HELP {name} Nombre de requêtes SQL exécutées.")
+            lines.append(f"# TYPE {name} counter")
+            for (route, method), count in sorted(self._queries.items()):
+                lines.append(f'{name}{{route="{route}",method="{method}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._queries.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,210 @@
+import asyncio
+from threading import BoundedSemaphore
+from time import perf_counter
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+from . import metrics
+from .renderers import dumps
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+class ASGIRoutingMiddleware(MiddlewareMixin):
+    """
+    Sous ASGI, résout les URL avec `ASGI_URLCONF` : les lectures fréquentes y sont
+    servies par des vues async natives. À placer en premier dans MIDDLEWARE.
+    """
+
+    def process_request(self, request):
+        urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        if urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = urlconf
+
+
+class WriteConcurrencyLimitMiddleware:
+    """
+    Limite le nombre de requêtes d'écriture traitées en même temps par le processus
+    (`WRITE_CONCURRENCY_LIMIT`). Au-delà, une requête attend une place au plus
+    `WRITE_CONCURRENCY_WAIT` secondes puis reçoit un 429 avec `Retry-After` : la charge
+    est rejetée avant d'allonger la file d'attente du verrou d'écriture SQLite.
+    Sous ASGI, l'attente se fait sur un `asyncio.Semaphore` (un par boucle d'événements).
+    """
+
+    sync_capable = True
+    async_capable = True
+    write_methods = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        limit = getattr(settings, 'WRITE_CONCURRENCY_LIMIT', None)
+        self.limit = limit
+        self.slots = BoundedSemaphore(limit) if limit else None
+        self.wait = getattr(settings, 'WRITE_CONCURRENCY_WAIT', 1.0)
+        # Un asyncio.Semaphore est lié à la boucle qui l'utilise
+        self.async_slots = WeakKeyDictionary()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.slots is None or request.method not in self.write_methods:
+            return self.get_response(request)
+        if not self.slots.acquire(timeout=self.wait):
+            return self.overloaded()
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+    async def __acall__(self, request):
+        if self.slots is None or request.method not in self.write_methods:
+            return await self.get_response(request)
+        loop = asyncio.get_running_loop()
+        slots = self.async_slots.get(loop)
+        if slots is None:
+            slots = self.async_slots[loop] = asyncio.BoundedSemaphore(self.limit)
+        # Réveillée dès qu'une place se libère, sans bloquer la boucle d'événements
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.wait)
+        except asyncio.TimeoutError:
+            return self.overloaded()
+        try:
+            return await self.get_response(request)
+        finally:
+            slots.release()
+
+    def overloaded(self):
+        retry_after = getattr(settings, 'WRITE_RETRY_AFTER', 1)
+        response = HttpResponse(
+            dumps({'detail': f"Serveur surchargé, réessayez dans {retry_after} seconde(s)."}),
+            status=429, content_type='application/json',
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Mesure chaque requête (SQL, sérialiseurs, vue, rendu) et ajoute un en-tête
+    `Server-Timing`. À placer en dernier dans MIDDLEWARE pour encadrer la vue au plus près.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Sous ASGI, la chaîne reste async jusqu'aux vues async (pas de passage par un thread)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = metrics.start_request()
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(timings.sql_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings, start, perf_counter())
+
+    async def __acall__(self, request):
+        # Les requêtes de l'ORM async s'exécutent dans le thread de sync_to_async :
+        # elles ne sont pas comptées dans `db`, seule la durée totale est mesurée
+        timings, token = metrics.start_request()
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings, start, perf_counter())
+
+    def finish(self, request, response, timings, start, end):
+        view_start = getattr(request, '_perf_view_start', start)
+        view_end = getattr(request, '_perf_view_end', end)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.sql * 1000:.2f};desc="{timings.queries} queries"',
+            f'ser;dur={timings.serializer * 1000:.2f}',
+            f'view;dur={(view_end - view_start) * 1000:.2f}',
+            f'render;dur={(end - view_end) * 1000:.2f}',
+            f'total;dur={(end - start) * 1000:.2f}',
+        ])
+
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        metrics.registry.observe(route, request.method, end - start, timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf_view_start = perf_counter()
+
+    def process_template_response(self, request, response):
+        # Appelé après la vue et avant le rendu des réponses DRF
+        request._perf_view_end = perf_counter()
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresse les réponses d'au moins `COMPRESSION_MIN_SIZE` octets : brotli si le
+    client l'accepte et que le paquet `brotli` est installé, gzip sinon (réponses en
+    flux comprises). Les contenus déjà compressés (PDF, images, archives) sont laissés tels quels.
+
+    BREACH : le gzip de Django ajoute un bourrage de longueur aléatoire, ce que le
+    format brotli ne permet pas. Une requête ou une réponse porteuse d'identifiants
+    (en-tête Authorization, cookies) est donc toujours compressée en gzip.
+    """
+
+    excluded_types = ('image/', 'video/', 'audio/', 'application/pdf', 'application/zip', 'application/gzip')
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').startswith(self.excluded_types):
+            return response
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (brotli is None or response.streaming or not re_accepts_brotli.search(ae)
+                or self.carries_credentials(request, response)):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # Même règle que gzip : un ETag fort devient faible (RFC 9110, 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    @staticmethod
+    def carries_credentials(request, response):
+        return bool(
+            request.META.get('HTTP_AUTHORIZATION') or request.META.get('HTTP_COOKIE') or response.cookies
+        )
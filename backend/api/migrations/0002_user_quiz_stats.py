@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserQuizStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('best_score', models.FloatField(default=0.0)),
+                ('last_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='api.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Statistique par quiz',
+                'verbose_name_plural': 'Statistiques par quiz',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='userquizstats',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='unique_user_quiz_stats'),
+        ),
+    ]
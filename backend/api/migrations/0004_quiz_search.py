@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE api_quiz_fts USING fts5(
+        title, description, tags,
+        content='api_quiz', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER api_quiz_fts_ai AFTER INSERT ON api_quiz BEGIN
+        INSERT INTO api_quiz_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END""",
+    """CREATE TRIGGER api_quiz_fts_ad AFTER DELETE ON api_quiz BEGIN
+        INSERT INTO api_quiz_fts(api_quiz_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+    END""",
+    """CREATE TRIGGER api_quiz_fts_au AFTER UPDATE OF title, description, tags ON api_quiz BEGIN
+        INSERT INTO api_quiz_fts(api_quiz_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        INSERT INTO api_quiz_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END""",
+    "INSERT INTO api_quiz_fts(api_quiz_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS api_quiz_fts_ai",
+    "DROP TRIGGER IF EXISTS api_quiz_fts_ad",
+    "DROP TRIGGER IF EXISTS api_quiz_fts_au",
+    "DROP TABLE IF EXISTS api_quiz_fts",
+]
+
+POSTGRES_INDEX = (
+    "CREATE INDEX api_quiz_search_idx ON api_quiz "
+    "USING GIN (to_tsvector('french', title || ' ' || description || ' ' || tags))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+                return  # Repli sur icontains (voir api/search.py)
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS api_quiz_search_idx")
+
+
+def populate_tags(apps, schema_editor):
+    Quiz = apps.get_model('api', 'Quiz')
+    Tag = apps.get_model('api', 'Tag')
+    tags = {}
+    for quiz in Quiz.objects.exclude(tags='').iterator():
+        names = {' '.join(part.split()).lower()[:50] for part in quiz.tags.split(',')} - {''}
+        for name in names:
+            if name not in tags:
+                tags[name] = Tag.objects.create(name=name)
+        quiz.tag_set.set([tags[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Mot-clé',
+                'verbose_name_plural': 'Mots-clés',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['difficulty', '-created_at'], name='quiz_difficulty_idx'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='quizzes', to='api.tag'),
+        ),
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,187 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:50
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+# Copie figée de l'encodage compact (api/encoding.py à la date de cette migration) :
+# la migration ne dépend pas du code applicatif, qui peut évoluer ensuite.
+NO_ANSWER = 0
+OTHER_ANSWER = 255
+MAX_OPTIONS = OTHER_ANSWER - 1
+
+
+def key_digest(questions):
+    payload = json.dumps(questions, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def pack_bits(flags):
+    data = bytearray((len(flags) + 7) // 8)
+    for position, flag in enumerate(flags):
+        if flag:
+            data[position >> 3] |= 1 << (position & 7)
+    return bytes(data)
+
+
+def unpack_bits(data, count):
+    return [bool(data[position >> 3] >> (position & 7) & 1) for position in range(count)]
+
+
+def option_codes(options):
+    codes = {}
+    for index, option in enumerate(options[:MAX_OPTIONS]):
+        if isinstance(option, str):
+            codes.setdefault(option, index + 1)
+    return codes
+
+
+def encode_answer(user_answer, codes):
+    if user_answer == '' or user_answer is None:
+        return NO_ANSWER, None
+    code = codes.get(user_answer) if isinstance(user_answer, str) else None
+    if code is None:
+        return OTHER_ANSWER, user_answer
+    return code, None
+
+
+def decode_results(questions, choices, correct_bits, other_answers=None):
+    flags = unpack_bits(correct_bits, len(questions))
+    other_answers = other_answers or {}
+    results = {}
+    for position, (question_id, correct_answer, options) in enumerate(questions):
+        code = choices[position]
+        if code == NO_ANSWER:
+            user_answer = ''
+        elif code == OTHER_ANSWER:
+            user_answer = other_answers.get(str(position), '')
+        else:
+            user_answer = options[code - 1]
+        results[str(question_id)] = {
+            'user_answer': user_answer,
+            'correct_answer': correct_answer,
+            'is_correct': flags[position],
+        }
+    return results
+
+
+def compact_attempts(apps, schema_editor):
+    """Convertit les résultats JSON détaillés en encodage compact (modèles historiques uniquement)."""
+    Attempt = apps.get_model('api', 'Attempt')
+    AnswerKeyVersion = apps.get_model('api', 'AnswerKeyVersion')
+    Question = apps.get_model('api', 'Question')
+
+    options = dict(Question.objects.values_list('id', 'options'))
+    versions = {}
+    batch = []
+    rows = Attempt.objects.filter(completed_at__isnull=False).only('id', 'quiz_id', 'answers')
+    for attempt in rows.iterator(chunk_size=BATCH_SIZE):
+        results = [
+            (int(question_id), result) for question_id, result in (attempt.answers or {}).items()
+            if str(question_id).isdigit() and isinstance(result, dict)
+        ]
+        if not results:
+            continue
+        # Le corrigé est reconstruit depuis la tentative elle-même : il reste exact même si le quiz a changé
+        questions = [
+            [question_id, result.get('correct_answer', ''), list(options.get(question_id) or [])]
+            for question_id, result in results
+        ]
+        digest = key_digest(questions)
+        if (attempt.quiz_id, digest) not in versions:
+            version, _ = AnswerKeyVersion.objects.get_or_create(
+                quiz_id=attempt.quiz_id, digest=digest, defaults={'questions': questions}
+            )
+            versions[(attempt.quiz_id, digest)] = version.pk
+
+        choices = bytearray()
+        other_answers = {}
+        for position, ((question_id, result), question) in enumerate(zip(results, questions)):
+            code, other = encode_answer(result.get('user_answer', ''), option_codes(question[2]))
+            choices.append(code)
+            if other is not None:
+                other_answers[str(position)] = other
+        attempt.key_version_id = versions[(attempt.quiz_id, digest)]
+        attempt.choices = bytes(choices)
+        attempt.correct_bits = pack_bits([bool(result.get('is_correct')) for _, result in results])
+        attempt.other_answers = other_answers or None
+        batch.append(attempt)
+        if len(batch) >= BATCH_SIZE:
+            Attempt.objects.bulk_update(batch, ['key_version', 'choices', 'correct_bits', 'other_answers'])
+            batch = []
+    if batch:
+        Attempt.objects.bulk_update(batch, ['key_version', 'choices', 'correct_bits', 'other_answers'])
+
+
+def expand_attempts(apps, schema_editor):
+    Attempt = apps.get_model('api', 'Attempt')
+    batch = []
+    rows = Attempt.objects.filter(key_version__isnull=False).select_related('key_version')
+    for attempt in rows.iterator(chunk_size=BATCH_SIZE):
+        attempt.answers = decode_results(
+            attempt.key_version.questions, bytes(attempt.choices), bytes(attempt.correct_bits), attempt.other_answers
+        )
+        batch.append(attempt)
+        if len(batch) >= BATCH_SIZE:
+            Attempt.objects.bulk_update(batch, ['answers'])
+            batch = []
+    if batch:
+        Attempt.objects.bulk_update(batch, ['answers'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_quiz_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='choices',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='correct_bits',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='other_answers',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AnswerKeyVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40)),
+                ('questions', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_keys', to='api.quiz')),
+            ],
+            options={
+                'verbose_name': 'Version de corrigé',
+                'verbose_name_plural': 'Versions de corrigé',
+            },
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='key_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='api.answerkeyversion'),
+        ),
+        migrations.AddConstraint(
+            model_name='answerkeyversion',
+            constraint=models.UniqueConstraint(fields=('quiz', 'digest'), name='unique_quiz_answer_key'),
+        ),
+        migrations.RunPython(compact_attempts, expand_attempts),
+        migrations.RemoveField(
+            model_name='attempt',
+            name='answers',
+        ),
+    ]
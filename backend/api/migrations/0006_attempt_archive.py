@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_compact_attempt_results'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField()),
+                ('first_attempt_id', models.BigIntegerField()),
+                ('last_attempt_id', models.BigIntegerField()),
+                ('completed_from', models.DateTimeField()),
+                ('completed_to', models.DateTimeField()),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('key_version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attempt_archives', to='api.answerkeyversion')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_archives', to='api.quiz')),
+            ],
+            options={
+                'verbose_name': 'Archive de tentatives',
+                'verbose_name_plural': 'Archives de tentatives',
+                'indexes': [models.Index(fields=['quiz', 'first_attempt_id'], name='archive_quiz_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_attempt_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userquizstats',
+            index=models.Index(fields=['quiz', '-best_score'], name='stats_quiz_best_idx'),
+        ),
+    ]
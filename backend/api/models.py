@@ -18,6 +18,19 @@ class User(AbstractUser):
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
 
+class Tag(models.Model):
+    """Mot-clé normalisé (minuscules), indexé pour le filtrage `?tag=`."""
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Mot-clé"
+        verbose_name_plural = "Mots-clés"
+
+    def __str__(self):
+        return self.name
+
+
 class Quiz(models.Model):
     DIFFICULTY_CHOICES = [
         ('facile', 'Facile'),
@@ -28,12 +41,18 @@ class Quiz(models.Model):
     description = models.TextField(blank=True)
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quizzes')
     tags = models.CharField(max_length=200, blank=True)
+    # Forme normalisée de `tags`, synchronisée à l'enregistrement (voir api/search.py)
+    tag_set = models.ManyToManyField(Tag, related_name='quizzes', blank=True)
     difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='facile')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='quiz_created_idx'),
+            models.Index(fields=['difficulty', '-created_at'], name='quiz_difficulty_idx'),
+        ]
         verbose_name = "Quiz"
         verbose_name_plural = "Quizs"
 
@@ -55,24 +74,119 @@ class Question(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['quiz', 'order'], name='question_quiz_order_idx'),
+            models.Index(fields=['order', 'id'], name='question_order_idx'),
+        ]
         verbose_name = "Question"
         verbose_name_plural = "Questions"
 
     def __str__(self):
         return f"{self.quiz.title} - Q{self.order}"
 
+class AnswerKeyVersion(models.Model):
+    """
+    Corrigé figé d'une version de quiz, partagé par toutes les tentatives
+    corrigées avec lui (voir api/encoding.py).
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='answer_keys')
+    digest = models.CharField(max_length=40)
+    # [[id de question, bonne réponse, options], ...] dans l'ordre des questions
+    questions = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'digest'], name='unique_quiz_answer_key'),
+        ]
+        verbose_name = "Version de corrigé"
+        verbose_name_plural = "Versions de corrigé"
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.digest[:8]}"
+
+
 class Attempt(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attempts', null=True, blank=True)
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     score = models.FloatField(default=0.0)
-    answers = models.JSONField(default=dict)
+    # Résultat compact : corrigé de référence, un octet par question et un bit de justesse
+    key_version = models.ForeignKey(
+        AnswerKeyVersion, on_delete=models.CASCADE, related_name='attempts', null=True, blank=True
+    )
+    choices = models.BinaryField(null=True, blank=True)
+    correct_bits = models.BinaryField(null=True, blank=True)
+    other_answers = models.JSONField(null=True, blank=True)
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['user', '-started_at'], name='attempt_user_started_idx'),
+            models.Index(fields=['-started_at'], name='attempt_started_idx'),
+        ]
         verbose_name = "Tentative"
         verbose_name_plural = "Tentatives"
 
     def __str__(self):
         return f"Attempt for {self.quiz.title} by {self.user.username if self.user else 'Anonymous'}"
+
+
+class AttemptArchive(models.Model):
+    """
+    Lot de tentatives terminées sorties de `Attempt` par la rétention (voir api/archive.py) :
+    mêmes quiz et corrigé figé, colonnes regroupées et compressées dans `data`.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempt_archives')
+    key_version = models.ForeignKey(
+        AnswerKeyVersion, on_delete=models.CASCADE, related_name='attempt_archives', null=True, blank=True
+    )
+    attempt_count = models.PositiveIntegerField()
+    first_attempt_id = models.BigIntegerField()
+    last_attempt_id = models.BigIntegerField()
+    completed_from = models.DateTimeField()
+    completed_to = models.DateTimeField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['quiz', 'first_attempt_id'], name='archive_quiz_idx'),
+        ]
+        verbose_name = "Archive de tentatives"
+        verbose_name_plural = "Archives de tentatives"
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.attempt_count} tentatives"
+
+
+class UserQuizStats(models.Model):
+    """
+    Agrégat matérialisé par (utilisateur, quiz), tenu à jour à chaque soumission.
+    Reconstructible depuis `Attempt` et `AttemptArchive` : `python manage.py rebuild_user_stats`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_stats')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='user_stats')
+    attempt_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    best_score = models.FloatField(default=0.0)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='unique_user_quiz_stats'),
+        ]
+        indexes = [
+            # Classement (api/leaderboard.py) : meilleurs scores d'un quiz
+            models.Index(fields=['quiz', '-best_score'], name='stats_quiz_best_idx'),
+        ]
+        verbose_name = "Statistique par quiz"
+        verbose_name_plural = "Statistiques par quiz"
+
+    @property
+    def avg_score(self):
+        return self.score_sum / self.attempt_count if self.attempt_count else 0
+
+    def __str__(self):
+        return f"{self.user.username} - {self.quiz.title}"
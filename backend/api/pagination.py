@@ -0,0 +1,25 @@
+"""
+Pagination par curseur (keyset) : chaque page est obtenue par un filtre
+`WHERE ordering > curseur` sur un index composite, donc une page profonde
+coûte autant que la première.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    page_size = getattr(settings, 'API_PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class QuizCursorPagination(BaseCursorPagination):
+    ordering = '-created_at'
+
+
+class QuestionCursorPagination(BaseCursorPagination):
+    ordering = ('order', 'id')
+
+
+class AttemptCursorPagination(BaseCursorPagination):
+    ordering = '-started_at'
@@ -0,0 +1,208 @@
+"""
+Export PDF des résultats d'une tentative.
+
+Le rendu ReportLab s'exécute dans un pool de processus (hors des threads de
+requête) et le fichier produit est conservé sur disque : une tentative
+terminée ne change plus, le PDF est donc calculé une seule fois.
+
+Une requête n'attend jamais le rendu : si le PDF n'est pas encore sur disque,
+le rendu est lancé (un seul par tentative) et `PdfPending` est levée ; la vue
+répond 202 et le client redemande après `Retry-After`. Un rendu en échec lève
+`PdfUnavailable` (503) à la demande suivante, puis est relancé.
+
+Le cache disque est élagué après les rendus : fichiers plus vieux que
+`PDF_CACHE_MAX_AGE_DAYS`, puis les plus anciens au-delà de `PDF_CACHE_MAX_BYTES`.
+Les PDF des tentatives archivées ou purgées par la rétention sont supprimés
+par `discard_cached`.
+"""
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from threading import Lock
+
+from django.conf import settings
+
+from .answer_keys import attempt_results
+
+
+logger = logging.getLogger('api')
+
+_executor = None
+_executor_lock = Lock()
+_in_flight = {}
+_in_flight_lock = Lock()
+_last_prune = 0.0
+
+
+class PdfPending(Exception):
+    pass
+
+
+class PdfUnavailable(Exception):
+    pass
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=getattr(settings, 'PDF_RENDER_WORKERS', 2))
+        return _executor
+
+
+def cache_dir():
+    return getattr(settings, 'PDF_CACHE_DIR', os.path.join(settings.DATA_DIR, 'pdf'))
+
+
+def cache_path(attempt):
+    return os.path.join(cache_dir(), f"attempt-{attempt.pk}-{int(attempt.completed_at.timestamp())}.pdf")
+
+
+def discard_cached(attempt_ids):
+    """Supprime les PDF en cache des tentatives données. Retourne le nombre de fichiers supprimés."""
+    ids = {str(pk) for pk in attempt_ids}
+    try:
+        entries = os.scandir(cache_dir())
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    with entries:
+        for entry in entries:
+            # Nom : attempt-<pk>-<horodatage>.pdf (voir cache_path)
+            parts = entry.name.split('-')
+            if len(parts) == 3 and parts[0] == 'attempt' and parts[1] in ids and parts[2].endswith('.pdf'):
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    return removed
+
+
+def build_report(attempt, questions):
+    """Données simples (sérialisables) transmises au processus de rendu."""
+    # Questions et bonnes réponses du corrigé figé : le quiz a pu changer depuis la tentative
+    texts = {str(question.id): question.question_text for question in questions}
+    rows = []
+    for question_id, result in attempt_results(attempt).items():
+        rows.append((
+            texts.get(question_id, ''),
+            str(result['user_answer']),
+            result['correct_answer'],
+            result['is_correct'],
+        ))
+    return {
+        'quiz_title': attempt.quiz.title,
+        'username': attempt.user.username if attempt.user else "Anonyme",
+        'completed_at': attempt.completed_at.strftime('%d/%m/%Y %H:%M'),
+        'score': attempt.score,
+        'rows': rows,
+    }
+
+
+def render_pdf(report, path):
+    """Exécuté dans un processus du pool : écrit le PDF de façon atomique."""
+    # ReportLab n'est importé que par les processus de rendu, jamais au démarrage des workers web
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    pdf = canvas.Canvas(tmp_path, pagesize=letter)
+    width, height = letter
+    y = height - inch
+
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawString(inch, y, f"Résultats : {report['quiz_title']}")
+    y -= 0.4 * inch
+    pdf.setFont('Helvetica', 11)
+    pdf.drawString(inch, y, f"Participant : {report['username']} - {report['completed_at']}")
+    y -= 0.3 * inch
+    pdf.drawString(inch, y, f"Score : {report['score']:.1f}%")
+    y -= 0.5 * inch
+
+    for idx, (text, user_answer, correct_answer, is_correct) in enumerate(report['rows'], start=1):
+        if y < 1.5 * inch:
+            pdf.showPage()
+            pdf.setFont('Helvetica', 11)
+            y = height - inch
+        pdf.drawString(inch, y, f"{idx}. {text}"[:95])
+        y -= 0.25 * inch
+        mark = "Correct" if is_correct else f"Incorrect (bonne réponse : {correct_answer})"
+        pdf.drawString(1.3 * inch, y, f"Votre réponse : {user_answer} - {mark}"[:90])
+        y -= 0.35 * inch
+
+    pdf.save()
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_attempt_pdf(attempt, questions):
+    """
+    Retourne le chemin du PDF de la tentative s'il est prêt. Sinon lance le rendu
+    (partagé par les demandes simultanées) et lève `PdfPending` sans attendre.
+    """
+    path = cache_path(attempt)
+    if os.path.exists(path):
+        return path
+
+    with _in_flight_lock:
+        future = _in_flight.get(path)
+        if future is not None and future.done():
+            # Seuls les rendus en échec restent dans la table une fois terminés
+            del _in_flight[path]
+            raise PdfUnavailable("Échec du rendu PDF")
+    if future is None:
+        report = build_report(attempt, questions)
+        with _in_flight_lock:
+            if path not in _in_flight:
+                future = _in_flight[path] = get_executor().submit(render_pdf, report, path)
+                future.add_done_callback(partial(_render_done, path))
+    raise PdfPending("Rendu PDF en cours")
+
+
+def _render_done(path, future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Échec du rendu PDF %s", os.path.basename(path), exc_info=exc)
+        return
+    with _in_flight_lock:
+        if _in_flight.get(path) is future:
+            del _in_flight[path]
+    prune_cache()
+
+
+def prune_cache(force=False):
+    """Supprime les PDF trop anciens puis les plus anciens au-delà de la taille maximale. Retourne leur nombre."""
+    global _last_prune
+    now = time.time()
+    if not force and now - _last_prune < getattr(settings, 'PDF_CACHE_PRUNE_INTERVAL', 60):
+        return 0
+    _last_prune = now
+    max_age = getattr(settings, 'PDF_CACHE_MAX_AGE_DAYS', 30) * 86400
+    max_bytes = getattr(settings, 'PDF_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+    files = []
+    for path in glob.glob(os.path.join(cache_dir(), 'attempt-*.pdf')):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
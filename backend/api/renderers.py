@@ -0,0 +1,65 @@
+"""
+Rendu et lecture JSON rapides pour l'API, avec orjson quand il est installé.
+
+Sans orjson (ou pour une sortie indentée, ex. API navigable), le
+comportement est exactement celui de `JSONRenderer` / `JSONParser` de DRF.
+Les types que orjson ne gère pas comme DRF (dates, décimaux, types numpy,
+chaînes paresseuses...) passent par l'encodeur de DRF : la sortie reste la même.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    # Dates confiées à l'encodeur de DRF (suffixe « Z », millisecondes) ; clés int acceptées comme json
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def fast_json_enabled():
+    return orjson is not None and getattr(settings, 'FAST_JSON', True)
+
+
+def dumps(data):
+    """Encode `data` en JSON compact (octets UTF-8), comme `JSONRenderer().render(data)`."""
+    if not fast_json_enabled():
+        return JSONRenderer().render(data)
+    content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    # Comme DRF : U+2028 et U+2029 échappés pour rester du JavaScript valide
+    if b'\xe2\x80' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        # orjson ne produit que du JSON compact en UTF-8 : les autres réglages passent par DRF
+        if indent or self.ensure_ascii or not self.compact or not fast_json_enabled():
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not fast_json_enabled() or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
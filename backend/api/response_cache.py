@@ -0,0 +1,68 @@
+"""
+Cache des réponses JSON déjà rendues, par version de quiz (`Quiz.updated_at`).
+
+Les requêtes concurrentes qui manquent le cache pour une même clé sont
+regroupées : une seule effectue le rendu, les autres attendent son résultat.
+"""
+import hashlib
+from threading import Lock
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils.http import parse_etags
+
+from .caching import LRUCache
+
+
+class RenderedResponse(NamedTuple):
+    version: object
+    body: bytes
+    etag: str
+
+
+def make_etag(key, version):
+    digest = hashlib.sha1(f"{key}:{version.isoformat()}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(etag, if_none_match):
+    """Comparaison faible de `If-None-Match` : un ETag rendu faible par la compression reste valide."""
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in parse_etags(if_none_match))
+
+
+class RenderedResponseCache:
+    def __init__(self, maxsize=256, lock_stripes=64):
+        self._entries = LRUCache(maxsize=maxsize)
+        # Verrous répartis par clé : nombre borné quel que soit le nombre de quiz
+        self._locks = [Lock() for _ in range(lock_stripes)]
+
+    def _lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+    def get(self, key, version):
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            return entry
+        return None
+
+    def get_or_render(self, key, version, render):
+        """`render()` doit retourner les octets de la réponse pour cette version."""
+        entry = self.get(key, version)
+        if entry is not None:
+            return entry
+        with self._lock_for(key):
+            # Une autre requête a peut-être fait le rendu pendant l'attente du verrou
+            entry = self.get(key, version)
+            if entry is None:
+                entry = RenderedResponse(version=version, body=render(), etag=make_etag(key, version))
+                self._entries.set(key, entry)
+            return entry
+
+    def invalidate(self, key):
+        self._entries.pop(key)
+
+    def clear(self):
+        self._entries.clear()
+
+
+public_quiz_cache = RenderedResponseCache(maxsize=getattr(settings, 'PUBLIC_QUIZ_CACHE_SIZE', 256))
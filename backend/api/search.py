@@ -0,0 +1,101 @@
+"""
+Recherche de quiz (titre, description, mots-clés) et mots-clés normalisés.
+
+- SQLite : table virtuelle FTS5 `api_quiz_fts`, tenue à jour par triggers
+  (migration 0004) ;
+- PostgreSQL : index GIN sur `to_tsvector('french', ...)` ;
+- autre base (ou FTS5 indisponible) : repli sur `icontains`.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Tag
+
+
+FTS_TABLE = 'api_quiz_fts'
+POSTGRES_SEARCH_VECTOR = "to_tsvector('french', title || ' ' || description || ' ' || tags)"
+
+_fts_available = None
+
+
+def normalize_tag(value):
+    return re.sub(r'\s+', ' ', value).strip().lower()[:50]
+
+
+def parse_tags(value):
+    tags = []
+    for part in (value or '').split(','):
+        tag = normalize_tag(part)
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def sync_quiz_tags(quiz):
+    """Aligne `quiz.tag_set` sur le champ texte `quiz.tags`."""
+    wanted = set(parse_tags(quiz.tags))
+    current = {tag.name: tag for tag in quiz.tag_set.all()}
+    if wanted == set(current):
+        return
+    existing = {tag.name: tag for tag in Tag.objects.filter(name__in=wanted)}
+    missing = [Tag(name=name) for name in wanted if name not in existing]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {tag.name: tag for tag in Tag.objects.filter(name__in=wanted)}
+    quiz.tag_set.set(existing.values())
+
+
+def sync_tags_bulk(quizzes):
+    """Équivalent groupé de `sync_quiz_tags` pour des quiz tout juste créés (sans mots-clés liés)."""
+    wanted = {quiz.pk: parse_tags(quiz.tags) for quiz in quizzes}
+    names = {name for tags in wanted.values() for name in tags}
+    if not names:
+        return
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    Through = Tag.quizzes.through
+    Through.objects.bulk_create([
+        Through(quiz_id=quiz_id, tag_id=ids[name]) for quiz_id, tags in wanted.items() for name in tags
+    ])
+
+
+def fts_available():
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def fts_query(text):
+    # Chaque mot devient un préfixe entre guillemets : aucune syntaxe FTS5 n'est interprétée
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_quizzes(queryset, text=None, tags=(), difficulty=None):
+    if difficulty:
+        queryset = queryset.filter(difficulty=difficulty)
+    for tag in tags:
+        queryset = queryset.filter(tag_set__name=normalize_tag(tag))
+
+    if text:
+        if connection.vendor == 'postgresql':
+            queryset = queryset.filter(id__in=RawSQL(
+                f"SELECT id FROM api_quiz WHERE {POSTGRES_SEARCH_VECTOR} @@ plainto_tsquery('french', %s)",
+                [text],
+            ))
+        elif connection.vendor == 'sqlite' and fts_available():
+            match = fts_query(text)
+            if not match:
+                return queryset.none()
+            queryset = queryset.filter(id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match],
+            ))
+        else:
+            queryset = queryset.filter(
+                Q(title__icontains=text) | Q(description__icontains=text) | Q(tags__icontains=text)
+            )
+    return queryset
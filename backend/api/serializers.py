@@ -1,7 +1,52 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from .models import User, Quiz, Question, Attempt
+from .answer_keys import attempt_results
+from .metrics import timed_serializer
+from .signals import muted_question_signals
 
-class UserSerializer(serializers.ModelSerializer):
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed_serializer():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Comptabilise la validation et la représentation dans l'en-tête Server-Timing (`ser`)."""
+
+    @property
+    def data(self):
+        with timed_serializer():
+            return super().data
+
+    def is_valid(self, *args, **kwargs):
+        with timed_serializer():
+            return super().is_valid(*args, **kwargs)
+
+
+# Chemins rapides en lecture (`to_representation` écrit à la main) : mêmes clés et mêmes
+# valeurs que les champs déclarés, sans le coût d'un appel de champ par attribut.
+# Toute modification de `Meta.fields` doit être reportée ici (voir FastJSONAndCompressionTest).
+_datetime = serializers.DateTimeField()
+
+
+class FastRepresentationMixin:
+    def timestamp(self, value):
+        """Comme `DateTimeField` (ISO 8601, fuseau courant, « Z » pour UTC) ; fuseau lu une fois par sérialiseur."""
+        if value is None or value.tzinfo is None:
+            return _datetime.to_representation(value)
+        tz = getattr(self, '_current_timezone', None)
+        if tz is None:
+            # Sérialiseur enfant d'une liste : partagé par tous les éléments
+            tz = self._current_timezone = timezone.get_current_timezone()
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     
     class Meta:
@@ -21,13 +66,38 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Question
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'question_type', 'question_text', 'options', 'correct_answer', 'order']
 
+    def to_representation(self, instance):
+        if not isinstance(instance, Question):
+            return super().to_representation(instance)
+        return {
+            'id': instance.id,
+            'question_type': instance.question_type,
+            'question_text': instance.question_text,
+            'options': instance.options,
+            'correct_answer': instance.correct_answer,
+            'order': instance.order,
+        }
+
+
+class QuestionWriteSerializer(QuestionSerializer):
+    # `id` accepté en écriture pour identifier les questions existantes lors d'une mise à jour
+    id = serializers.IntegerField(required=False)
+
+    class Meta(QuestionSerializer.Meta):
+        extra_kwargs = {'order': {'required': False}}
+
 
-class QuizSerializer(serializers.ModelSerializer):
+QUESTION_WRITE_FIELDS = ['question_type', 'question_text', 'options', 'correct_answer', 'order']
+NEW_QUESTION_REQUIRED_FIELDS = ('question_text', 'correct_answer')
+
+
+class QuizSerializer(TimedSerializerMixin, FastRepresentationMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     creator_username = serializers.CharField(source='creator.username', read_only=True)
     time_per_question = serializers.IntegerField(source='get_time_per_question', read_only=True)
@@ -41,11 +111,62 @@ class QuizSerializer(serializers.ModelSerializer):
         read_only_fields = ['creator']
     
     def get_question_count(self, obj):
-        return obj.questions.count()
+        # Questions préchargées (prefetch_related) : pas de COUNT supplémentaire
+        return len(obj.questions.all())
+
+    def to_representation(self, instance):
+        if not isinstance(instance, Quiz):
+            return super().to_representation(instance)
+        questions = instance.questions.all()
+        question_serializer = QuestionSerializer()
+        # `time_per_question` est absent : Quiz n'a pas de `get_time_per_question` (champ ignoré par DRF)
+        return {
+            'id': instance.id,
+            'title': instance.title,
+            'description': instance.description,
+            'creator': instance.creator_id,
+            'creator_username': instance.creator.username,
+            'tags': instance.tags,
+            'difficulty': instance.difficulty,
+            'created_at': self.timestamp(instance.created_at),
+            'updated_at': self.timestamp(instance.updated_at),
+            'questions': [question_serializer.to_representation(question) for question in questions],
+            'question_count': len(questions),
+        }
+
+
+class QuizListSerializer(TimedSerializerMixin, FastRepresentationMixin, serializers.ModelSerializer):
+    """Représentation résumée pour la liste des quiz (sans les questions)."""
+    creator_username = serializers.CharField(source='creator.username', read_only=True)
+    # Annoté par QuizViewSet.get_queryset (Count('questions'))
+    question_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Quiz
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'title', 'description', 'creator', 'creator_username',
+                  'tags', 'difficulty', 'created_at', 'updated_at', 'question_count']
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        if not isinstance(instance, Quiz) or not hasattr(instance, 'question_count'):
+            return super().to_representation(instance)
+        return {
+            'id': instance.id,
+            'title': instance.title,
+            'description': instance.description,
+            'creator': instance.creator_id,
+            'creator_username': instance.creator.username,
+            'tags': instance.tags,
+            'difficulty': instance.difficulty,
+            'created_at': self.timestamp(instance.created_at),
+            'updated_at': self.timestamp(instance.updated_at),
+            'question_count': instance.question_count,
+        }
 
 
-class QuizCreateSerializer(serializers.ModelSerializer):
-    questions = QuestionSerializer(many=True)
+class QuizCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    questions = QuestionWriteSerializer(many=True)
     
     class Meta:
         model = Quiz
@@ -58,22 +179,82 @@ class QuizCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Un quiz ne peut pas avoir plus de 20 questions.")
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         questions_data = validated_data.pop('questions')
         quiz = Quiz.objects.create(**validated_data)
         
-        for idx, question_data in enumerate(questions_data):
-            Question.objects.create(quiz=quiz, order=idx, **question_data)
+        Question.objects.bulk_create([
+            self._build_question(quiz, idx, question_data)
+            for idx, question_data in enumerate(questions_data)
+        ])
         
         return quiz
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        questions_data = validated_data.pop('questions', None)
+
+        if questions_data is not None:
+            self._sync_questions(instance, questions_data)
+
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Sauvegardé en dernier : `updated_at` change la version du quiz (corrigés en cache)
+        instance.save()
+        return instance
+
+    def _build_question(self, quiz, idx, question_data):
+        data = {k: v for k, v in question_data.items() if k not in ('id', 'order')}
+        return Question(quiz=quiz, order=idx, **data)
+
+    def _sync_questions(self, quiz, questions_data):
+        """
+        Compare la liste reçue aux questions enregistrées :
+        un bulk_create, un bulk_update et un seul DELETE au maximum.
+        """
+        existing = {question.id: question for question in quiz.questions.all()}
+        to_create = []
+        to_update = []
+        # PATCH : les champs obligatoires ne sont pas vérifiés, ils le sont ici pour les nouvelles questions
+        errors = [{} for _ in questions_data]
 
-class AttemptSerializer(serializers.ModelSerializer):
+        for idx, question_data in enumerate(questions_data):
+            question = existing.pop(question_data.get('id'), None)
+            if question is None:
+                errors[idx] = {
+                    field: [serializers.Field.default_error_messages['required']]
+                    for field in NEW_QUESTION_REQUIRED_FIELDS if field not in question_data
+                }
+                to_create.append(self._build_question(quiz, idx, question_data))
+                continue
+            for attr, value in question_data.items():
+                if attr not in ('id', 'order'):
+                    setattr(question, attr, value)
+            question.order = idx
+            to_update.append(question)
+
+        if any(errors):
+            raise serializers.ValidationError({'questions': errors})
+
+        with muted_question_signals():
+            if existing:
+                Question.objects.filter(pk__in=list(existing)).delete()
+            if to_update:
+                Question.objects.bulk_update(to_update, QUESTION_WRITE_FIELDS)
+            if to_create:
+                Question.objects.bulk_create(to_create)
+
+
+class AttemptSerializer(TimedSerializerMixin, FastRepresentationMixin, serializers.ModelSerializer):
     quiz_title = serializers.CharField(source='quiz.title', read_only=True)
     user_username = serializers.SerializerMethodField()
+    # Reconstruit depuis l'encodage compact et le corrigé figé de la tentative
+    answers = serializers.SerializerMethodField()
     
     class Meta:
         model = Attempt
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'quiz', 'quiz_title', 'user', 'user_username', 
                   'started_at', 'completed_at', 'score', 'answers']
         read_only_fields = ['user', 'started_at']
@@ -81,8 +262,27 @@ class AttemptSerializer(serializers.ModelSerializer):
     def get_user_username(self, obj):
         return obj.user.username if obj.user else "Anonyme"
 
+    def get_answers(self, obj):
+        # Corrigés déjà chargés (vues async) transmis par le contexte, sinon lus depuis le cache
+        return attempt_results(obj, self.context.get('answer_keys'))
 
-class AttemptCreateSerializer(serializers.ModelSerializer):
+    def to_representation(self, instance):
+        if not isinstance(instance, Attempt):
+            return super().to_representation(instance)
+        return {
+            'id': instance.id,
+            'quiz': instance.quiz_id,
+            'quiz_title': instance.quiz.title,
+            'user': instance.user_id,
+            'user_username': self.get_user_username(instance),
+            'started_at': self.timestamp(instance.started_at),
+            'completed_at': self.timestamp(instance.completed_at),
+            'score': float(instance.score) if instance.score is not None else None,
+            'answers': self.get_answers(instance),
+        }
+
+
+class AttemptCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Attempt
         fields = ['id', 'quiz']
@@ -92,7 +292,7 @@ class AttemptCreateSerializer(serializers.ModelSerializer):
         return Attempt.objects.create(**validated_data)
 
 
-class AttemptSubmitSerializer(serializers.Serializer):
+class AttemptSubmitSerializer(TimedSerializerMixin, serializers.Serializer):
     answers = serializers.JSONField()
     
     def validate_answers(self, value):
@@ -100,3 +300,15 @@ class AttemptSubmitSerializer(serializers.Serializer):
             raise serializers.ValidationError("Les réponses doivent être un dictionnaire.")
         return value
 
+
+class AttemptBatchItemSerializer(AttemptSubmitSerializer):
+    attempt = serializers.IntegerField()
+
+
+class AttemptBatchSubmitSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Soumissions rejouées en lot : [{"attempt": id, "answers": {...}}, ...]."""
+    submissions = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=500,
+    )
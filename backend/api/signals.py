@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from .answer_keys import invalidate_answer_key
+from .authentication import invalidate_token, invalidate_user_tokens
+from .models import Question, Quiz, User
+from .response_cache import public_quiz_cache
+from .search import sync_quiz_tags
+
+
+_state = local()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Applique les PRAGMA SQLite (WAL, synchronous, busy_timeout) à chaque nouvelle connexion."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@contextmanager
+def muted_question_signals():
+    """
+    Désactive la mise à jour de version faite question par question.
+    À utiliser pour les écritures groupées, qui sauvegardent le quiz une seule fois à la fin.
+    """
+    previous = getattr(_state, 'muted', False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = previous
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.pk)
+    public_quiz_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_tags_changed(sender, instance, raw=False, **kwargs):
+    # Le champ texte `tags` reste la source : la table `Tag` en est l'index normalisé
+    if not raw:
+        sync_quiz_tags(instance)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    if getattr(_state, 'muted', False):
+        return
+    # Une question modifiée change la version du quiz parent (`updated_at`),
+    # ce qui rend obsolètes les corrigés mis en cache dans les autres processus.
+    Quiz.objects.filter(pk=instance.quiz_id).update(updated_at=timezone.now())
+    invalidate_answer_key(instance.quiz_id)
+    public_quiz_cache.invalidate(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Token)
+def token_changed(sender, instance, **kwargs):
+    # Déconnexion ou rotation : l'ancien token ne doit plus être servi depuis le cache
+    invalidate_token(instance.key)
+
+
+# Champs dont le changement rend périmé l'utilisateur en cache d'authentification
+AUTH_FIELDS = ('is_active', 'password', 'role')
+
+
+def _auth_state(user):
+    # Lu dans __dict__ : un champ différé n'est pas chargé (et, non modifié, reste absent)
+    return tuple(user.__dict__.get(field) for field in AUTH_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def user_loaded(sender, instance, **kwargs):
+    instance._auth_state = _auth_state(instance)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Désactivation, changement de rôle ou de mot de passe : l'utilisateur en cache est périmé.
+    # Les autres enregistrements (ex. last_login à chaque connexion) ne touchent pas aux tokens.
+    state = _auth_state(instance)
+    changed = state != instance._auth_state
+    instance._auth_state = state
+    if created or (update_fields is not None and not set(update_fields) & set(AUTH_FIELDS)):
+        return
+    if changed:
+        invalidate_user_tokens(instance.pk)
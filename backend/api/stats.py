@@ -0,0 +1,97 @@
+"""
+Maintenance de l'agrégat `UserQuizStats` lu par `/api/stats/`.
+
+Les fonctions d'enregistrement doivent être appelées dans la même transaction
+que la sauvegarde des tentatives terminées.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import Greatest
+
+from .archive import archived_attempts
+from .models import Attempt, AttemptArchive, User, UserQuizStats
+
+
+def record_completed_attempts(attempts):
+    """Ajoute des tentatives terminées aux agrégats (une mise à jour par couple utilisateur/quiz)."""
+    deltas = defaultdict(lambda: {'count': 0, 'sum': 0.0, 'best': 0.0, 'last': None})
+    for attempt in attempts:
+        if attempt.user_id is None:
+            continue
+        delta = deltas[(attempt.user_id, attempt.quiz_id)]
+        delta['count'] += 1
+        delta['sum'] += attempt.score
+        delta['best'] = max(delta['best'], attempt.score)
+        if delta['last'] is None or attempt.completed_at > delta['last']:
+            delta['last'] = attempt.completed_at
+
+    for (user_id, quiz_id), delta in deltas.items():
+        _apply_delta(user_id, quiz_id, delta)
+
+
+def _apply_delta(user_id, quiz_id, delta):
+    rows = UserQuizStats.objects.filter(user_id=user_id, quiz_id=quiz_id)
+    updates = {
+        'attempt_count': F('attempt_count') + delta['count'],
+        'score_sum': F('score_sum') + delta['sum'],
+        'best_score': Greatest('best_score', Value(delta['best'])),
+        'last_attempt_at': Greatest('last_attempt_at', Value(delta['last'])),
+    }
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            UserQuizStats.objects.create(
+                user_id=user_id,
+                quiz_id=quiz_id,
+                attempt_count=delta['count'],
+                score_sum=delta['sum'],
+                best_score=delta['best'],
+                last_attempt_at=delta['last'],
+            )
+    except IntegrityError:
+        # Ligne créée entre-temps par une soumission concurrente
+        rows.update(**updates)
+
+
+@transaction.atomic
+def rebuild_user_stats():
+    """Recalcule entièrement les agrégats depuis les tentatives terminées, archives comprises."""
+    UserQuizStats.objects.all().delete()
+    rows = (
+        Attempt.objects
+        .filter(user__isnull=False, completed_at__isnull=False)
+        .order_by()
+        .values('user_id', 'quiz_id')
+        .annotate(
+            attempt_count=Count('id'),
+            score_sum=Sum('score'),
+            best_score=Max('score'),
+            last_attempt_at=Max('completed_at'),
+        )
+    )
+    stats = {(row['user_id'], row['quiz_id']): UserQuizStats(**row) for row in rows.iterator()}
+
+    archived_quizzes = AttemptArchive.objects.order_by('quiz_id').values_list('quiz_id', flat=True).distinct()
+    for quiz_id in archived_quizzes:
+        for attempt in archived_attempts(quiz_id):
+            if attempt.user_id is None:
+                continue
+            row = stats.get((attempt.user_id, quiz_id))
+            if row is None:
+                row = stats[(attempt.user_id, quiz_id)] = UserQuizStats(
+                    user_id=attempt.user_id, quiz_id=quiz_id, attempt_count=0, score_sum=0.0, best_score=0.0,
+                )
+            row.attempt_count += 1
+            row.score_sum += attempt.score
+            row.best_score = max(row.best_score, attempt.score)
+            if row.last_attempt_at is None or attempt.completed_at > row.last_attempt_at:
+                row.last_attempt_at = attempt.completed_at
+
+    # Les archives conservent l'id des utilisateurs supprimés depuis : ignorés
+    users = set(User.objects.filter(pk__in={user_id for user_id, _ in stats}).values_list('pk', flat=True))
+    stats = [row for (user_id, _), row in stats.items() if user_id in users]
+    UserQuizStats.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
@@ -1,11 +1,61 @@
 
 
 # Create your tests here.
-from django.test import TestCase
-from rest_framework.test import APITestCase
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import warnings
+import zlib
+from concurrent.futures import Future
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from logging.handlers import BufferingHandler
+from threading import Barrier, Event, Thread
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
-from .models import Quiz, Question, Attempt
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import AnswerKeyVersion, Quiz, Question, Attempt, AttemptArchive, UserQuizStats
+from .analytics import _states as analytics_states, clear_item_analyses
+from .answer_keys import clear_answer_keys
+from .authentication import clear_token_cache
+from .leaderboard import RedisLeaderboard, reset_leaderboard
+from .live import websocket_application
+from .loadtest import InProcessClient, compare_to_baseline, percentile, run_classroom
+from .log import AsyncQueueHandler, PayloadSamplingFilter
+from .metrics import registry as metrics_registry
+from .pdf import prune_cache
+from .middleware import WriteConcurrencyLimitMiddleware
+from .renderers import FastJSONParser, dumps
+from .response_cache import RenderedResponseCache, public_quiz_cache
+from .serializers import AttemptSerializer, QuestionSerializer, QuizListSerializer, QuizSerializer
+from .throttling import InMemoryBucketStore, reset_bucket_store
 
 # Récupération du modèle utilisateur personnalisé
 User = get_user_model()
@@ -108,3 +158,1637 @@ class QuizIntegrationTest(APITestCase):
 
         # Doit être interdit (403 Forbidden)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AnswerKeyCacheTest(APITestCase):
+    """
+    TEST : Le corrigé précompilé évite de relire les questions à chaque soumission.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        self.teacher = User.objects.create_user(username='teacher_key', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz Corrigé", creator=self.teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", correct_answer=f"R{i}", order=i)
+            for i in range(3)
+        ]
+
+    def submit(self, answers):
+        attempt = Attempt.objects.create(quiz=self.quiz)
+        return self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+
+    def test_grading_uses_cached_key(self):
+        answers = {str(q.id): f"R{i}" for i, q in enumerate(self.questions)}
+        self.assertEqual(self.submit(answers).data['score'], 100)
+
+        # Corrigé en cache : aucune lecture des questions
+        attempt = Attempt.objects.create(quiz=self.quiz)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+        self.assertEqual(response.data['correct_count'], 3)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "api_question"' in q['sql']])
+
+    def test_key_invalidated_when_question_changes(self):
+        answers = {str(q.id): f"R{i}" for i, q in enumerate(self.questions)}
+        self.assertEqual(self.submit(answers).data['correct_count'], 3)
+
+        question = self.questions[0]
+        question.correct_answer = "Autre"
+        question.save()
+
+        response = self.submit(answers)
+        self.assertEqual(response.data['correct_count'], 2)
+        self.assertEqual(response.data['results'][str(question.id)]['correct_answer'], "Autre")
+
+        question.delete()
+        self.assertEqual(self.submit(answers).data['total_questions'], 2)
+
+
+class QuizNestedWriteTest(APITestCase):
+    """
+    TEST : Création et mise à jour imbriquées des questions en écritures groupées.
+    """
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher_bulk', password='pwd', role='teacher')
+        self.client.force_authenticate(user=self.teacher)
+
+    def questions_payload(self, count):
+        return [
+            {'question_text': f'Question {i}', 'question_type': 'QCM', 'options': ['A', 'B'], 'correct_answer': 'A'}
+            for i in range(count)
+        ]
+
+    def test_create_uses_bulk_insert(self):
+        payload = {'title': 'Quiz groupé', 'difficulty': 'facile', 'questions': self.questions_payload(20)}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/quizzes/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Question.objects.filter(quiz_id=response.data['id']).count(), 20)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "api_question"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_update_diffs_questions(self):
+        response = self.client.post(
+            '/api/quizzes/', {'title': 'Quiz', 'questions': self.questions_payload(6)}, format='json'
+        )
+        quiz_id = response.data['id']
+        stored = list(Question.objects.filter(quiz_id=quiz_id).order_by('order'))
+
+        # On garde 5 questions (la première modifiée), on en retire une et on en ajoute une
+        questions = [
+            {'id': q.id, 'question_text': q.question_text, 'question_type': q.question_type,
+             'options': q.options, 'correct_answer': q.correct_answer}
+            for q in stored[:5]
+        ]
+        questions[0]['question_text'] = 'Modifiée'
+        questions.append({'question_text': 'Nouvelle', 'options': ['X', 'Y'], 'correct_answer': 'Y'})
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(
+                f'/api/quizzes/{quiz_id}/', {'title': 'Quiz v2', 'questions': questions}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        current = list(Question.objects.filter(quiz_id=quiz_id).order_by('order'))
+        self.assertEqual(len(current), 6)
+        self.assertEqual(current[0].id, stored[0].id)
+        self.assertEqual(current[0].question_text, 'Modifiée')
+        self.assertEqual(current[-1].question_text, 'Nouvelle')
+        self.assertFalse(Question.objects.filter(pk=stored[5].id).exists())
+        self.assertEqual(Quiz.objects.get(pk=quiz_id).title, 'Quiz v2')
+
+    def test_invalid_update_is_rejected_without_partial_write(self):
+        response = self.client.post(
+            '/api/quizzes/', {'title': 'Quiz', 'questions': self.questions_payload(5)}, format='json'
+        )
+        quiz_id = response.data['id']
+        response = self.client.put(
+            f'/api/quizzes/{quiz_id}/', {'title': 'Quiz', 'questions': self.questions_payload(2)}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Question.objects.filter(quiz_id=quiz_id).count(), 5)
+
+    def test_partial_update_rejects_incomplete_new_question(self):
+        response = self.client.post(
+            '/api/quizzes/', {'title': 'Quiz', 'questions': self.questions_payload(5)}, format='json'
+        )
+        quiz_id = response.data['id']
+        questions = [{'id': q.id} for q in Question.objects.filter(quiz_id=quiz_id).order_by('order')]
+        questions.append({'options': ['X', 'Y'], 'correct_answer': 'Y'})
+
+        response = self.client.patch(f'/api/quizzes/{quiz_id}/', {'questions': questions}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('question_text', response.data['questions'][5])
+        self.assertEqual(Question.objects.filter(quiz_id=quiz_id).count(), 5)
+
+        # Les questions existantes peuvent rester partielles
+        questions[-1]['question_text'] = 'Nouvelle'
+        response = self.client.patch(f'/api/quizzes/{quiz_id}/', {'questions': questions}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(Question.objects.filter(quiz_id=quiz_id).count(), 6)
+
+
+class UserStatsAggregateTest(APITestCase):
+    """
+    TEST : Les statistiques sont maintenues à la soumission et lues en une requête.
+    """
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher_stats', password='pwd', role='teacher')
+        self.student = User.objects.create_user(username='student_stats', password='pwd', role='student')
+        self.quiz = Quiz.objects.create(title="Quiz Stats", creator=self.teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", correct_answer="A", order=i)
+            for i in range(2)
+        ]
+
+    def submit(self, correct):
+        attempt = Attempt.objects.create(quiz=self.quiz, user=self.student)
+        answers = {str(q.id): ("A" if i < correct else "B") for i, q in enumerate(self.questions)}
+        return self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+
+    def test_stats_maintained_on_submit(self):
+        self.submit(2)
+        self.submit(1)
+
+        self.client.force_authenticate(user=self.student)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/stats/')
+        self.assertEqual(response.data['total_attempts'], 2)
+        self.assertEqual(response.data['average_score'], 75)
+        self.assertEqual(response.data['quiz_stats'], [{
+            'quiz_title': "Quiz Stats", 'attempts': 2, 'best_score': 100, 'avg_score': 75,
+        }])
+
+    def test_rebuild_command_matches_incremental_stats(self):
+        self.submit(1)
+        self.submit(0)
+        expected = list(UserQuizStats.objects.values('attempt_count', 'score_sum', 'best_score', 'last_attempt_at'))
+
+        call_command('rebuild_user_stats', stdout=StringIO())
+        rebuilt = list(UserQuizStats.objects.values('attempt_count', 'score_sum', 'best_score', 'last_attempt_at'))
+        self.assertEqual(rebuilt, expected)
+
+
+class QuizListingTest(APITestCase):
+    """
+    TEST : La liste des quiz est résumée et coûte un nombre constant de requêtes.
+    """
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher_list', password='pwd', role='teacher')
+
+    def create_quizzes(self, count):
+        for i in range(count):
+            quiz = Quiz.objects.create(title=f"Quiz {i}", creator=self.teacher)
+            Question.objects.bulk_create([
+                Question(quiz=quiz, question_text=f"Q{j}", correct_answer="A", order=j) for j in range(3)
+            ])
+
+    def test_list_has_constant_query_count(self):
+        self.create_quizzes(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/quizzes/')
+        self.create_quizzes(8)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/quizzes/')
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        results = response.data['results']
+        self.assertEqual(len(results), 10)
+        self.assertNotIn('questions', results[0])
+        self.assertEqual(results[0]['question_count'], 3)
+        self.assertEqual(results[0]['creator_username'], 'teacher_list')
+
+    def test_retrieve_includes_questions(self):
+        self.create_quizzes(1)
+        quiz = Quiz.objects.get()
+        response = self.client.get(f'/api/quizzes/{quiz.id}/')
+        self.assertEqual(len(response.data['questions']), 3)
+        self.assertEqual(response.data['question_count'], 3)
+
+
+class CursorPaginationTest(APITestCase):
+    """
+    TEST : Les listes sont paginées par curseur, sans doublon ni trou entre les pages.
+    """
+    def test_attempts_are_paginated(self):
+        teacher = User.objects.create_user(username='teacher_page', password='pwd', role='teacher')
+        student = User.objects.create_user(username='student_page', password='pwd', role='student')
+        quiz = Quiz.objects.create(title="Quiz Pages", creator=teacher)
+        created = [Attempt.objects.create(quiz=quiz, user=student).id for _ in range(5)]
+
+        self.client.force_authenticate(user=student)
+        response = self.client.get('/api/attempts/', {'page_size': 2})
+        seen = [a['id'] for a in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen += [a['id'] for a in response.data['results']]
+
+        self.assertEqual(sorted(seen), sorted(created))
+
+
+class PublicQuizCacheTest(APITestCase):
+    """
+    TEST : Le quiz public est servi depuis le cache avec ETag et 304.
+    """
+    def setUp(self):
+        public_quiz_cache.clear()
+        teacher = User.objects.create_user(username='teacher_etag', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz Public", creator=teacher)
+        self.question = Question.objects.create(quiz=self.quiz, question_text="Q", correct_answer="A")
+        self.url = f'/api/quizzes/{self.quiz.id}/public/'
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], "Quiz Public")
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_question_change_invalidates(self):
+        etag = self.client.get(self.url)['ETag']
+        self.question.question_text = "Nouvelle"
+        self.question.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['questions'][0]['question_text'], "Nouvelle")
+
+    def test_concurrent_misses_render_once(self):
+        cache = RenderedResponseCache()
+        calls = []
+
+        def render():
+            calls.append(1)
+            time.sleep(0.05)
+            return b'{}'
+
+        version = timezone.now()
+        threads = [Thread(target=cache.get_or_render, args=(1, version, render)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+
+class AttemptPdfExportTest(APITestCase):
+    """
+    TEST : Le PDF est rendu une fois (pool de processus, 202 en attendant) puis servi depuis le disque, cache élagué.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        teacher = User.objects.create_user(username='teacher_pdf', password='pwd', role='teacher')
+        quiz = Quiz.objects.create(title="Quiz PDF", creator=teacher)
+        question = Question.objects.create(quiz=quiz, question_text="Q1", correct_answer="A")
+        self.attempt = Attempt.objects.create(quiz=quiz)
+        self.client.post(f'/api/attempts/{self.attempt.id}/submit/', {'answers': {str(question.id): 'A'}}, format='json')
+        self.url = f'/api/attempts/{self.attempt.id}/export_pdf/'
+
+    def get_pdf(self):
+        for _ in range(200):
+            response = self.client.get(self.url)
+            if response.status_code != status.HTTP_202_ACCEPTED:
+                return response
+            time.sleep(0.05)
+        self.fail("PDF jamais prêt")
+
+    def test_pdf_rendered_once_and_cached(self):
+        with self.settings(PDF_CACHE_DIR=self.tmpdir):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response['Retry-After'], str(settings.PDF_RETRY_AFTER))
+            response = self.get_pdf()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+            with mock.patch('api.pdf.get_executor', side_effect=AssertionError("rendu inattendu")):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                b''.join(response.streaming_content)
+
+    def test_request_never_waits_for_render(self):
+        render = Future()
+        executor = mock.Mock()
+        executor.submit.return_value = render
+        with self.settings(PDF_CACHE_DIR=self.tmpdir, PDF_RETRY_AFTER=7), \
+                mock.patch('api.pdf.get_executor', return_value=executor):
+            # Rendu en cours : 202 immédiat, la demande suivante rejoint le même rendu
+            for _ in range(2):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+                self.assertEqual(response['Retry-After'], '7')
+            self.assertEqual(executor.submit.call_count, 1)
+
+            # Rendu en échec : journalisé, 503 à la demande suivante, puis nouveau rendu
+            with self.assertLogs('api', 'ERROR'):
+                render.set_exception(RuntimeError("ReportLab"))
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            executor.submit.return_value = Future()
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(executor.submit.call_count, 2)
+
+    def test_cache_pruned_by_age_and_size(self):
+        now = time.time()
+        for name, age_days, size in (('attempt-1-1.pdf', 40, 10), ('attempt-2-1.pdf', 2, 60),
+                                     ('attempt-3-1.pdf', 1, 60), ('attempt-4-1.pdf', 0, 60)):
+            path = os.path.join(self.tmpdir, name)
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+            os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+        with self.settings(PDF_CACHE_DIR=self.tmpdir, PDF_CACHE_MAX_AGE_DAYS=30, PDF_CACHE_MAX_BYTES=150):
+            self.assertEqual(prune_cache(force=True), 2)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['attempt-3-1.pdf', 'attempt-4-1.pdf'])
+
+    def test_pending_attempt_cannot_be_exported(self):
+        attempt = Attempt.objects.create(quiz=self.attempt.quiz)
+        response = self.client.get(f'/api/attempts/{attempt.id}/export_pdf/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StartupProfileCommandTest(TestCase):
+    """
+    TEST : Le démarrage n'importe pas les dépendances lourdes et respecte le budget.
+    """
+    def test_heavy_dependencies_are_lazy(self):
+        out = StringIO()
+        call_command('profile_startup', top=2000, budget_ms=60000, stdout=out)
+        self.assertIn('api.views', out.getvalue())
+        self.assertNotIn('reportlab', out.getvalue())
+
+    def test_budget_exceeded_fails(self):
+        with self.assertRaises(CommandError):
+            call_command('profile_startup', budget_ms=0, stdout=StringIO())
+
+
+class BatchSubmitTest(APITestCase):
+    """
+    TEST : Soumission groupée de tentatives avec un statut par élément.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        teacher = User.objects.create_user(username='teacher_batch', password='pwd', role='teacher')
+        self.student = User.objects.create_user(username='student_batch', password='pwd', role='student')
+        self.quizzes = []
+        for i in range(2):
+            quiz = Quiz.objects.create(title=f"Quiz Lot {i}", creator=teacher)
+            Question.objects.bulk_create([
+                Question(quiz=quiz, question_text=f"Q{j}", correct_answer="A", order=j) for j in range(2)
+            ])
+            self.quizzes.append(quiz)
+
+    def answers(self, quiz, correct):
+        return {str(q.id): ("A" if i < correct else "B") for i, q in enumerate(quiz.questions.all())}
+
+    def test_batch_submit(self):
+        attempts = [Attempt.objects.create(quiz=quiz, user=self.student) for quiz in self.quizzes for _ in range(3)]
+        done = Attempt.objects.create(quiz=self.quizzes[0], completed_at=timezone.now())
+        submissions = [
+            {'attempt': a.id, 'answers': self.answers(a.quiz, 1)} for a in attempts
+        ] + [
+            {'attempt': done.id, 'answers': {}},
+            {'attempt': 999999, 'answers': {}},
+            {'attempt': attempts[0].id, 'answers': {}},
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/attempts/submit_batch/', {'submissions': submissions}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "api_question"' in q['sql']]), 1)
+
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['ok'] * 6 + ['error'] * 3)
+        self.assertEqual(response.data['results'][0]['score'], 50)
+        self.assertEqual(Attempt.objects.filter(completed_at__isnull=False, score=50).count(), 6)
+        self.assertEqual(
+            sorted(UserQuizStats.objects.values_list('attempt_count', flat=True)), [3, 3]
+        )
+
+    def test_batch_ids_and_claims(self):
+        attempts = [Attempt.objects.create(quiz=self.quizzes[0], user=self.student) for _ in range(3)]
+        submissions = [
+            {'attempt': str(attempts[0].id), 'answers': self.answers(self.quizzes[0], 2)},
+            {'attempt': attempts[1].id, 'answers': self.answers(self.quizzes[0], 2)},
+            {'attempt': attempts[2].id, 'answers': self.answers(self.quizzes[0], 2)},
+            {'attempt': True, 'answers': {}},
+        ]
+        from . import views
+        real_get_answer_keys = views.get_answer_keys
+
+        def finish_elsewhere(quizzes):
+            # Soumission concurrente entre la lecture des tentatives et leur réclamation
+            Attempt.objects.filter(pk=attempts[2].id).update(completed_at=timezone.now(), score=0)
+            return real_get_answer_keys(quizzes)
+
+        with mock.patch.object(views, 'get_answer_keys', side_effect=finish_elsewhere):
+            response = self.client.post('/api/attempts/submit_batch/', {'submissions': submissions}, format='json')
+
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['ok', 'ok', 'error', 'error'])
+        self.assertEqual(results[0]['attempt'], attempts[0].id)
+        self.assertEqual(results[2]['error'], 'Cette tentative a déjà été soumise.')
+        self.assertEqual(results[3]['error'], 'Soumission invalide.')
+        self.assertIn('attempt', results[3]['details'])
+        # Forme unique pour tous les éléments en échec
+        for result in results[2:]:
+            self.assertEqual(set(result), {'attempt', 'status', 'error', 'details'})
+            self.assertIsInstance(result['error'], str)
+        self.assertEqual(Attempt.objects.get(pk=attempts[2].id).score, 0)
+        self.assertEqual(UserQuizStats.objects.get(user=self.student, quiz=self.quizzes[0]).attempt_count, 2)
+
+
+class ItemAnalysisTest(APITestCase):
+    """
+    TEST : Analyse des items calculée par NumPy et mise à jour de façon incrémentale.
+    """
+    def setUp(self):
+        clear_item_analyses()
+        self.teacher = User.objects.create_user(username='teacher_items', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz Items", creator=self.teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", options=['A', 'B', 'C'],
+                                    correct_answer='A', order=i)
+            for i in range(3)
+        ]
+        self.url = f'/api/quizzes/{self.quiz.id}/analytics/'
+
+    def submit(self, choices):
+        attempt = Attempt.objects.create(quiz=self.quiz)
+        answers = {str(q.id): choice for q, choice in zip(self.questions, choices)}
+        self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+
+    def test_item_statistics(self):
+        for choices in (['A', 'A', 'A'], ['A', 'B', 'A'], ['B', 'B', 'A'], ['C', 'B', '']):
+            self.submit(choices)
+
+        self.client.force_authenticate(user=self.teacher)
+        data = self.client.get(self.url).data
+        self.assertEqual(data['attempt_count'], 4)
+        first, second, third = data['questions']
+        self.assertEqual(first['difficulty'], 0.5)
+        self.assertEqual(third['difficulty'], 0.75)
+        self.assertEqual([o['count'] for o in first['options']], [2, 1, 1])
+        self.assertEqual(third['unanswered'], 1)
+
+        # Point-bisériale corrigée de la première question, calculée à la main
+        item = [1, 1, 0, 0]
+        rest = [2, 1, 1, 0]
+        expected = float(np.corrcoef(item, rest)[0, 1])
+        self.assertAlmostEqual(first['discrimination'], expected, places=4)
+
+        self.submit(['A', 'A', 'A'])
+        data = self.client.get(self.url).data
+        self.assertEqual(data['attempt_count'], 5)
+        self.assertEqual(data['questions'][0]['difficulty'], 0.6)
+
+    def test_late_commits_counted(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.submit(['A', 'A', 'A'])
+        self.assertEqual(self.client.get(self.url).data['attempt_count'], 1)
+        watermark = Attempt.objects.get().completed_at
+
+        # Validées après la lecture précédente mais datées avant le filigrane :
+        # dans la fenêtre de relecture, puis bien avant (recalcul complet)
+        for delay, expected in ((timedelta(seconds=5), 2), (timedelta(hours=1), 3)):
+            self.submit(['B', 'B', 'B'])
+            Attempt.objects.filter(completed_at__gt=watermark).update(completed_at=watermark - delay)
+            data = self.client.get(self.url).data
+            self.assertEqual(data['attempt_count'], expected)
+            self.assertEqual(data['questions'][0]['difficulty'], round(1 / expected, 4))
+
+    def test_unkeyed_and_deleted_attempts(self):
+        self.client.force_authenticate(user=self.teacher)
+        for choices in (['A', 'A', 'A'], ['B', 'B', 'B']):
+            self.submit(choices)
+        # Sans corrigé : lue, mais ni comptée ni traitée comme entièrement fausse
+        Attempt.objects.create(quiz=self.quiz, completed_at=timezone.now(), score=0)
+        data = self.client.get(self.url).data
+        self.assertEqual(data['attempt_count'], 2)
+        self.assertEqual(data['questions'][0]['difficulty'], 0.5)
+
+        Attempt.objects.filter(key_version__isnull=False, score=0).delete()
+        data = self.client.get(self.url).data
+        self.assertEqual(data['attempt_count'], 1)
+        self.assertEqual(data['questions'][0]['difficulty'], 1.0)
+
+    def test_only_recent_ids_kept(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.submit(['A', 'A', 'A'])
+        Attempt.objects.update(completed_at=timezone.now() - timedelta(hours=1))
+        self.submit(['B', 'B', 'B'])
+        self.assertEqual(self.client.get(self.url).data['attempt_count'], 2)
+        state = analytics_states.get(self.quiz.id)
+        self.assertEqual(list(state.recent), [Attempt.objects.latest('completed_at').id])
+
+    def test_only_creator_can_read(self):
+        other = User.objects.create_user(username='other_items', password='pwd', role='teacher')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FakeRedis:
+    """Sous-ensemble minimal de l'API redis-py (ensembles triés) pour les tests."""
+    def __init__(self):
+        self.sets = {}
+
+    def zadd(self, key, mapping, gt=False):
+        zset = self.sets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not gt or member not in zset or score > zset[member]:
+                zset[member] = float(score)
+
+    def zscore(self, key, member):
+        return self.sets.get(key, {}).get(member)
+
+    def zcount(self, key, minimum, maximum):
+        exclusive = minimum.startswith('(')
+        bound = float(minimum.lstrip('('))
+        return sum(1 for s in self.sets.get(key, {}).values() if (s > bound if exclusive else s >= bound))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        entries = sorted(self.sets.get(key, {}).items(), key=lambda e: (-e[1], e[0]))[start:end + 1]
+        return [(member.encode(), score) for member, score in entries]
+
+
+class LeaderboardTest(APITestCase):
+    """
+    TEST : Classement tenu à jour à la soumission (backends base, mémoire et Redis simulé).
+    """
+    def setUp(self):
+        reset_leaderboard()
+        self.addCleanup(reset_leaderboard)
+        teacher = User.objects.create_user(username='teacher_rank', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz Classement", creator=teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", correct_answer="A", order=i)
+            for i in range(4)
+        ]
+        self.students = [
+            User.objects.create_user(username=f'eleve{i}', password='pwd', role='student') for i in range(4)
+        ]
+        self.url = f'/api/quizzes/{self.quiz.id}/leaderboard/'
+
+    def submit(self, student, correct):
+        attempt = Attempt.objects.create(quiz=self.quiz, user=student)
+        answers = {str(q.id): ("A" if i < correct else "B") for i, q in enumerate(self.questions)}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+
+    def check_rankings(self):
+        self.submit(self.students[0], 2)
+        self.submit(self.students[1], 4)
+        self.submit(self.students[2], 2)
+        self.submit(self.students[0], 1)  # moins bon : le meilleur score est conservé
+
+        self.client.force_authenticate(user=self.students[2])
+        data = self.client.get(self.url, {'limit': 2}).data
+        self.assertEqual([(e['rank'], e['username'], e['score']) for e in data['top']],
+                         [(1, 'eleve1', 100), (2, 'eleve0', 50)])
+        self.assertEqual(data['me'], {'rank': 2, 'score': 50})
+
+        self.submit(self.students[2], 3)
+        self.assertEqual(self.client.get(self.url).data['me'], {'rank': 2, 'score': 75})
+
+        self.client.force_authenticate(user=self.students[3])
+        self.assertIsNone(self.client.get(self.url).data['me'])
+
+    def test_database_backend(self):
+        self.check_rankings()
+
+    @override_settings(LEADERBOARD_BACKEND='api.leaderboard.InMemoryLeaderboard')
+    def test_in_memory_backend(self):
+        self.check_rankings()
+
+    def test_redis_backend(self):
+        fake = FakeRedis()
+        with mock.patch('api.leaderboard.import_string', return_value=lambda: RedisLeaderboard(client=fake)):
+            self.check_rankings()
+        self.assertEqual(len(fake.sets), 1)
+
+    def test_redis_top_ranks_from_entries(self):
+        fake = FakeRedis()
+        board = RedisLeaderboard(client=fake)
+        for student, score in zip(self.students, (50, 100, 50, 25)):
+            board.record(self.quiz.id, student.id, score)
+        # Un seul ZREVRANGE, aucun ZCOUNT par entrée
+        with mock.patch.object(fake, 'zcount', side_effect=AssertionError("ZCOUNT inattendu")):
+            self.assertEqual([(rank, score) for rank, _, score in board.top(self.quiz.id)],
+                             [(1, 100), (2, 50), (2, 50), (4, 25)])
+
+    @override_settings(LEADERBOARD_BACKEND='api.leaderboard.InMemoryLeaderboard', LEADERBOARD_TTL=30)
+    def test_in_memory_board_reloaded_from_stats(self):
+        UserQuizStats.objects.create(user=self.students[3], quiz=self.quiz, attempt_count=1,
+                                     score_sum=80, best_score=80)
+        with mock.patch('api.leaderboard.monotonic', return_value=100.0):
+            self.assertEqual(self.client.get(self.url).data['top'][0]['username'], 'eleve3')
+        # Score enregistré par un autre worker : visible une fois le classement expiré
+        UserQuizStats.objects.create(user=self.students[1], quiz=self.quiz, attempt_count=1,
+                                     score_sum=90, best_score=90)
+        with mock.patch('api.leaderboard.monotonic', return_value=110.0):
+            self.assertEqual(self.client.get(self.url).data['top'][0]['username'], 'eleve3')
+        with mock.patch('api.leaderboard.monotonic', return_value=131.0):
+            self.assertEqual(self.client.get(self.url).data['top'][0]['username'], 'eleve1')
+
+    def test_board_loaded_from_stats(self):
+        UserQuizStats.objects.create(user=self.students[3], quiz=self.quiz, attempt_count=1,
+                                     score_sum=80, best_score=80)
+        data = self.client.get(self.url).data
+        self.assertEqual(data['top'][0]['username'], 'eleve3')
+
+    def test_unknown_quiz(self):
+        response = self.client.get('/api/quizzes/999999/leaderboard/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncLoggingTest(TestCase):
+    """
+    TEST : Journalisation via file d'attente (jamais bloquante), échantillonnage DEBUG et troncature.
+    """
+    def make_logger(self, queue_size=10000, **filter_kwargs):
+        target = BufferingHandler(capacity=1000)
+        handler = AsyncQueueHandler([target], queue_size=queue_size, error_timeout=0.01)
+        handler.addFilter(PayloadSamplingFilter(**filter_kwargs))
+        self.addCleanup(handler.close)
+        test_logger = logging.getLogger(f'api.test.{id(handler)}')
+        test_logger.propagate = False
+        test_logger.setLevel(logging.DEBUG)
+        test_logger.addHandler(handler)
+        return test_logger, handler, target
+
+    def test_sampling_and_truncation(self):
+        test_logger, handler, target = self.make_logger(debug_sample_rate=0, max_length=10)
+        payload = {'answers': 'x' * 100}
+        test_logger.debug("Données reçues: %s", payload)
+        test_logger.info("Données reçues: %s", payload)
+        test_logger.error("Erreur %s", 42)
+        handler.stop()
+
+        messages = [record.getMessage() for record in target.buffer]
+        self.assertEqual(len(messages), 2)
+        self.assertIn("caractères tronqués", messages[0])
+        self.assertEqual(messages[1], "Erreur 42")
+
+    def test_large_payload_never_fully_converted(self):
+        converted = []
+
+        class Item:
+            def __repr__(self):
+                converted.append(self)
+                return 'item'
+
+        test_logger, handler, target = self.make_logger(max_length=50)
+        test_logger.info("Réponses: %s", {'answers': [Item() for _ in range(10000)]})
+        handler.stop()
+        self.assertEqual(len(converted), 20)
+        self.assertIn("caractères tronqués", target.buffer[0].getMessage())
+
+    def test_message_interpolated_at_call_time(self):
+        test_logger, handler, target = self.make_logger()
+        payload = {'score': 1}
+        test_logger.info("Score %s", payload)
+        payload['score'] = 2
+        handler.stop()
+        self.assertEqual(target.buffer[0].getMessage(), "Score {'score': 1}")
+
+    def test_full_queue_never_blocks(self):
+        test_logger, handler, target = self.make_logger(queue_size=1)
+        # Thread d'écriture arrêté : la file pleine n'est plus vidée
+        handler.stop()
+        handler.queue.put_nowait(None)
+        test_logger.info("Perdu")
+        test_logger.error("Erreur %s", 42)
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual([record.getMessage() for record in target.buffer], ["Erreur 42"])
+
+
+class PerformanceInstrumentationTest(APITestCase):
+    """
+    TEST : En-tête Server-Timing par requête et histogrammes exposés sur /api/metrics/.
+    """
+    def setUp(self):
+        metrics_registry.clear()
+
+    def test_server_timing_and_metrics(self):
+        teacher = User.objects.create_user(username='teacher_metrics', password='pwd', role='teacher')
+        Quiz.objects.create(title="Quiz Mesuré", creator=teacher)
+
+        response = self.client.get('/api/quizzes/')
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'ser;dur=', 'view;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('quizmaster_request_duration_seconds_count{route="quiz-list",method="GET"} 1', body)
+        self.assertIn('quizmaster_request_db_queries_total{route="quiz-list",method="GET"}', body)
+
+    def test_metrics_restricted_by_ip(self):
+        response = self.client.get('/api/metrics/', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class LoadTestHarnessTest(TestCase):
+    """
+    TEST : Scénario de charge en processus, percentiles et détection de régression.
+    """
+    def test_classroom_scenario(self):
+        teacher = User.objects.create_user(username='teacher_load', password='pwd', role='teacher')
+        quiz = Quiz.objects.create(title="Quiz Charge", creator=teacher)
+        Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=f"Q{i}", options=['A', 'B'], correct_answer='A', order=i)
+            for i in range(3)
+        ])
+
+        report = run_classroom(lambda: InProcessClient(close_connection=False), quiz.id, students=4, concurrency=1)
+        self.assertEqual(Attempt.objects.filter(completed_at__isnull=False).count(), 4)
+        for endpoint in ('public', 'create_attempt', 'submit'):
+            self.assertEqual(report['endpoints'][endpoint]['requests'], 4)
+            self.assertEqual(report['endpoints'][endpoint]['errors'], 0)
+        self.assertEqual(report['throttled'], 0)
+        self.assertGreater(report['throughput_rps'], 0)
+
+    def test_throttled_target_rejected(self):
+        class ThrottledClient:
+            def request(self, method, path, payload=None):
+                return 429, None
+
+            def close(self):
+                pass
+
+        with mock.patch('api.management.commands.loadtest.HttpClient', return_value=ThrottledClient()):
+            with self.assertRaisesMessage(CommandError, "THROTTLE_ENABLED=0"):
+                call_command('loadtest', '--base-url', 'http://cible', '--quiz', '1', '--students', '3',
+                             '--concurrency', '1', stdout=StringIO())
+
+    def test_percentiles_and_regressions(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+
+        baseline = {'throughput_rps': 100, 'endpoints': {'submit': {'p95_ms': 10, 'p99_ms': 20, 'errors': 0}}}
+        ok = {'throughput_rps': 95, 'endpoints': {'submit': {'p95_ms': 11, 'p99_ms': 21, 'errors': 0}}}
+        slow = {'throughput_rps': 50, 'endpoints': {'submit': {'p95_ms': 30, 'p99_ms': 21, 'errors': 2}}}
+        self.assertEqual(compare_to_baseline(ok, baseline, 0.2), [])
+        self.assertEqual(len(compare_to_baseline(slow, baseline, 0.2)), 3)
+
+
+class ConcurrentSubmitTest(TransactionTestCase):
+    """
+    TEST : Des soumissions simultanées (WAL + busy_timeout) réussissent toutes ; une tentative ne compte qu'une fois.
+    """
+    def test_sqlite_profile(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0].lower(), 'wal')
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_concurrent_submits(self):
+        teacher = User.objects.create_user(username='teacher_wal', password='pwd', role='teacher')
+        student = User.objects.create_user(username='student_wal', password='pwd', role='student')
+        quiz = Quiz.objects.create(title="Quiz Concurrent", creator=teacher)
+        questions = [
+            Question.objects.create(quiz=quiz, question_text=f"Q{i}", correct_answer="A", order=i) for i in range(5)
+        ]
+        attempts = [Attempt.objects.create(quiz=quiz, user=student) for _ in range(12)]
+        answers = {str(q.id): "A" for q in questions}
+        statuses = []
+        barrier = Barrier(len(attempts))
+
+        def submit(attempt):
+            try:
+                client = APIClient()
+                barrier.wait()
+                response = client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=submit, args=(attempt,)) for attempt in attempts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [status.HTTP_200_OK] * len(attempts))
+        self.assertEqual(UserQuizStats.objects.get(user=student, quiz=quiz).attempt_count, len(attempts))
+
+    def test_double_submit_counts_once(self):
+        teacher = User.objects.create_user(username='teacher_race', password='pwd', role='teacher')
+        student = User.objects.create_user(username='student_race', password='pwd', role='student')
+        quiz = Quiz.objects.create(title="Quiz Course", creator=teacher)
+        question = Question.objects.create(quiz=quiz, question_text="Q", correct_answer="A", order=0)
+        attempt = Attempt.objects.create(quiz=quiz, user=student)
+        statuses = []
+        barrier = Barrier(2)
+
+        def submit():
+            try:
+                barrier.wait()
+                response = APIClient().post(
+                    f'/api/attempts/{attempt.id}/submit/', {'answers': {str(question.id): "A"}}, format='json'
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        # Les deux requêtes lisent la tentative encore ouverte avant l'écriture de l'autre
+        real_get = Attempt.objects.select_related('quiz').get
+        with mock.patch.object(Attempt.objects, 'select_related') as select_related:
+            def get(*args, **kwargs):
+                found = real_get(*args, **kwargs)
+                barrier.wait()
+                return found
+            select_related.return_value.get.side_effect = get
+            threads = [Thread(target=submit) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(statuses), [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST])
+        self.assertEqual(UserQuizStats.objects.get(user=student, quiz=quiz).attempt_count, 1)
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    """
+    TEST : Le token est résolu depuis le cache et invalidé à la déconnexion ou désactivation.
+    """
+    def setUp(self):
+        clear_token_cache()
+        self.user = User.objects.create_user(username='student_token', password='pwd', role='student')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_lookup(self):
+        self.assertEqual(self.client.get('/api/stats/').status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get('/api/stats/').status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in ctx.captured_queries if 'authtoken_token' in q['sql']])
+
+    def test_logout_invalidates(self):
+        self.client.get('/api/stats/')
+        self.assertEqual(self.client.post('/api/logout/').status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get('/api/stats/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get('/api/stats/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/stats/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unrelated_saves_keep_cache(self):
+        self.client.get('/api/stats/')
+        with mock.patch('api.signals.invalidate_user_tokens') as invalidate:
+            self.client.post('/api/login/', {'username': 'student_token', 'password': 'pwd'})
+            self.user.first_name = 'Alice'
+            self.user.save()
+            invalidate.assert_not_called()
+            self.user.role = 'teacher'
+            self.user.save(update_fields=['role'])
+            self.user.set_password('autre')
+            self.user.save()
+        self.assertEqual(invalidate.call_count, 2)
+
+    def test_token_expiry_and_rotation(self):
+        Token.objects.filter(pk=self.token.pk).update(created=timezone.now() - timedelta(hours=2))
+        with self.settings(AUTH_TOKEN_EXPIRY=3600):
+            self.assertEqual(self.client.get('/api/stats/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+            response = self.client.post('/api/login/', {'username': 'student_token', 'password': 'pwd'})
+            self.assertNotEqual(response.data['access'], self.token.key)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['access']}")
+            self.assertEqual(self.client.get('/api/stats/').status_code, status.HTTP_200_OK)
+
+
+class QuizSearchTest(APITestCase):
+    """
+    TEST : Recherche plein texte et filtrage par mots-clés normalisés.
+    """
+    def setUp(self):
+        teacher = User.objects.create_user(username='teacher_search', password='pwd', role='teacher')
+        self.python = Quiz.objects.create(
+            title='Bases de Python', description='Variables et boucles', tags='Python, Débutant',
+            creator=teacher,
+        )
+        self.histoire = Quiz.objects.create(
+            title='Révolution française', description='Événements de 1789', tags='histoire',
+            difficulty='difficile', creator=teacher,
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/quizzes/search/' + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [quiz['id'] for quiz in response.data['results']]
+
+    def test_tags_normalized(self):
+        self.assertEqual(sorted(self.python.tag_set.values_list('name', flat=True)), ['débutant', 'python'])
+        self.python.tags = 'python'
+        self.python.save()
+        self.assertEqual(list(self.python.tag_set.values_list('name', flat=True)), ['python'])
+
+    def test_full_text(self):
+        self.assertEqual(self.search('?q=boucle'), [self.python.id])
+        self.assertEqual(self.search('?q=revolution'), [self.histoire.id])
+        self.assertEqual(self.search('?q=AND "'), [])
+
+    def test_index_follows_updates(self):
+        self.histoire.title = 'Révolution industrielle'
+        self.histoire.save()
+        self.assertEqual(self.search('?q=industrielle'), [self.histoire.id])
+        self.histoire.delete()
+        self.assertEqual(self.search('?q=revolution'), [])
+
+    def test_filters(self):
+        self.assertEqual(self.search('?tag=PYTHON'), [self.python.id])
+        self.assertEqual(self.search('?difficulty=difficile'), [self.histoire.id])
+        self.assertEqual(self.search('?q=python&difficulty=difficile'), [])
+
+
+class CompactAttemptEncodingTest(APITestCase):
+    """
+    TEST : Les résultats sont stockés sous forme compacte et reconstruits à la lecture.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        teacher = User.objects.create_user(username='teacher_compact', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz Compact", creator=teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", options=['A', 'B', 'C'],
+                                    correct_answer='A', order=i)
+            for i in range(3)
+        ]
+
+    def submit(self, answers):
+        attempt = Attempt.objects.create(quiz=self.quiz)
+        response = self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return attempt.id, response.data['results']
+
+    def test_round_trip(self):
+        q0, q1, q2 = (str(q.id) for q in self.questions)
+        attempt_id, results = self.submit({q0: 'A', q1: 'libre'})
+
+        attempt = Attempt.objects.get(pk=attempt_id)
+        self.assertEqual(bytes(attempt.choices), b'\x01\xff\x00')
+        self.assertEqual(bytes(attempt.correct_bits), b'\x01')
+        self.assertEqual(attempt.other_answers, {'1': 'libre'})
+        self.assertEqual(results[q1], {'user_answer': 'libre', 'correct_answer': 'A', 'is_correct': False})
+        self.assertEqual(self.client.get(f'/api/attempts/{attempt_id}/').data['answers'], results)
+
+    def test_key_version_shared_and_frozen(self):
+        first, results = self.submit({str(self.questions[0].id): 'A'})
+        second, _ = self.submit({})
+        self.assertEqual(AnswerKeyVersion.objects.filter(quiz=self.quiz).count(), 1)
+
+        # Un changement de corrigé ne modifie pas les tentatives déjà corrigées
+        self.questions[0].correct_answer = 'B'
+        self.questions[0].save()
+        self.submit({})
+        self.assertEqual(AnswerKeyVersion.objects.filter(quiz=self.quiz).count(), 2)
+        clear_answer_keys()
+        self.assertEqual(self.client.get(f'/api/attempts/{first}/').data['answers'], results)
+
+
+class LiveSessionTest(TestCase):
+    """
+    TEST : Session en direct par WebSocket, comptes de réponses diffusés par lots, réponses conservées à la déconnexion.
+    """
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher_live', password='pwd', role='teacher')
+        self.token = Token.objects.create(user=self.teacher)
+        self.quiz = Quiz.objects.create(title="Quiz Direct", creator=self.teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", options=['A', 'B'],
+                                    correct_answer='B', order=i)
+            for i in range(2)
+        ]
+
+    async def connect(self, token=None):
+        query = f'token={token}'.encode() if token else b''
+        client = ApplicationCommunicator(websocket_application, {
+            'type': 'websocket', 'path': f'/ws/live/{self.quiz.id}/', 'query_string': query,
+        })
+        await client.send_input({'type': 'websocket.connect'})
+        return client
+
+    async def receive(self, client, kind):
+        while True:
+            message = await client.receive_output(timeout=2)
+            if message['type'] == 'websocket.close':
+                return message
+            data = json.loads(message['text'])
+            if data['type'] == kind:
+                return data
+
+    async def send(self, client, **data):
+        await client.send_input({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def test_live_session(self):
+        with self.settings(LIVE_TICK_INTERVAL=0.01):
+            rejected = await self.connect('invalide')
+            self.assertEqual((await rejected.receive_output(timeout=2))['code'], 4401)
+
+            teacher = await self.connect(self.token.key)
+            self.assertEqual((await teacher.receive_output(timeout=2))['type'], 'websocket.accept')
+            self.assertEqual((await self.receive(teacher, 'state'))['role'], 'teacher')
+            students = [await self.connect() for _ in range(2)]
+            for student in students:
+                await student.receive_output(timeout=2)
+                self.assertEqual((await self.receive(student, 'state'))['role'], 'student')
+
+            question_id = self.questions[0].id
+            await self.send(teacher, type='question', question=question_id)
+            for student in students:
+                self.assertEqual((await self.receive(student, 'question'))['question']['id'], question_id)
+
+            await self.send(students[0], type='answer', question=question_id, answer='A')
+            await self.send(students[1], type='answer', question=question_id, answer='B')
+            await self.send(students[0], type='answer', question=question_id, answer='B')
+            await self.send(students[1], type='answer', question=question_id, answer='Z')
+            self.assertEqual((await self.receive(students[1], 'error'))['error'], 'Réponse refusée')
+            await self.send(students[1], type='end')
+            self.assertEqual((await self.receive(students[1], 'error'))['error'], 'Action non autorisée')
+
+            counts = await self.receive(teacher, 'counts')
+            while counts['answered'] < 2 or counts['counts'] != {'B': 2}:
+                counts = await self.receive(teacher, 'counts')
+            self.assertEqual(counts['participants'], 3)
+
+            await self.send(teacher, type='end')
+            for client in [teacher] + students:
+                self.assertEqual((await self.receive(client, 'end'))['attempts'], 2)
+                self.assertEqual((await client.receive_output(timeout=2))['type'], 'websocket.close')
+                await client.send_input({'type': 'websocket.disconnect', 'code': 1000})
+                await client.wait(timeout=2)
+
+        scores = await sync_to_async(list)(
+            Attempt.objects.filter(quiz=self.quiz, completed_at__isnull=False).values_list('score', flat=True)
+        )
+        self.assertEqual(scores, [50, 50])
+
+    async def disconnect(self, client):
+        await client.send_input({'type': 'websocket.disconnect', 'code': 1001})
+        await client.wait(timeout=2)
+
+    async def test_answers_saved_after_last_disconnect(self):
+        question_id = self.questions[0].id
+        with self.settings(LIVE_TICK_INTERVAL=0.01, LIVE_GRACE_PERIOD=0.2):
+            teacher = await self.connect(self.token.key)
+            await teacher.receive_output(timeout=2)
+            await self.receive(teacher, 'state')
+            student = await self.connect()
+            await student.receive_output(timeout=2)
+            await self.receive(student, 'state')
+            await self.send(teacher, type='question', question=question_id)
+            await self.receive(student, 'question')
+            await self.send(student, type='answer', question=question_id, answer='B')
+            await self.receive(teacher, 'counts')
+            await self.disconnect(student)
+            await self.disconnect(teacher)
+
+            # Reconnexion pendant le délai de grâce : même session, question courante conservée
+            teacher = await self.connect(self.token.key)
+            await teacher.receive_output(timeout=2)
+            self.assertEqual((await self.receive(teacher, 'state'))['question']['id'], question_id)
+            await self.disconnect(teacher)
+
+            completed = Attempt.objects.filter(quiz=self.quiz, completed_at__isnull=False)
+            for _ in range(100):
+                if await completed.aexists():
+                    break
+                await asyncio.sleep(0.02)
+        self.assertEqual([attempt.score async for attempt in completed], [50])
+
+    async def test_connection_cap_and_failed_save_logged(self):
+        question_id = self.questions[0].id
+        with self.settings(LIVE_TICK_INTERVAL=0.01, LIVE_GRACE_PERIOD=0.05, LIVE_MAX_CONNECTIONS=1):
+            student = await self.connect()
+            await student.receive_output(timeout=2)
+            refused = await self.connect()
+            self.assertEqual((await refused.receive_output(timeout=2))['code'], 4429)
+            teacher = await self.connect(self.token.key)
+            self.assertEqual((await teacher.receive_output(timeout=2))['type'], 'websocket.accept')
+
+            await self.send(teacher, type='question', question=question_id)
+            await self.receive(student, 'question')
+            await self.send(student, type='answer', question=question_id, answer='B')
+            await self.receive(teacher, 'counts')
+            with mock.patch('api.live.LiveSession.persist', side_effect=RuntimeError("base indisponible")), \
+                    self.assertLogs('api', 'ERROR') as logs:
+                await self.disconnect(student)
+                await self.disconnect(teacher)
+                for _ in range(100):
+                    if logs.records:
+                        break
+                    await asyncio.sleep(0.02)
+        self.assertIn("non enregistrées", logs.records[0].getMessage())
+
+
+class AttemptExportTest(APITestCase):
+    """
+    TEST : Export en flux (CSV / NDJSON) des tentatives d'un quiz, réservé au créateur.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        self.teacher = User.objects.create_user(username='teacher_export', password='pwd', role='teacher')
+        self.student = User.objects.create_user(username='student_export', password='pwd', role='student')
+        self.quiz = Quiz.objects.create(title="Quiz Export", creator=self.teacher)
+        self.question = Question.objects.create(quiz=self.quiz, question_text="Q", options=['A', 'B'],
+                                                correct_answer='A')
+        for answer in ('A', 'B'):
+            attempt = Attempt.objects.create(quiz=self.quiz, user=self.student)
+            self.client.post(f'/api/attempts/{attempt.id}/submit/',
+                             {'answers': {str(self.question.id): answer}}, format='json')
+        Attempt.objects.create(quiz=self.quiz)
+        self.url = f'/api/quizzes/{self.quiz.id}/export_attempts/'
+
+    def test_csv(self):
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['correct_count'] for row in rows], ['1', '0', '0'])
+        self.assertEqual(rows[0]['username'], 'student_export')
+        self.assertEqual(json.loads(rows[1]['answers']), {str(self.question.id): 'B'})
+
+    def test_ndjson(self):
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.get(self.url + '?output=ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['score'] for row in rows], [100, 0, 0])
+        self.assertEqual(rows[0]['answers'][str(self.question.id)]['is_correct'], True)
+        self.assertEqual(rows[2]['username'], None)
+
+    def test_creator_only(self):
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.teacher)
+        self.assertEqual(self.client.get(self.url + '?output=xml').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttemptExportAsgiTest(TransactionTestCase):
+    """
+    TEST : Sous le gestionnaire ASGI, l'export est envoyé bloc par bloc sans être mis en mémoire.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        self.teacher = User.objects.create_user(username='teacher_export_asgi', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz Export ASGI", creator=self.teacher)
+        question = Question.objects.create(quiz=self.quiz, question_text="Q", options=['A', 'B'], correct_answer='A')
+        for answer in ('A', 'B', 'B'):
+            attempt = Attempt.objects.create(quiz=self.quiz)
+            APIClient().post(f'/api/attempts/{attempt.id}/submit/',
+                             {'answers': {str(question.id): answer}}, format='json')
+        self.token = Token.objects.create(user=self.teacher)
+
+    @override_settings(EXPORT_BATCH_ROWS=1)
+    async def test_asgi_streams_chunks(self):
+        client = ApplicationCommunicator(ASGIHandler(), {
+            'type': 'http', 'method': 'GET', 'path': f'/api/quizzes/{self.quiz.id}/export_attempts/',
+            'query_string': b'output=ndjson', 'headers': [(b'authorization', f'Token {self.token.key}'.encode())],
+        })
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            await client.send_input({'type': 'http.request'})
+            start = await client.receive_output(timeout=5)
+            chunks = []
+            while True:
+                message = await client.receive_output(timeout=5)
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        # Itérateur async : pas de repli « consume synchronous iterators » (tout en mémoire)
+        self.assertFalse([w for w in caught if 'synchronous iterators' in str(w.message)])
+        self.assertEqual(len([chunk for chunk in chunks if chunk]), 3)
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual([row['score'] for row in rows], [100, 0, 0])
+
+
+class QuizImportTest(APITestCase):
+    """
+    TEST : Import en flux d'une banque de quiz, validée par lots avec erreurs par quiz.
+    """
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher_import', password='pwd', role='teacher')
+        self.client.force_authenticate(user=self.teacher)
+
+    def bank_quiz(self, title, count=5):
+        return {
+            'title': title, 'tags': 'Import, Banque', 'difficulty': 'facile',
+            'questions': [
+                {'question_text': f"{title} Q{i}", 'options': ['A', 'B'], 'correct_answer': 'A'} for i in range(count)
+            ],
+        }
+
+    def post(self, body):
+        return self.client.post('/api/quizzes/import_json/', body, content_type='application/json')
+
+    def test_bank_in_batches(self):
+        bank = [self.bank_quiz(f"Quiz {i}") for i in range(5)] + [self.bank_quiz("Trop court", 2), "pas un quiz"]
+        with self.settings(IMPORT_BATCH_SIZE=2, IMPORT_READ_SIZE=64):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.post(json.dumps({'quizzes': bank}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (5, 2))
+        self.assertEqual([error['index'] for error in response.data['errors']], [5, 6])
+        self.assertIn('questions', response.data['errors'][0]['errors'])
+
+        # Insertions groupées : une requête de quiz par lot (3 lots), jamais une par question
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "api_question"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Question.objects.filter(quiz__creator=self.teacher).count(), 25)
+        quiz = Quiz.objects.get(title="Quiz 3")
+        self.assertEqual(sorted(quiz.tag_set.values_list('name', flat=True)), ['banque', 'import'])
+
+    def test_single_quiz_and_multipart(self):
+        self.assertEqual(self.post(json.dumps(self.bank_quiz("Seul"))).data['created'], 1)
+        upload = SimpleUploadedFile('banque.json', json.dumps([self.bank_quiz("Fichier")]).encode())
+        response = self.client.post('/api/quizzes/import_json/', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+
+    def test_malformed_document(self):
+        body = '[' + json.dumps(self.bank_quiz("Valide")) + ', {"title": '
+        response = self.post(body)
+        self.assertEqual(response.data['created'], 1)
+        self.assertIn('JSON invalide', response.data['error'])
+
+    def test_teacher_only(self):
+        student = User.objects.create_user(username='student_import', password='pwd', role='student')
+        self.client.force_authenticate(user=student)
+        self.assertEqual(self.post('[]').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AsyncReadViewsTest(TestCase):
+    """
+    TEST : Sous ASGI, les lectures fréquentes passent par les vues async et répondent comme DRF.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        public_quiz_cache.clear()
+        metrics_registry.clear()
+        teacher = User.objects.create_user(username='teacher_async', password='pwd', role='teacher')
+        self.student = User.objects.create_user(username='student_async', password='pwd', role='student')
+        self.token = Token.objects.create(user=self.student)
+        self.quiz = Quiz.objects.create(title="Quiz Async", creator=teacher)
+        question = Question.objects.create(quiz=self.quiz, question_text="Q", options=['A', 'B'], correct_answer='A')
+        self.attempt = Attempt.objects.create(quiz=self.quiz, user=self.student)
+        self.client.post(f'/api/attempts/{self.attempt.id}/submit/',
+                         {'answers': {str(question.id): 'A'}}, content_type='application/json')
+
+    async def test_same_responses(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        paths = [f'/api/quizzes/{self.quiz.id}/public/', f'/api/attempts/{self.attempt.id}/', '/api/stats/']
+        for path in paths:
+            expected = await sync_to_async(self.client.get)(path, headers=headers)
+            response = await self.async_client.get(path, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+        routes = metrics_registry.render()
+        for name in ('quiz-public-async', 'attempt-detail-async', 'user_stats-async'):
+            self.assertIn(f'route="{name}"', routes)
+
+    async def test_same_error_responses(self):
+        cases = [
+            ('/api/attempts/999999/', {}),
+            (f'/api/attempts/{self.attempt.id}/', {'Authorization': 'Token invalide'}),
+        ]
+        for path, headers in cases:
+            expected = await sync_to_async(self.client.get)(path, headers=headers)
+            response = await self.async_client.get(path, headers=headers)
+            self.assertEqual(response.status_code, expected.status_code)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+            self.assertEqual(response.get('WWW-Authenticate'), expected.get('WWW-Authenticate'))
+
+    async def test_errors_and_fallback(self):
+        self.assertEqual((await self.async_client.get('/api/stats/')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get('/api/stats/', headers={'Authorization': 'Token invalide'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual((await self.async_client.get('/api/quizzes/999999/public/')).status_code, 404)
+
+        etag = (await self.async_client.get(f'/api/quizzes/{self.quiz.id}/public/'))['ETag']
+        response = await self.async_client.get(f'/api/quizzes/{self.quiz.id}/public/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Écritures : toujours servies par la vue DRF
+        response = await self.async_client.delete(f'/api/attempts/{self.attempt.id}/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class FastJSONAndCompressionTest(APITestCase):
+    """
+    TEST : JSON rapide identique à DRF, chemins rapides des sérialiseurs et compression des réponses.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        public_quiz_cache.clear()
+        self.teacher = User.objects.create_user(username='teacher_fast', password='pwd', role='teacher')
+        self.quiz = Quiz.objects.create(title="Quiz rapide é\u2028", description="D" * 400, creator=self.teacher)
+        questions = Question.objects.bulk_create([
+            Question(quiz=self.quiz, question_text=f"Question {idx} ?", options=['A', 'B', 'C'],
+                     correct_answer='A', order=idx)
+            for idx in range(5)
+        ])
+        self.attempt = Attempt.objects.create(quiz=self.quiz, user=self.teacher)
+        self.client.post(f'/api/attempts/{self.attempt.id}/submit/',
+                         {'answers': {str(questions[0].id): 'A', str(questions[1].id): 'Z'}}, format='json')
+        self.url = f'/api/quizzes/{self.quiz.id}/public/'
+
+    def test_renderer_matches_drf(self):
+        data = {'texte': "é\u2028\u2029", 'date': timezone.now(), 'prix': Decimal('1.50'), 1: [1.5, None, True],
+                'tableau': np.array([1, 2]), 'entier': np.int64(3)}
+        self.assertEqual(dumps(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONParser().parse(BytesIO('{"a": ["é", 1]}'.encode())), {'a': ['é', 1]})
+        response = self.client.post('/api/register/', b'{"username": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fast_serializers_match_fields(self):
+        quiz = Quiz.objects.select_related('creator').prefetch_related('questions').get(pk=self.quiz.pk)
+        listed = Quiz.objects.select_related('creator').annotate(question_count=Count('questions')).get(pk=self.quiz.pk)
+        attempt = Attempt.objects.select_related('quiz', 'user').get(pk=self.attempt.pk)
+        anonymous = Attempt.objects.create(quiz=self.quiz)
+        cases = [
+            (QuestionSerializer(), quiz.questions.all()[0]),
+            (QuizSerializer(), quiz),
+            (QuizListSerializer(), listed),
+            (AttemptSerializer(), attempt),
+            (AttemptSerializer(), anonymous),
+        ]
+        for serializer, instance in cases:
+            self.assertEqual(serializer.to_representation(instance),
+                             ModelSerializer.to_representation(serializer, instance))
+
+    def test_gzip_and_weak_etag(self):
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+        # L'ETag rendu faible par la compression reste reconnu
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Sous le seuil : réponse laissée telle quelle
+        small = self.client.get('/api/quizzes/999999/public/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_brotli_preferred_when_available(self):
+        fake_brotli = SimpleNamespace(compress=lambda data, quality: zlib.compress(data))
+        with mock.patch('api.middleware.brotli', fake_brotli):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(zlib.decompress(response.content))['title'], self.quiz.title)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_with_padding_when_authenticated(self):
+        fake_brotli = SimpleNamespace(compress=lambda data, quality: zlib.compress(data))
+        token = Token.objects.create(user=self.teacher)
+        with mock.patch('api.middleware.brotli', fake_brotli):
+            sizes = set()
+            for _ in range(5):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br',
+                                           HTTP_AUTHORIZATION=f'Token {token.key}')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(json.loads(gzip.decompress(response.content))['title'], self.quiz.title)
+                sizes.add(len(response.content))
+        # Bourrage aléatoire (BREACH) : la taille varie d'une réponse à l'autre
+        self.assertGreater(len(sizes), 1)
+
+
+class AttemptRetentionTest(APITestCase):
+    """
+    TEST : Purge des tentatives abandonnées et archivage compressé toujours lu par analyses, exports et stats.
+    """
+    def setUp(self):
+        clear_answer_keys()
+        clear_item_analyses()
+        self.teacher = User.objects.create_user(username='teacher_retention', password='pwd', role='teacher')
+        self.student = User.objects.create_user(username='student_retention', password='pwd', role='student')
+        self.quiz = Quiz.objects.create(title="Quiz Rétention", creator=self.teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f"Q{i}", options=['A', 'B', 'C'],
+                                    correct_answer='A', order=i)
+            for i in range(3)
+        ]
+        old = timezone.now() - timedelta(days=400)
+        for choices in (['A', 'A', 'A'], ['A', 'B', 'libre'], ['B', 'B', '']):
+            attempt = self.submit(choices)
+            Attempt.objects.filter(pk=attempt.pk).update(started_at=old, completed_at=old + timedelta(minutes=5))
+        self.recent = self.submit(['A', 'C', 'A'])
+        self.abandoned = Attempt.objects.create(quiz=self.quiz)
+        Attempt.objects.filter(pk=self.abandoned.pk).update(started_at=timezone.now() - timedelta(hours=30))
+        self.in_progress = Attempt.objects.create(quiz=self.quiz)
+
+    def submit(self, choices):
+        attempt = Attempt.objects.create(quiz=self.quiz, user=self.student)
+        answers = {str(q.id): choice for q, choice in zip(self.questions, choices)}
+        self.client.post(f'/api/attempts/{attempt.id}/submit/', {'answers': answers}, format='json')
+        return attempt
+
+    maxDiff = None
+
+    def snapshot(self):
+        clear_item_analyses()
+        self.client.force_authenticate(user=self.teacher)
+        analytics = self.client.get(f'/api/quizzes/{self.quiz.id}/analytics/').data
+        export = b''.join(self.client.get(
+            f'/api/quizzes/{self.quiz.id}/export_attempts/?output=ndjson'
+        ).streaming_content).decode()
+        rows = sorted((json.loads(line) for line in export.splitlines()), key=lambda row: row['attempt_id'])
+        # La tentative abandonnée est purgée : seules les autres doivent rester identiques
+        rows = [row for row in rows if row['attempt_id'] != self.abandoned.pk]
+        call_command('rebuild_user_stats', stdout=StringIO())
+        count, score_sum, best, last = UserQuizStats.objects.values_list(
+            'attempt_count', 'score_sum', 'best_score', 'last_attempt_at').get()
+        # Somme flottante : l'ordre d'addition diffère entre SQL et archives
+        return analytics, rows, (count, round(score_sum, 6), best, last)
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('apply_retention', '--dry-run', stdout=out)
+        self.assertIn("1 tentatives abandonnées", out.getvalue())
+        self.assertIn("3 tentatives terminées", out.getvalue())
+        self.assertEqual(Attempt.objects.count(), 6)
+
+    def test_purge_and_archive(self):
+        before = self.snapshot()
+        call_command('apply_retention', '--batch-size', '2', stdout=StringIO())
+
+        remaining = set(Attempt.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {self.recent.pk, self.in_progress.pk})
+        archives = AttemptArchive.objects.all()
+        self.assertEqual(sum(archive.attempt_count for archive in archives), 3)
+        self.assertEqual(self.snapshot(), before)
+
+        # Relancer la rétention ne change plus rien
+        call_command('apply_retention', stdout=StringIO())
+        self.assertEqual(AttemptArchive.objects.count(), len(archives))
+        self.assertEqual(self.snapshot(), before)
+
+    def test_cached_pdfs_removed(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        archived = Attempt.objects.filter(completed_at__lt=timezone.now() - timedelta(days=1)).first()
+        names = [f'attempt-{archived.pk}-1.pdf', f'attempt-{self.recent.pk}-1.pdf', 'autre.pdf']
+        for name in names:
+            open(os.path.join(tmpdir, name), 'wb').close()
+        with self.settings(PDF_CACHE_DIR=tmpdir):
+            call_command('apply_retention', stdout=StringIO())
+        self.assertEqual(sorted(os.listdir(tmpdir)), sorted(names[1:]))
+
+    def test_archive_read_once_by_cached_analysis(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = f'/api/quizzes/{self.quiz.id}/analytics/'
+        self.assertEqual(self.client.get(url).data['attempt_count'], 4)
+        # L'état en cache a déjà intégré les tentatives archivées ensuite
+        call_command('apply_retention', stdout=StringIO())
+        self.submit(['A', 'A', 'A'])
+        self.assertEqual(self.client.get(url).data['attempt_count'], 5)
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=dict(
+        settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates,
+    )))
+
+
+class AdmissionControlTest(TestCase):
+    """
+    TEST : Seaux à jetons par IP / utilisateur (429 + Retry-After) et limite d'écritures simultanées.
+    """
+    def setUp(self):
+        reset_bucket_store()
+        self.addCleanup(reset_bucket_store)
+        teacher = User.objects.create_user(username='teacher_throttle', password='pwd', role='teacher')
+        self.student = User.objects.create_user(username='student_throttle', password='pwd', role='student')
+        self.quiz = Quiz.objects.create(title="Quiz Limité", creator=teacher)
+
+    def test_token_bucket_refill(self):
+        store = InMemoryBucketStore()
+        with mock.patch('api.throttling.monotonic', return_value=100.0):
+            self.assertEqual(store.consume('k', 2, 1.0), 0)
+            self.assertEqual(store.consume('k', 2, 1.0), 0)
+            self.assertEqual(store.consume('k', 2, 1.0), 1.0)
+        with mock.patch('api.throttling.monotonic', return_value=100.5):
+            self.assertEqual(store.consume('k', 2, 1.0), 0.5)
+        with mock.patch('api.throttling.monotonic', return_value=101.0):
+            self.assertEqual(store.consume('k', 2, 1.0), 0)
+
+    @throttle_rates(attempts_anon='2/min', attempts_user='3/min')
+    def test_attempt_throttles_per_ip_and_user(self):
+        url = '/api/attempts/'
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'quiz': self.quiz.id}).status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, {'quiz': self.quiz.id})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+        # Autre IP : seau distinct ; utilisateur connecté : seau à son nom, même derrière l'IP saturée
+        response = self.client.post(url, {'quiz': self.quiz.id}, REMOTE_ADDR='198.51.100.4')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        token = Token.objects.create(user=self.student)
+        headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        statuses = [self.client.post(url, {'quiz': self.quiz.id}, **headers).status_code for _ in range(4)]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+
+    @throttle_rates(attempts_anon='1/min')
+    def test_forwarded_for_not_trusted(self):
+        url = '/api/attempts/'
+        self.assertEqual(self.client.post(url, {'quiz': self.quiz.id}).status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, {'quiz': self.quiz.id}, HTTP_X_FORWARDED_FOR='203.0.113.9')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(auth='2/min')
+    def test_register_and_login_throttled(self):
+        payload = {'username': 'student_throttle', 'password': 'pwd'}
+        self.assertEqual(self.client.post('/api/login/', payload).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post('/api/register/', {}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/login/', payload)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    @throttle_rates(attempts_anon='1/min')
+    async def test_async_attempt_detail_throttled(self):
+        attempt = await Attempt.objects.acreate(quiz=self.quiz)
+        self.assertEqual((await self.async_client.get(f'/api/attempts/{attempt.id}/')).status_code, 200)
+        response = await self.async_client.get(f'/api/attempts/{attempt.id}/')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=1, WRITE_CONCURRENCY_WAIT=0.05, WRITE_RETRY_AFTER=2)
+    def test_write_concurrency_limit(self):
+        started, release = Event(), Event()
+
+        def slow_view(request):
+            if request.method == 'POST':
+                started.set()
+                release.wait(5)
+            return HttpResponse('ok')
+
+        middleware = WriteConcurrencyLimitMiddleware(slow_view)
+        factory = RequestFactory()
+        first = Thread(target=middleware, args=(factory.post('/api/attempts/'),))
+        first.start()
+        started.wait(5)
+        try:
+            response = middleware(factory.post('/api/attempts/'))
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '2')
+            # Les lectures ne sont pas limitées
+            self.assertEqual(middleware(factory.get('/api/attempts/')).status_code, 200)
+        finally:
+            release.set()
+            first.join()
+        self.assertEqual(middleware(factory.post('/api/attempts/')).status_code, 200)
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=1, WRITE_CONCURRENCY_WAIT=0.5)
+    async def test_async_write_concurrency_limit(self):
+        release = asyncio.Event()
+
+        async def slow_view(request):
+            if request.path == '/lente/':
+                await release.wait()
+            return HttpResponse('ok')
+
+        middleware = WriteConcurrencyLimitMiddleware(slow_view)
+        factory = RequestFactory()
+        first = asyncio.ensure_future(middleware(factory.post('/lente/')))
+        await asyncio.sleep(0)
+        # Place rendue pendant l'attente : la requête suivante passe sans attendre le délai
+        waiting = asyncio.ensure_future(middleware(factory.post('/rapide/')))
+        await asyncio.sleep(0.01)
+        release.set()
+        self.assertEqual((await first).status_code, 200)
+        self.assertEqual((await waiting).status_code, 200)
+
+        with self.settings(WRITE_CONCURRENCY_WAIT=0.01):
+            release.clear()
+            blocked = WriteConcurrencyLimitMiddleware(slow_view)
+            first = asyncio.ensure_future(blocked(factory.post('/lente/')))
+            await asyncio.sleep(0)
+            self.assertEqual((await blocked(factory.post('/rapide/'))).status_code, 429)
+            release.set()
+            await first
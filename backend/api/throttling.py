@@ -0,0 +1,158 @@
+"""
+Limitation de débit par seau à jetons (token bucket).
+
+Chaque identité (IP ou utilisateur) dispose d'un seau de `n` jetons, rechargé
+à `n` jetons par période : un taux « 60/min » autorise une rafale de 60
+requêtes puis une par seconde. Les taux sont ceux de DRF
+(`REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`) ; une requête refusée reçoit un 429
+avec `Retry-After`.
+
+Les seaux sont conservés en mémoire (par processus) ou dans Redis pour les
+partager entre workers : `THROTTLE_BACKEND`.
+"""
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .caching import LRUCache
+
+
+class InMemoryBucketStore:
+    def __init__(self, maxsize=None, lock_stripes=64):
+        self._buckets = LRUCache(maxsize=maxsize or getattr(settings, 'THROTTLE_CACHE_SIZE', 100000))
+        self._locks = [Lock() for _ in range(lock_stripes)]
+
+    def consume(self, key, capacity, refill_rate):
+        """Prend un jeton ; retourne 0 si la requête passe, sinon l'attente (s) avant le prochain jeton."""
+        with self._locks[hash(key) % len(self._locks)]:
+            now = monotonic()
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                self._buckets.set(key, (tokens - 1, now))
+                return 0.0
+            self._buckets.set(key, (tokens, now))
+            return (1 - tokens) / refill_rate
+
+    def clear(self):
+        self._buckets.clear()
+
+
+CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Nécessite le paquet `redis` (optionnel). Seaux partagés entre workers, mis à jour par un script Lua atomique."""
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(getattr(settings, 'THROTTLE_REDIS_URL', 'redis://localhost:6379/0'))
+        self.client = client
+        self._consume = client.register_script(CONSUME_SCRIPT)
+
+    def consume(self, key, capacity, refill_rate):
+        return float(self._consume(keys=[f"quizmaster:{key}"], args=[capacity, refill_rate]))
+
+    def clear(self):
+        for key in self.client.scan_iter('quizmaster:throttle_*'):
+            self.client.delete(key)
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_bucket_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = getattr(settings, 'THROTTLE_BACKEND', 'api.throttling.InMemoryBucketStore')
+            _store = import_string(backend)()
+        return _store
+
+
+def reset_bucket_store():
+    global _store
+    with _store_lock:
+        _store = None
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    def get_rate(self):
+        # Lu à chaque instanciation (et non à l'import) : les taux suivent les réglages courants
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        return self.consume(self.key)
+
+    def consume(self, key):
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        self.retry_after = get_bucket_store().consume(key, self.num_requests, self.num_requests / self.duration)
+        return self.retry_after == 0
+
+    def wait(self):
+        return getattr(self, 'retry_after', None)
+
+    def ident_key(self, ident):
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AnonAttemptThrottle(TokenBucketThrottle):
+    """Tentatives (création, lecture, soumission) des visiteurs anonymes, par IP."""
+    scope = 'attempts_anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.ident_key(self.get_ident(request))
+
+
+class UserAttemptThrottle(TokenBucketThrottle):
+    """Tentatives des utilisateurs connectés, par utilisateur (indépendant de l'IP partagée d'une classe)."""
+    scope = 'attempts_user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.ident_key(request.user.pk)
+        return None
+
+
+class AuthThrottle(TokenBucketThrottle):
+    """Inscription et connexion, par IP."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.ident_key(self.get_ident(request))
+
+
+ATTEMPT_THROTTLES = [AnonAttemptThrottle, UserAttemptThrottle]
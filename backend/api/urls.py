@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     register, QuizViewSet, QuestionViewSet, 
-    AttemptViewSet, user_stats, CustomAuthToken
+    AttemptViewSet, user_stats, CustomAuthToken, metrics, logout
 )
 
 
@@ -14,6 +14,8 @@ router.register(r'attempts', AttemptViewSet, basename='attempt')
 urlpatterns = [
     path('register/', register, name='register'),
     path('login/', CustomAuthToken.as_view(), name='api_login'),  # Vue personnalisée login JWT
+    path('logout/', logout, name='api_logout'),
     path('stats/', user_stats, name='user_stats'),
+    path('metrics/', metrics, name='metrics'),
     path('', include(router.urls)),
 ]
@@ -1,23 +1,36 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
-from django.http import HttpResponse
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, HttpResponseNotModified
 import logging
 
-from .models import Quiz, Question, Attempt
+from .models import Quiz, Question, Attempt, UserQuizStats
+from .answer_keys import apply_grade, get_answer_key, get_answer_keys
+from .stats import record_completed_attempts
+from .renderers import dumps
+from .response_cache import etag_matches, make_etag, public_quiz_cache
+from .pdf import PdfPending, PdfUnavailable, get_attempt_pdf
+from .leaderboard import get_leaderboard
+from .metrics import registry as metrics_registry
+from .authentication import token_expired
+from .throttling import ATTEMPT_THROTTLES, AuthThrottle
+from .search import parse_tags, search_quizzes
+from .exports import EXPORT_FORMATS, attempts_export_response
+from .imports import import_quizzes
+from .pagination import QuizCursorPagination, QuestionCursorPagination, AttemptCursorPagination
 from .serializers import (
-    UserSerializer, QuizSerializer, QuizCreateSerializer,
+    UserSerializer, QuizSerializer, QuizListSerializer, QuizCreateSerializer,
     QuestionSerializer, AttemptSerializer, AttemptCreateSerializer,
-    AttemptSubmitSerializer
+    AttemptSubmitSerializer, AttemptBatchItemSerializer, AttemptBatchSubmitSerializer
 )
 
 
@@ -26,12 +39,20 @@ User = get_user_model()
 
 
 class CustomAuthToken(ObtainAuthToken):
+    # Pas d'authentification sur la connexion : un ancien token expiré ne doit pas la bloquer
+    authentication_classes = []
+    throttle_classes = [AuthThrottle]
+
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data,
                                            context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
+        if token_expired(token):
+            # Rotation : l'ancien token est supprimé (et retiré du cache d'authentification)
+            token.delete()
+            token = Token.objects.create(user=user)
         return Response({
             'access': token.key,
             'username': user.username,
@@ -39,8 +60,16 @@ class CustomAuthToken(ObtainAuthToken):
         })
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    Token.objects.filter(user=request.user).delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthThrottle])
 def register(request):
     serializer = UserSerializer(data=request.data)
     if serializer.is_valid():
@@ -51,15 +80,22 @@ def register(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def render_public_quiz(quiz_id):
+    """JSON du quiz public avec ses questions (mis en cache par version, voir `QuizViewSet.public`)."""
+    quiz = Quiz.objects.select_related('creator').prefetch_related('questions').get(pk=quiz_id)
+    return dumps(QuizSerializer(quiz).data)
+
+
 class QuizViewSet(viewsets.ModelViewSet):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
+    pagination_class = QuizCursorPagination
 
     def get_permissions(self):
         """
         Permissions personnalisées selon l'action
         """
-        if self.action in ['list', 'retrieve', 'public']:
+        if self.action in ['list', 'retrieve', 'public', 'leaderboard', 'search']:
             # Lecture publique autorisée
             return [AllowAny()]
         elif self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -68,19 +104,22 @@ class QuizViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        if self.action == 'public':
-            return Quiz.objects.all()
-        if self.action in ['list', 'retrieve']:
-            # Permettre la lecture de tous les quiz
-            return Quiz.objects.all()
+        if self.action in ['list', 'search']:
+            # Liste résumée : créateur joint et nombre de questions annoté (nombre de requêtes constant)
+            return Quiz.objects.select_related('creator').annotate(question_count=Count('questions'))
+        if self.action in ['retrieve', 'public']:
+            # Permettre la lecture de tous les quiz, avec les questions imbriquées
+            return Quiz.objects.select_related('creator').prefetch_related('questions')
         if self.request.user.is_authenticated:
             # Pour les modifications, filtrer par créateur
             return Quiz.objects.filter(creator=self.request.user)
         return Quiz.objects.none()
 
     def get_serializer_class(self):
-        if self.action == 'create':
+        if self.action in ['create', 'update', 'partial_update']:
             return QuizCreateSerializer
+        if self.action in ['list', 'search']:
+            return QuizListSerializer
         return QuizSerializer
 
     def perform_create(self, serializer):
@@ -90,20 +129,107 @@ class QuizViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Seuls les enseignants peuvent créer des quiz.")
         serializer.save(creator=self.request.user)
 
+    @action(detail=False, methods=['post'])
+    def import_json(self, request):
+        """
+        Import d'une banque de quiz JSON, lue en flux : fichier `file` (multipart)
+        ou corps JSON brut. Chaque quiz est validé séparément ; le rapport liste les erreurs.
+        """
+        if not request.user.is_teacher():
+            raise PermissionDenied("Seuls les enseignants peuvent importer des quiz.")
+        if request.content_type.startswith('multipart/'):
+            stream = request.FILES.get('file')
+        else:
+            # Corps lu directement, sans passer par `request.data` (qui chargerait tout le document)
+            stream = request.stream
+        if stream is None:
+            return Response({'error': 'Aucun fichier fourni'}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_quizzes(stream, request.user)
+        logger.info("Import JSON : %d quiz créés, %d refusés", report['created'], report['failed'])
+        code = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=code)
+
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def public(self, request, pk=None):
+        # Version courante du quiz : seule requête faite quand la réponse est en cache
+        row = Quiz.objects.filter(pk=pk).values_list('pk', 'updated_at').first()
+        if row is None:
+            return Response({'error': 'Quiz non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+        quiz_id, version = row
+
+        etag = make_etag(quiz_id, version)
+        if etag_matches(etag, request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            entry = public_quiz_cache.get_or_render(quiz_id, version, lambda: render_public_quiz(quiz_id))
+            response = HttpResponse(entry.body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def search(self, request):
+        """Recherche plein texte (`?q=`), filtrée par mots-clés (`?tag=`, répétable) et `?difficulty=`."""
+        tags = [tag for value in request.query_params.getlist('tag') for tag in parse_tags(value)]
+        queryset = search_quizzes(
+            self.get_queryset(),
+            text=request.query_params.get('q', '').strip(),
+            tags=tags,
+            difficulty=request.query_params.get('difficulty'),
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def leaderboard(self, request, pk=None):
+        """Meilleurs scores du quiz (`?limit=`, 10 par défaut) et rang de l'utilisateur connecté."""
         try:
-            quiz = Quiz.objects.get(pk=pk)
-            serializer = self.get_serializer(quiz)
-            return Response(serializer.data)
-        except Quiz.DoesNotExist:
+            quiz_id = int(pk)
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            return Response({'error': 'Paramètre invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        if not Quiz.objects.filter(pk=quiz_id).exists():
             return Response({'error': 'Quiz non trouvé'}, status=status.HTTP_404_NOT_FOUND)
 
+        board = get_leaderboard()
+        top = board.top(quiz_id, limit)
+        me = board.rank(quiz_id, request.user.pk) if request.user.is_authenticated else None
+
+        usernames = dict(User.objects.filter(pk__in=[user_id for _, user_id, _ in top]).values_list('pk', 'username'))
+        return Response({
+            'top': [
+                {'rank': rank, 'user_id': user_id, 'username': usernames.get(user_id), 'score': score}
+                for rank, user_id, score in top
+            ],
+            'me': {'rank': me[0], 'score': me[1]} if me else None,
+        })
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Analyse des items (difficulté, discrimination, distracteurs), réservée au créateur."""
+        # Import paresseux : NumPy n'est chargé qu'à la première analyse
+        from .analytics import get_item_analysis
+
+        quiz = self.get_object()
+        return Response(get_item_analysis(quiz))
+
+    @action(detail=True, methods=['get'])
+    def export_attempts(self, request, pk=None):
+        """Toutes les tentatives du quiz en flux (`?output=csv` par défaut, ou `ndjson`), réservé au créateur."""
+        # `?format=` est réservé par DRF à la négociation de contenu
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'Format non supporté (csv ou ndjson)'}, status=status.HTTP_400_BAD_REQUEST)
+        quiz = self.get_object()
+        return attempts_export_response(request, quiz, output)
+
 
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
     permission_classes = [AllowAny]
+    pagination_class = QuestionCursorPagination
 
     def get_queryset(self):
         queryset = Question.objects.all()
@@ -113,18 +239,43 @@ class QuestionViewSet(viewsets.ModelViewSet):
         return queryset
 
 
+GRADE_FIELDS = ('key_version_id', 'choices', 'correct_bits', 'other_answers', 'score', 'completed_at')
+
+
+def claim_attempt(attempt):
+    """
+    Enregistre la correction par un UPDATE conditionnel (tentative encore ouverte).
+    Retourne False si une autre soumission l'a déjà terminée entre-temps.
+    """
+    return Attempt.objects.filter(pk=attempt.pk, completed_at__isnull=True).update(
+        **{field: getattr(attempt, field) for field in GRADE_FIELDS}
+    ) == 1
+
+
+def batch_error(pk, message, details=None):
+    """Résultat d'un élément de soumission groupée en échec (forme unique)."""
+    return {'attempt': pk, 'status': 'error', 'error': message, 'details': details or {}}
+
+
 class AttemptViewSet(viewsets.ModelViewSet):
     queryset = Attempt.objects.all()
     serializer_class = AttemptSerializer
+    pagination_class = AttemptCursorPagination
 
     def get_permissions(self):
-        if self.action in ['create', 'retrieve', 'submit']:
+        if self.action in ['create', 'retrieve', 'submit', 'submit_batch', 'export_pdf']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    def get_throttles(self):
+        # Actions ouvertes aux anonymes : seaux par IP (anonymes) ou par utilisateur
+        if self.action in ['create', 'retrieve', 'submit', 'submit_batch']:
+            return [throttle() for throttle in ATTEMPT_THROTTLES]
+        return super().get_throttles()
+
     def get_queryset(self):
         # Pour les actions authentifiées, filtrer par utilisateur
-        if self.request.user.is_authenticated and self.action not in ['create', 'retrieve', 'submit']:
+        if self.request.user.is_authenticated and self.action not in ['create', 'retrieve', 'submit', 'export_pdf']:
             return Attempt.objects.filter(user=self.request.user)
         # Pour les actions publiques, retourner tous les objets
         return Attempt.objects.all()
@@ -144,122 +295,206 @@ class AttemptViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Tentative non trouvée'}, status=status.HTTP_404_NOT_FOUND)
 
     def create(self, request, *args, **kwargs):
-        logger.info(f"=== CRÉATION D'UNE TENTATIVE ===")
-        logger.debug(f"Request data: {request.data}")
+        logger.info("=== CRÉATION D'UNE TENTATIVE ===")
+        logger.debug("Request data: %s", request.data)
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         if request.user.is_authenticated:
-            logger.info(f"Utilisateur authentifié: {request.user.username}")
+            logger.info("Utilisateur authentifié: %s", request.user.username)
             attempt = serializer.save(user=request.user)
         else:
             logger.info("Création d'une tentative anonyme")
             attempt = serializer.save(user=None)
 
-        logger.info(f"✅ Tentative créée - ID: {attempt.id}")
+        logger.info("✅ Tentative créée - ID: %s", attempt.id)
 
         response_serializer = AttemptSerializer(attempt)
-        logger.debug(f"Réponse envoyée: {response_serializer.data}")
+        logger.debug("Réponse envoyée: %s", response_serializer.data)
 
         headers = self.get_success_headers(response_serializer.data)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, methods=['post'], permission_classes=[AllowAny])
     def submit(self, request, pk=None):
-        logger.info(f"=== SOUMISSION DE LA TENTATIVE {pk} ===")
-        logger.debug(f"Données reçues: {request.data}")
+        logger.info("=== SOUMISSION DE LA TENTATIVE %s ===", pk)
+        logger.debug("Données reçues: %s", request.data)
 
         # Récupérer la tentative directement sans filtrer par utilisateur
         try:
-            attempt = Attempt.objects.get(pk=pk)
+            attempt = Attempt.objects.select_related('quiz').get(pk=pk)
         except Attempt.DoesNotExist:
-            logger.error(f"Tentative {pk} introuvable")
+            logger.error("Tentative %s introuvable", pk)
             return Response({'error': 'Tentative non trouvée'}, status=status.HTTP_404_NOT_FOUND)
 
         if attempt.completed_at:
-            logger.warning(f"Tentative {pk} déjà soumise")
+            logger.warning("Tentative %s déjà soumise", pk)
             return Response({'error': 'Cette tentative a déjà été soumise.'}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = AttemptSubmitSerializer(data=request.data)
         if not serializer.is_valid():
-            logger.error(f"Erreur de validation: {serializer.errors}")
+            logger.error("Erreur de validation: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         answers = serializer.validated_data['answers']
-        quiz = attempt.quiz
-        questions = quiz.questions.all()
-
-        logger.info(f"Traitement de {len(questions)} questions")
+        # Corrigé précompilé (cache LRU par version de quiz) : aucune requête sur les questions
+        answer_key = get_answer_key(attempt.quiz)
 
-        correct_count = 0
-        results = {}
+        logger.info("Traitement de %d questions", answer_key.total)
 
-        for question in questions:
-            question_id = str(question.id)
-            user_answer = answers.get(question_id, '')
-            is_correct = user_answer == question.correct_answer
+        grade = answer_key.grade(answers)
+        correct_count, score = grade.correct_count, grade.score
 
-            if is_correct:
-                correct_count += 1
+        logger.info("Score calculé: %s%% (%d/%d)", score, correct_count, answer_key.total)
 
-            results[question_id] = {
-                'user_answer': user_answer,
-                'correct_answer': question.correct_answer,
-                'is_correct': is_correct
-            }
-
-        score = (correct_count / len(questions)) * 100 if questions else 0
-
-        logger.info(f"Score calculé: {score}% ({correct_count}/{len(questions)})")
-
-        attempt.answers = results
-        attempt.score = score
+        # Stockage compact ; le détail n'est reconstruit que pour la réponse
+        apply_grade(attempt, answer_key, grade)
+        results = answer_key.results(grade.choices, grade.correct_bits, grade.other_answers)
         attempt.completed_at = timezone.now()
-        attempt.save()
+        with transaction.atomic():
+            # Seule la soumission qui termine la tentative compte dans les statistiques
+            if not claim_attempt(attempt):
+                logger.warning("Tentative %s déjà soumise", pk)
+                return Response({'error': 'Cette tentative a déjà été soumise.'}, status=status.HTTP_400_BAD_REQUEST)
+            record_completed_attempts([attempt])
+            transaction.on_commit(lambda: get_leaderboard().record_attempts([attempt]))
 
-        logger.info(f"✅ Tentative {pk} sauvegardée avec succès")
+        logger.info("✅ Tentative %s sauvegardée avec succès", pk)
 
         return Response({
             'score': score,
             'correct_count': correct_count,
-            'total_questions': len(questions),
+            'total_questions': answer_key.total,
             'results': results,
             'answers': results  # Pour compatibilité avec Results.jsx
         })
 
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    def submit_batch(self, request):
+        """
+        Soumission groupée (synchronisation hors ligne) : corrigés chargés une fois,
+        correction en mémoire, puis une transaction où chaque tentative est réclamée
+        par un UPDATE conditionnel (seules les tentatives réclamées sont comptées).
+
+        Un élément en échec a toujours la forme {'attempt', 'status': 'error', 'error': message,
+        'details': erreurs par champ (dict, vide hors erreurs de validation)}.
+        """
+        serializer = AttemptBatchSubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        submissions = serializer.validated_data['submissions']
+
+        items = [AttemptBatchItemSerializer(data=item) for item in submissions]
+        valid = [item.validated_data['attempt'] for item in items if item.is_valid()]
+        attempts = Attempt.objects.select_related('quiz').in_bulk(valid)
+        answer_keys = get_answer_keys({a.quiz_id: a.quiz for a in attempts.values()}.values())
+
+        results = []
+        graded = []
+        seen = set()
+        now = timezone.now()
+        for item, item_serializer in zip(submissions, items):
+            if item_serializer.errors:
+                results.append(batch_error(item.get('attempt'), 'Soumission invalide.', item_serializer.errors))
+                continue
+            pk = item_serializer.validated_data['attempt']
+            attempt = attempts.get(pk)
+            if attempt is None:
+                results.append(batch_error(pk, 'Tentative non trouvée'))
+            elif attempt.completed_at or pk in seen:
+                results.append(batch_error(pk, 'Cette tentative a déjà été soumise.'))
+            else:
+                answer_key = answer_keys[attempt.quiz_id]
+                grade = answer_key.grade(item_serializer.validated_data['answers'])
+                apply_grade(attempt, answer_key, grade)
+                attempt.completed_at = now
+                seen.add(pk)
+                result = {
+                    'attempt': pk,
+                    'status': 'ok',
+                    'score': attempt.score,
+                    'correct_count': grade.correct_count,
+                    'total_questions': answer_key.total,
+                }
+                graded.append((attempt, result))
+                results.append(result)
+
+        claimed = []
+        if graded:
+            with transaction.atomic():
+                for attempt, result in graded:
+                    # Une soumission concurrente a pu terminer la tentative depuis la lecture
+                    if claim_attempt(attempt):
+                        claimed.append(attempt)
+                    else:
+                        result.clear()
+                        result.update(batch_error(attempt.pk, 'Cette tentative a déjà été soumise.'))
+                if claimed:
+                    record_completed_attempts(claimed)
+                    transaction.on_commit(lambda: get_leaderboard().record_attempts(claimed))
+
+        logger.info("Soumission groupée : %d/%d tentatives enregistrées", len(claimed), len(submissions))
+        return Response({'results': results})
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def export_pdf(self, request, pk=None):
+        try:
+            attempt = Attempt.objects.select_related('quiz', 'user').get(pk=pk)
+        except Attempt.DoesNotExist:
+            return Response({'error': 'Tentative non trouvée'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not attempt.completed_at:
+            return Response({'error': "Cette tentative n'a pas encore été soumise."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Rendu dans le pool de processus, puis servi depuis le cache disque ; jamais attendu ici
+        questions = attempt.quiz.questions.all()
+        try:
+            path = get_attempt_pdf(attempt, questions)
+        except PdfPending:
+            response = Response({'status': 'pending', 'url': request.build_absolute_uri()},
+                                status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = str(getattr(settings, 'PDF_RETRY_AFTER', 1))
+            return response
+        except PdfUnavailable:
+            response = Response({'error': "La génération du PDF a échoué, réessayez dans quelques secondes."},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = str(getattr(settings, 'PDF_RETRY_AFTER', 1))
+            return response
+        return FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename=f"resultats_tentative_{attempt.pk}.pdf", content_type='application/pdf')
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_stats(request):
-    user = request.user
-    attempts = Attempt.objects.filter(user=user, completed_at__isnull=False)
-
-    total_attempts = attempts.count()
-    avg_score = sum(a.score for a in attempts) / total_attempts if total_attempts > 0 else 0
-
-    quiz_stats = {}
-    for attempt in attempts:
-        quiz_id = attempt.quiz.id
-        if quiz_id not in quiz_stats:
-            quiz_stats[quiz_id] = {
-                'quiz_title': attempt.quiz.title,
-                'attempts': 0,
-                'best_score': 0,
-                'avg_score': 0,
-                'scores': []
-            }
-        quiz_stats[quiz_id]['attempts'] += 1
-        quiz_stats[quiz_id]['scores'].append(attempt.score)
-        quiz_stats[quiz_id]['best_score'] = max(quiz_stats[quiz_id]['best_score'], attempt.score)
-
-    for quiz_id in quiz_stats:
-        scores = quiz_stats[quiz_id]['scores']
-        quiz_stats[quiz_id]['avg_score'] = sum(scores) / len(scores) if scores else 0
-        del quiz_stats[quiz_id]['scores']
-
-    return Response({
+    # Lecture unique de l'agrégat matérialisé (voir api/stats.py)
+    rows = UserQuizStats.objects.filter(user=request.user).select_related('quiz').order_by('-last_attempt_at')
+    return Response(build_user_stats(rows))
+
+
+def build_user_stats(rows):
+    total_attempts = 0
+    score_sum = 0
+    quiz_stats = []
+    for row in rows:
+        total_attempts += row.attempt_count
+        score_sum += row.score_sum
+        quiz_stats.append({
+            'quiz_title': row.quiz.title,
+            'attempts': row.attempt_count,
+            'best_score': row.best_score,
+            'avg_score': row.avg_score,
+        })
+
+    return {
         'total_attempts': total_attempts,
-        'average_score': avg_score,
-        'quiz_stats': list(quiz_stats.values())
-    })
\ No newline at end of file
+        'average_score': score_sum / total_attempts if total_attempts > 0 else 0,
+        'quiz_stats': quiz_stats
+    }
+
+
+def metrics(request):
+    """Histogrammes de latence par route au format texte Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -2,6 +2,9 @@
 ASGI config for quizmaster project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections go to the live exam mode
+(``api/live.py``). Serve it with an ASGI server, e.g.
+``uvicorn quizmaster.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +16,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quizmaster.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importé après l'initialisation de Django (modèles chargés)
+from api.live import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,70 @@
+"""
+Profil de base de données configuré par variables d'environnement.
+
+- SQLite (défaut, `DB_ENGINE=sqlite`) : journal WAL, synchronous=NORMAL et
+  busy_timeout (PRAGMA appliqués à chaque connexion, voir api/signals.py),
+  connexions réutilisées entre les requêtes (CONN_MAX_AGE).
+- PostgreSQL (`DB_ENGINE=postgresql`) : connexions persistantes avec
+  vérification de santé ; `DB_PGBOUNCER=1` pour passer par un pooler en mode
+  transaction (curseurs côté serveur désactivés).
+"""
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def sqlite_config(base_dir):
+    busy_timeout_ms = env_int('DB_BUSY_TIMEOUT_MS', 5000)
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_NAME', base_dir / 'db.sqlite3'),
+        'CONN_MAX_AGE': env_int('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Attente du verrou d'écriture côté pilote Python (en secondes)
+            'timeout': busy_timeout_ms / 1000,
+        },
+        # Base de test sur fichier : le mode WAL et les écritures concurrentes y sont testables
+        'TEST': {
+            'NAME': os.environ.get('DB_TEST_NAME', base_dir / 'test_db.sqlite3'),
+        },
+    }
+
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': os.environ.get('DB_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('DB_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': env_int('DB_BUSY_TIMEOUT_MS', 5000),
+        'foreign_keys': 'ON',
+    }
+
+
+def postgresql_config():
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'quizmaster'),
+        'USER': os.environ.get('DB_USER', 'quizmaster'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': env_int('DB_CONN_MAX_AGE', 600),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': env_int('DB_CONNECT_TIMEOUT', 5),
+        },
+    }
+    if os.environ.get('DB_PGBOUNCER') == '1':
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
+def database_config(base_dir):
+    engine = os.environ.get('DB_ENGINE', 'sqlite')
+    if engine == 'postgresql':
+        return postgresql_config()
+    if engine == 'sqlite':
+        return sqlite_config(base_dir)
+    raise ValueError(f"DB_ENGINE inconnu : {engine!r} (attendu : sqlite ou postgresql)")
@@ -2,6 +2,8 @@ from pathlib import Path
 import os
 from datetime import timedelta
 
+from .database import database_config, sqlite_pragmas
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-w89@-1*(2qcyaz7r&qzk2cl^#s(!+u2ezuemf*u4)&a@ix)5c4'
@@ -28,7 +30,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ASGIRoutingMiddleware',  # en premier : vues async sous ASGI (quizmaster/urls_asgi.py)
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',  # avant les middlewares qui lisent ou modifient le contenu
+    'api.middleware.WriteConcurrencyLimitMiddleware',  # tôt : rejet des écritures en surcharge avant session et vue
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,9 +41,12 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.PerformanceMiddleware',  # en dernier : Server-Timing au plus près de la vue
 ]
 
 ROOT_URLCONF = 'quizmaster.urls'
+# Sous ASGI : mêmes URL, lectures fréquentes servies par des vues async (api/async_views.py)
+ASGI_URLCONF = 'quizmaster.urls_asgi'
 
 TEMPLATES = [
     {
@@ -58,12 +66,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'quizmaster.wsgi.application'
 
+# Profil de base de données piloté par l'environnement (voir quizmaster/database.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
+SQLITE_PRAGMAS = sqlite_pragmas()
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,15 +105,129 @@ AUTH_USER_MODEL = 'api.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',  # ← CHANGÉ pour utiliser Token au lieu de JWT
+        'api.authentication.CachedTokenAuthentication',  # Token DRF avec cache en mémoire (api/authentication.py)
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',  # ← CHANGÉ pour permettre l'accès public aux endpoints nécessaires
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',  # orjson si installé, json de la bibliothèque standard sinon
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Seaux à jetons (api/throttling.py), appliqués aux tentatives et à l'inscription/connexion.
+    # Une classe derrière un NAT partage une IP : taux anonymes et `auth` larges
+    'DEFAULT_THROTTLE_RATES': {
+        'attempts_anon': os.environ.get('THROTTLE_ATTEMPTS_ANON', '600/min'),
+        'attempts_user': os.environ.get('THROTTLE_ATTEMPTS_USER', '120/min'),
+        'auth': os.environ.get('THROTTLE_AUTH', '60/min'),
+    },
+    # Proxys de confiance devant l'application : 0 = REMOTE_ADDR seul, X-Forwarded-For ignoré
+    # (sinon un client choisit son IP et obtient un seau neuf à chaque requête)
+    'NUM_PROXIES': int(os.environ.get('THROTTLE_NUM_PROXIES', '0')),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# Stockage des seaux de limitation : en mémoire (par processus) ou Redis (partagé entre workers,
+# paquet `redis` requis). THROTTLE_ENABLED=0 désactive la limitation (serveur cible de
+# `loadtest --base-url` : tous les élèves virtuels partagent une IP)
+THROTTLE_ENABLED = os.environ.get('THROTTLE_ENABLED', '1') != '0'
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'api.throttling.InMemoryBucketStore')
+THROTTLE_REDIS_URL = os.environ.get('THROTTLE_REDIS_URL', 'redis://localhost:6379/0')
+THROTTLE_CACHE_SIZE = 100000
+
+# Écritures simultanées par processus (api/middleware.py) : au-delà, attente maximale (s)
+# puis 429 avec Retry-After (s). None désactive la limite
+WRITE_CONCURRENCY_LIMIT = 16
+WRITE_CONCURRENCY_WAIT = 1.0
+WRITE_RETRY_AFTER = 1
+
+# JSON rapide (orjson) pour le rendu et la lecture ; False force le module json standard
+FAST_JSON = True
+
+# Compression des réponses (api/middleware.py) : taille minimale en octets et qualité
+# brotli (0-11, utilisé si le paquet `brotli` est installé ; gzip sinon)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Cache d'authentification par token : durée de vie d'une entrée (s), taille maximale,
+# et expiration optionnelle des tokens (en secondes, None = jamais)
+AUTH_TOKEN_CACHE_TTL = 300
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_EXPIRY = int(os.environ['AUTH_TOKEN_EXPIRY']) if os.environ.get('AUTH_TOKEN_EXPIRY') else None
+
+# Taille de page par défaut des listes paginées par curseur (api/pagination.py)
+API_PAGE_SIZE = 20
+
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 
+# Nombre de corrigés de quiz conservés en mémoire (cache LRU par processus)
+ANSWER_KEY_CACHE_SIZE = 512
+
+# Nombre de quiz publics dont le JSON rendu est conservé en mémoire (ETag / 304)
+PUBLIC_QUIZ_CACHE_SIZE = 256
+
+# Export PDF : rendu dans un pool de processus, fichiers conservés sur disque
+PDF_CACHE_DIR = os.path.join(DATA_DIR, 'pdf')
+PDF_RENDER_WORKERS = 2
+# Délai (s) avant de redemander un PDF en cours de rendu (202) ou en échec (503)
+PDF_RETRY_AFTER = 1
+# Élagage du cache disque (au plus toutes les PDF_CACHE_PRUNE_INTERVAL secondes)
+PDF_CACHE_MAX_AGE_DAYS = 30
+PDF_CACHE_MAX_BYTES = 500 * 1024 * 1024
+PDF_CACHE_PRUNE_INTERVAL = 60
+
+# Budget de démarrage à froid (imports + chargement des URLs), vérifié par `manage.py profile_startup`
+STARTUP_BUDGET_MS = 1500
+
+# Nombre de quiz dont l'analyse des items est conservée en mémoire (mise à jour incrémentale)
+ANALYTICS_CACHE_SIZE = 64
+# Fenêtre relue avant le filigrane de l'analyse : tentatives validées après de plus récentes
+ANALYTICS_RESCAN_SECONDS = 60
+
+# Classements par quiz : 'api.leaderboard.DatabaseLeaderboard' (UserQuizStats, cohérent entre workers),
+# 'api.leaderboard.InMemoryLeaderboard' (par processus, rechargé après LEADERBOARD_TTL secondes)
+# ou 'api.leaderboard.RedisLeaderboard' (partagé, nécessite le paquet redis)
+LEADERBOARD_BACKEND = os.environ.get('LEADERBOARD_BACKEND', 'api.leaderboard.DatabaseLeaderboard')
+LEADERBOARD_REDIS_URL = os.environ.get('LEADERBOARD_REDIS_URL', 'redis://localhost:6379/0')
+LEADERBOARD_CACHE_SIZE = 256
+LEADERBOARD_TTL = 30
+
+# Export en flux des tentatives : taille des paquets lus en base et nombre de lignes par bloc envoyé
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BATCH_ROWS = 500
+
+# Import en flux des banques de quiz : taille des blocs lus, taille maximale d'un quiz
+# dans le document et nombre de quiz enregistrés par transaction
+IMPORT_READ_SIZE = 64 * 1024
+IMPORT_MAX_ITEM_SIZE = 1024 * 1024
+IMPORT_BATCH_SIZE = 100
+
+# Rétention des tentatives (manage.py apply_retention, api/archive.py) : âge des tentatives
+# abandonnées supprimées (h), âge des tentatives terminées archivées (jours, None = jamais),
+# tentatives par lot et par transaction, niveau de compression zlib des archives
+RETENTION_ABANDONED_HOURS = 24
+RETENTION_ARCHIVE_DAYS = 180
+RETENTION_BATCH_SIZE = 500
+ARCHIVE_COMPRESSION_LEVEL = 9
+
+# Mode examen en direct (WebSocket, api/live.py) : couche de diffusion, intervalle de
+# publication des comptes de réponses (s) et taille de la file d'envoi par connexion
+LIVE_CHANNEL_LAYER = 'api.live.InMemoryChannelLayer'
+LIVE_TICK_INTERVAL = 0.5
+LIVE_SEND_QUEUE_SIZE = 64
+# Délai (s) avant la fermeture d'une session sans connexion (reconnexion possible) ;
+# les réponses reçues sont alors enregistrées comme à la fin de l'examen
+LIVE_GRACE_PERIOD = 30
+# Connexions simultanées maximales par session (hors enseignant)
+LIVE_MAX_CONNECTIONS = 200
+
+# Adresses autorisées à lire /api/metrics/ (format Prometheus)
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -126,6 +247,11 @@ LOGGING = {
         'require_debug_true': {
             '()': 'django.utils.log.RequireDebugTrue',
         },
+        'payload_sampling': {
+            '()': 'api.log.PayloadSamplingFilter',
+            'debug_sample_rate': float(os.environ.get('API_LOG_DEBUG_SAMPLE_RATE', '1.0' if DEBUG else '0.01')),
+            'max_length': 500,
+        },
     },
     'handlers': {
         'console': {
@@ -135,29 +261,48 @@ LOGGING = {
         },
         'file_debug': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(BASE_DIR, 'debug.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
             'formatter': 'verbose',
             'encoding': 'utf-8',
+            'delay': True,  # fichier ouvert au premier message, pas au démarrage
         },
         'file_error': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(BASE_DIR, 'errors.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
             'formatter': 'verbose',
             'encoding': 'utf-8',
+            'delay': True,  # fichier ouvert au premier message, pas au démarrage
         },
         'file_api': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(BASE_DIR, 'api.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
             'formatter': 'verbose',
             'encoding': 'utf-8',
+            'delay': True,  # fichier ouvert au premier message, pas au démarrage
+        },
+        # Handlers asynchrones (voir api/log.py) : leur nom doit suivre celui de leurs cibles
+        'queue_api': {
+            '()': 'api.log.AsyncQueueHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file_api', 'cfg://handlers.file_error'],
+            'filters': ['payload_sampling'],
+        },
+        'queue_django': {
+            '()': 'api.log.AsyncQueueHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file_debug'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file_debug'],
+            'handlers': ['queue_django'],
             'level': 'INFO',
             'propagate': False,
         },
@@ -166,14 +311,15 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        # Requêtes SQL journalisées uniquement sur demande (SQL_DEBUG=1)
         'django.db.backends': {
             'handlers': ['file_debug'],
-            'level': 'DEBUG',
+            'level': 'DEBUG' if os.environ.get('SQL_DEBUG') == '1' else 'INFO',
             'propagate': False,
         },
         'api': {
-            'handlers': ['console', 'file_api', 'file_debug'],
-            'level': 'DEBUG',
+            'handlers': ['queue_api'],
+            'level': os.environ.get('API_LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO'),
             'propagate': False,
         },
     },
@@ -0,0 +1,17 @@
+"""
+URL configuration used under ASGI (selected by api.middleware.ASGIRoutingMiddleware).
+
+The hot read paths are served by native async views (api/async_views.py);
+every other URL falls through to the regular configuration.
+"""
+from django.urls import path
+
+from api import async_views
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('api/quizzes/<int:pk>/public/', async_views.public_quiz, name='quiz-public-async'),
+    path('api/attempts/<int:pk>/', async_views.attempt_detail, name='attempt-detail-async'),
+    path('api/stats/', async_views.user_stats, name='user_stats-async'),
+] + wsgi_urlpatterns
@@ -4,7 +4,9 @@ import { getQuizzes } from '../utils/api';
 
 function Dashboard() {
   const [quizzes, setQuizzes] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const [copiedId, setCopiedId] = useState(null);
   const [copyMessage, setCopyMessage] = useState('');
@@ -19,7 +21,8 @@ function Dashboard() {
       setLoading(true);
       setError('');
       const response = await getQuizzes();
-      setQuizzes(response.data);
+      setQuizzes(response.data.results);  // liste paginée par curseur
+      setNextPage(response.data.next);
     } catch (err) {
       console.error('Erreur lors du chargement des quiz', err);
       setError('Impossible de charger vos quiz. Veuillez réessayer.');
@@ -28,6 +31,22 @@ function Dashboard() {
     }
   };
 
+  // Page suivante ajoutée à la liste déjà affichée
+  const loadMoreQuizzes = async () => {
+    try {
+      setLoadingMore(true);
+      setError('');
+      const response = await getQuizzes(nextPage);
+      setQuizzes((previous) => [...previous, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      console.error('Erreur lors du chargement des quiz', err);
+      setError('Impossible de charger la suite de vos quiz. Veuillez réessayer.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Fonction pour copier le lien d'un quiz
   const copyQuizLink = async (quizId, event) => {
     if (event) {
@@ -275,6 +294,19 @@ function Dashboard() {
               </div>
             ))}
           </div>
+
+          {nextPage && (
+            <div style={{ textAlign: 'center', marginTop: '2rem' }}>
+              <button
+                className="btn btn-secondary"
+                onClick={loadMoreQuizzes}
+                disabled={loadingMore}
+                style={{ width: 'auto', padding: '0.8rem 1.5rem' }}
+              >
+                {loadingMore ? 'Chargement...' : 'Charger plus de quiz'}
+              </button>
+            </div>
+          )}
         </>
       )}
     </div>
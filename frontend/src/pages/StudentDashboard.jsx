@@ -5,14 +5,17 @@ import { getAttempts } from '../utils/api';
 function StudentDashboard() {
   const [quizUrl, setQuizUrl] = useState('');
   const [attempts, setAttempts] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const navigate = useNavigate();
 
   useEffect(() => {
     const fetchAttempts = async () => {
       try {
         const response = await getAttempts();
-        setAttempts(response.data); // adapter selon la structure reçue
+        setAttempts(response.data.results); // liste paginée par curseur
+        setNextPage(response.data.next);
       } catch (error) {
         console.error('Erreur récupération tentatives:', error);
       } finally {
@@ -22,6 +25,20 @@ function StudentDashboard() {
     fetchAttempts();
   }, []);
 
+  // Page suivante ajoutée aux tentatives déjà affichées
+  const loadMoreAttempts = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await getAttempts(nextPage);
+      setAttempts((previous) => [...previous, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error('Erreur récupération tentatives:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Accéder au quiz en collant l'URL (ex: http://localhost:5173/quiz/123)
   const handleGoToQuiz = () => {
     try {
@@ -80,6 +97,11 @@ function StudentDashboard() {
             </tbody>
           </table>
         )}
+        {nextPage && (
+          <button onClick={loadMoreAttempts} disabled={loadingMore} style={{ marginTop: 10 }}>
+            {loadingMore ? 'Chargement...' : 'Charger plus de tentatives'}
+          </button>
+        )}
       </div>
     </div>
   );
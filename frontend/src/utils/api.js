@@ -24,10 +24,16 @@ api.interceptors.request.use(
   }
 );
 
-// Intercepteur pour gérer les erreurs d'authentification
+// Intercepteur pour gérer les erreurs d'authentification et la surcharge (429)
 api.interceptors.response.use(
   (response) => response,
   (error) => {
+    const retryAfter = Number(error.response?.headers?.['retry-after']);
+    if (error.response?.status === 429 && !error.config._retried && retryAfter <= 5) {
+      // Requête refusée avant traitement : un seul nouvel essai après le délai indiqué
+      error.config._retried = true;
+      return new Promise((resolve) => setTimeout(resolve, retryAfter * 1000)).then(() => api(error.config));
+    }
     if (error.response?.status === 401) {
       // Token invalide ou expiré
       localStorage.clear();
@@ -40,14 +46,21 @@ api.interceptors.response.use(
 // ==================== AUTHENTIFICATION ====================
 export const register = (userData) => api.post('/register/', userData);
 export const login = (credentials) => api.post('/login/', credentials);
+export const logout = () => api.post('/logout/');
+
+// Listes paginées par curseur : `next` est l'URL complète de la page suivante, seul son curseur est repris
+const cursorParams = (next) => (next ? { cursor: new URL(next).searchParams.get('cursor') } : {});
 
 // ==================== QUIZ (pour les enseignants) ====================
-// Récupère uniquement les quiz créés par l'utilisateur connecté
-export const getQuizzes = () => api.get('/quizzes/');
+// Récupère uniquement les quiz créés par l'utilisateur connecté (page suivante si `next` est fourni)
+export const getQuizzes = (next) => api.get('/quizzes/', { params: cursorParams(next) });
 
 // Récupère un quiz spécifique de l'utilisateur connecté
 export const getQuiz = (id) => api.get(`/quizzes/${id}/`);
 
+// Recherche des quiz (texte, mots-clés, difficulté)
+export const searchQuizzes = (params) => api.get('/quizzes/search/', { params });
+
 // Récupère un quiz public (pour les étudiants via lien partagé) - SANS AUTH
 export const getPublicQuiz = (id) => {
   console.log('API: Chargement du quiz public', id);
@@ -60,6 +73,10 @@ export const createQuiz = (quizData) => api.post('/quizzes/', quizData);
 // Exporte un quiz au format JSON
 export const exportQuizJSON = (id) => api.get(`/quizzes/${id}/export_json/`);
 
+// Exporte toutes les tentatives d'un quiz (créateur uniquement) : 'csv' ou 'ndjson'
+export const exportQuizAttempts = (id, output = 'csv') =>
+  api.get(`/quizzes/${id}/export_attempts/`, { params: { output }, responseType: 'blob' });
+
 // Importe un quiz depuis un fichier JSON
 export const importQuizJSON = (quizData) => api.post('/quizzes/import_json/', quizData);
 
@@ -77,8 +94,8 @@ export const submitAttempt = (attemptId, answers) => {
   return axios.post(`${API_URL}/attempts/${attemptId}/submit/`, { answers });
 };
 
-// Récupère toutes les tentatives de l'utilisateur connecté
-export const getAttempts = () => api.get('/attempts/');
+// Récupère les tentatives de l'utilisateur connecté (page suivante si `next` est fourni)
+export const getAttempts = (next) => api.get('/attempts/', { params: cursorParams(next) });
 
 // Récupère une tentative spécifique - SANS AUTH pour voir les résultats
 export const getAttempt = (attemptId) => {
@@ -87,8 +104,25 @@ export const getAttempt = (attemptId) => {
 };
 
 // Exporte les résultats d'une tentative en PDF - SANS AUTH
-export const exportAttemptPDF = (attemptId) => 
-  axios.get(`${API_URL}/attempts/${attemptId}/export_pdf/`, { responseType: 'blob' });
+export const exportAttemptPDF = async (attemptId) => {
+  // 202 : PDF en cours de rendu côté serveur, nouvelle demande après le délai indiqué
+  for (let tries = 0; tries < 20; tries += 1) {
+    const response = await axios.get(`${API_URL}/attempts/${attemptId}/export_pdf/`, { responseType: 'blob' });
+    if (response.status !== 202) return response;
+    const retryAfter = Number(response.headers['retry-after']) || 1;
+    await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+  }
+  throw new Error('PDF non disponible');
+};
+
+// ==================== EXAMEN EN DIRECT ====================
+// Ouvre la session en direct d'un quiz (WebSocket) ; le token identifie l'enseignant
+export const openLiveSession = (quizId) => {
+  const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+  const token = localStorage.getItem('token');
+  const query = token ? `?token=${encodeURIComponent(token)}` : '';
+  return new WebSocket(`${protocol}://${window.location.host}/ws/live/${quizId}/${query}`);
+};
 
 // ==================== STATISTIQUES ====================
 // Récupère les statistiques de l'utilisateur connecté